@@ -1,6 +1,7 @@
 import os
+import threading
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain.agents import create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate
 from .tools import (
     get_recent_sales_stats, 
@@ -13,10 +14,11 @@ from .tools import (
     get_daily_report_details,
     search_expenses
 )
+from .executor import ParallelAgentExecutor
 
 # Configuration
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 MODEL_NAME = "gemini-robotics-er-1.5-preview"
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "true").lower() in ("1", "true", "yes") # log each step to stdout
 
 # Tools
 tools = [
@@ -31,30 +33,16 @@ tools = [
     search_expenses
 ]
 
-from langchain_community.chat_message_histories import SQLChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.runnables.history import RunnableWithMessageHistory
-from database import SQLALCHEMY_DATABASE_URL
+from .history import WindowedChatMessageHistory
 
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
-    return SQLChatMessageHistory(
-        session_id=session_id,
-        connection_string=SQLALCHEMY_DATABASE_URL,
-        table_name="chat_history"
-    )
+    # Recent window only, on the app's own engines (sync for invoke, async for streaming)
+    return WindowedChatMessageHistory(session_id)
 
-def get_agent_executor():
-    if not GOOGLE_API_KEY:
-        return None
-
-    llm = ChatGoogleGenerativeAI(
-        model=MODEL_NAME,
-        temperature=0,
-        google_api_key=GOOGLE_API_KEY
-    )
-
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are a highly capable Business Intelligence Assistant for 'TikTrack'.
+prompt = ChatPromptTemplate.from_messages([
+    ("system", """You are a highly capable Business Intelligence Assistant for 'TikTrack'.
         Your role is to assist with both Financial Analysis and Inventory Management.
         
         You have access to real-time data about sales, expenses, inventory levels, and owner equity.
@@ -68,21 +56,67 @@ def get_agent_executor():
         
         If a tool returns empty data, state that no data is available.
         """),
-        ("placeholder", "{chat_history}"),
-        ("human", "{input}"),
-        ("placeholder", "{agent_scratchpad}"),
-    ])
+    ("placeholder", "{chat_history}"),
+    ("human", "{input}"),
+    ("placeholder", "{agent_scratchpad}"),
+])
+
+def get_agent_config():
+    """
+    Settings the agent is built from; a change in any of them triggers a rebuild.
+    Read on every call so a rotated key or model switch takes effect without a restart.
+    """
+    return (
+        os.getenv("GOOGLE_API_KEY"),
+        os.getenv("AGENT_MODEL", MODEL_NAME),
+        float(os.getenv("AGENT_TEMPERATURE", "0")),
+    )
 
+def create_llm(config):
+    api_key, model, temperature = config
+    return ChatGoogleGenerativeAI(
+        model=model,
+        temperature=temperature,
+        google_api_key=api_key
+    )
+
+def build_agent_executor(llm, history_factory=None):
     agent = create_tool_calling_agent(llm, tools, prompt)
     
-    agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+    agent_executor = ParallelAgentExecutor(agent=agent, tools=tools, verbose=AGENT_VERBOSE)
     
     # Wrap with message history
     agent_with_chat_history = RunnableWithMessageHistory(
         agent_executor,
-        get_session_history,
+        history_factory or get_session_history,
         input_messages_key="input",
         history_messages_key="chat_history",
     )
     
     return agent_with_chat_history
+
+# Process-wide agent: built once (at startup or on first use) and shared by all requests
+_agent = None
+_agent_config = None
+_agent_lock = threading.Lock()
+
+def get_agent_executor():
+    global _agent, _agent_config
+    config = get_agent_config()
+    if not config[0]:
+        return None
+
+    if _agent is not None and _agent_config == config:
+        return _agent
+
+    with _agent_lock:
+        if _agent is None or _agent_config != config:
+            _agent = build_agent_executor(create_llm(config))
+            _agent_config = config
+        return _agent
+
+def reset_agent_executor():
+    global _agent, _agent_config
+    with _agent_lock:
+        _agent = None
+        _agent_config = None
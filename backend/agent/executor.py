@@ -0,0 +1,125 @@
+"""
+AgentExecutor that runs the tool calls of one step concurrently.
+
+When the model asks for several tools at once they don't depend on each other
+(each opens its own session), so a step takes about as long as its slowest tool
+instead of the sum of all of them.
+"""
+from concurrent.futures import Future
+from collections import deque
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentStep
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+import threading
+import time
+import os
+
+# Every running tool holds a DB connection, so keep this below the engine's pool size
+AGENT_TOOL_WORKERS = int(os.getenv("AGENT_TOOL_WORKERS", "4"))
+
+# Copies contextvars into the worker, so callbacks and tracing still see the parent run
+_tool_pool = ContextThreadPoolExecutor(max_workers=AGENT_TOOL_WORKERS, thread_name_prefix="agent-tool")
+
+class ToolTimings:
+    """
+    Per-tool run times, and for steps with more than one tool call the wall time
+    against the sum of the tool times (what running them one by one would cost).
+    """
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._tools = {}
+        self._step_wall = deque(maxlen=window)
+        self._step_serial = deque(maxlen=window)
+
+    def record_tool(self, name: str, seconds: float):
+        with self._lock:
+            stats = self._tools.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+
+    def record_step(self, wall: float, serial: float):
+        with self._lock:
+            self._step_wall.append(wall)
+            self._step_serial.append(serial)
+
+    def snapshot(self):
+        with self._lock:
+            wall, serial = sum(self._step_wall), sum(self._step_serial)
+            return {
+                "workers": AGENT_TOOL_WORKERS,
+                "tools": {
+                    name: {
+                        "count": s["count"],
+                        "avg_ms": s["total"] / s["count"] * 1000,
+                        "max_ms": s["max"] * 1000,
+                    } for name, s in self._tools.items()
+                },
+                "parallel_steps": {
+                    "count": len(self._step_wall),
+                    "avg_wall_ms": wall / len(self._step_wall) * 1000 if self._step_wall else 0.0,
+                    "avg_serial_ms": serial / len(self._step_serial) * 1000 if self._step_serial else 0.0,
+                    "speedup": serial / wall if wall else 0.0,
+                },
+            }
+
+tool_timings = ToolTimings()
+
+def _record_steps(steps, wall):
+    if len(steps) > 1:
+        tool_timings.record_step(wall, sum(step.observation_seconds for step in steps))
+
+class TimedAgentStep(AgentStep):
+    observation_seconds: float = 0.0
+
+class ParallelAgentExecutor(AgentExecutor):
+    """
+    The base step loop yields the step's actions, then performs them one at a time.
+    Here "performing" only submits the call to the tool pool; _iter_next_step then
+    waits for all of them and yields the results in the model's order.
+    """
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        return _tool_pool.submit(self._run_action, name_to_tool_map, color_mapping, agent_action, run_manager)
+
+    def _run_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        started = time.perf_counter()
+        step = super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        return self._timed(step, time.perf_counter() - started)
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        # The async loop already gathers the step's actions; only add the timing
+        started = time.perf_counter()
+        step = await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        return self._timed(step, time.perf_counter() - started)
+
+    def _timed(self, step: AgentStep, seconds: float):
+        tool_timings.record_tool(step.action.tool, seconds)
+        return TimedAgentStep(action=step.action, observation=step.observation, observation_seconds=seconds)
+
+    def _iter_next_step(self, *args, **kwargs):
+        pending = []
+        started = None
+        for item in super()._iter_next_step(*args, **kwargs):
+            if isinstance(item, Future):
+                if started is None:
+                    started = time.perf_counter()
+                pending.append(item)
+            else:
+                yield item
+        if not pending:
+            return
+        steps = [future.result() for future in pending]
+        _record_steps(steps, time.perf_counter() - started)
+        yield from steps
+
+    async def _aiter_next_step(self, *args, **kwargs):
+        steps = []
+        started = None
+        async for item in super()._aiter_next_step(*args, **kwargs):
+            if isinstance(item, AgentAction) and started is None:
+                started = time.perf_counter()
+            elif isinstance(item, TimedAgentStep):
+                steps.append(item)
+            yield item
+        if started is not None:
+            _record_steps(steps, time.perf_counter() - started)
@@ -0,0 +1,63 @@
+"""
+Scripted stand-in for the Gemini chat model, for benchmarks and tests.
+
+Each call returns the next AIMessage from `script` (cycling), so a run of the
+agent issues exactly the tool calls written down in advance, with no network.
+"""
+import json
+import time
+from typing import Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+def tool_step(*calls):
+    """
+    One model step requesting tools: tool_step(("get_owner_balances", {}), ("search_expenses", {"query": "ads"})).
+    """
+    return AIMessage(content="", tool_calls=[
+        {"name": name, "args": args, "id": f"call-{i}-{name}"} for i, (name, args) in enumerate(calls)
+    ])
+
+def answer_step(text: str):
+    return AIMessage(content=text)
+
+class ScriptedChatModel(BaseChatModel):
+    script: List[AIMessage]
+    latency: float = 0.0 # seconds slept per call, to stand in for model time
+    position: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        # Tool schemas only matter to a real model
+        return self
+
+    def _next(self) -> AIMessage:
+        message = self.script[self.position % len(self.script)]
+        self.position += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return message
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._next())])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        message = self._next()
+        if message.tool_calls:
+            # Tool calls arrive whole, in a single chunk
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                for i, c in enumerate(message.tool_calls)
+            ]))
+            return
+        words = message.content.split(" ")
+        for i, word in enumerate(words):
+            text = word if i == len(words) - 1 else word + " "
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
@@ -0,0 +1,137 @@
+import os
+import json
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Sequence
+from sqlalchemy import select, delete, func
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from fastapi.concurrency import run_in_threadpool
+from database import engine, async_engine
+import models
+
+# Window of past conversation put in front of each prompt
+HISTORY_TURNS = int(os.getenv("AGENT_HISTORY_TURNS", "10")) # human + ai pairs
+HISTORY_TOKEN_BUDGET = int(os.getenv("AGENT_HISTORY_TOKEN_BUDGET", "2000"))
+# Retention
+HISTORY_MAX_MESSAGES = int(os.getenv("AGENT_HISTORY_MAX_MESSAGES", "200")) # kept per session
+HISTORY_TTL_DAYS = int(os.getenv("AGENT_HISTORY_TTL_DAYS", "30")) # idle sessions expire after this
+HISTORY_PRUNE_INTERVAL_MINUTES = float(os.getenv("AGENT_HISTORY_PRUNE_INTERVAL_MINUTES", "60"))
+
+table = models.ChatHistory.__table__
+
+def estimate_tokens(message: BaseMessage):
+    # ~4 characters per token; close enough to budget a prompt without a tokenizer
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    return len(content) // 4 + 1
+
+def window_messages(messages: List[BaseMessage], token_budget: int = HISTORY_TOKEN_BUDGET):
+    """
+    Trims newest-last messages to the token budget, keeping the most recent ones
+    and never starting the window on an AI reply without its question.
+    """
+    kept = []
+    used = 0
+    for message in reversed(messages):
+        cost = estimate_tokens(message)
+        if kept and used + cost > token_budget:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    while kept and kept[0].type != "human":
+        kept.pop(0)
+    return kept
+
+def _latest_query(session_id: str, limit: int):
+    return select(table.c.message)\
+        .where(table.c.session_id == session_id)\
+        .order_by(table.c.id.desc())\
+        .limit(limit)
+
+def _rows_to_messages(rows):
+    return messages_from_dict([json.loads(row) for row in reversed(rows)])
+
+def _insert_rows(session_id: str, messages: Sequence[BaseMessage]):
+    now = datetime.utcnow()
+    return [{"session_id": session_id, "message": json.dumps(message_to_dict(m)), "created_at": now} for m in messages]
+
+def _trim_session(session_id: str):
+    # Drop everything older than the newest HISTORY_MAX_MESSAGES rows of this session
+    boundary = select(table.c.id)\
+        .where(table.c.session_id == session_id)\
+        .order_by(table.c.id.desc())\
+        .offset(HISTORY_MAX_MESSAGES - 1)\
+        .limit(1)\
+        .scalar_subquery()
+    return delete(table).where(table.c.session_id == session_id, table.c.id < boundary)
+
+class WindowedChatMessageHistory(BaseChatMessageHistory):
+    """
+    Chat history on the app's own engines that only loads the recent window:
+    the last HISTORY_TURNS turns, further cut to HISTORY_TOKEN_BUDGET.
+    Sync methods use the shared engine, async ones the shared async engine.
+    """
+    def __init__(self, session_id: str, turns: int = HISTORY_TURNS, token_budget: int = HISTORY_TOKEN_BUDGET):
+        self.session_id = session_id
+        self.turns = turns
+        self.token_budget = token_budget
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        with engine.connect() as conn:
+            rows = conn.execute(_latest_query(self.session_id, self.turns * 2)).scalars().all()
+        return window_messages(_rows_to_messages(rows), self.token_budget)
+
+    async def aget_messages(self) -> List[BaseMessage]:
+        async with async_engine.connect() as conn:
+            rows = (await conn.execute(_latest_query(self.session_id, self.turns * 2))).scalars().all()
+        return window_messages(_rows_to_messages(rows), self.token_budget)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        if not messages:
+            return
+        with engine.begin() as conn:
+            conn.execute(table.insert(), _insert_rows(self.session_id, messages))
+            conn.execute(_trim_session(self.session_id))
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        if not messages:
+            return
+        async with async_engine.begin() as conn:
+            await conn.execute(table.insert(), _insert_rows(self.session_id, messages))
+            await conn.execute(_trim_session(self.session_id))
+
+    def clear(self) -> None:
+        with engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.session_id == self.session_id))
+
+    async def aclear(self) -> None:
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(table).where(table.c.session_id == self.session_id))
+
+def prune_chat_history(ttl_days: int = HISTORY_TTL_DAYS):
+    """
+    Deletes sessions whose newest message is older than ttl_days.
+    Returns the number of rows removed.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=ttl_days)
+    idle_sessions = select(table.c.session_id)\
+        .group_by(table.c.session_id)\
+        .having(func.max(table.c.created_at) < cutoff)
+    with engine.begin() as conn:
+        return conn.execute(delete(table).where(table.c.session_id.in_(idle_sessions))).rowcount
+
+async def prune_chat_history_periodically():
+    """
+    Background task: prunes expired sessions now and then every HISTORY_PRUNE_INTERVAL_MINUTES,
+    so a long-running server doesn't accumulate idle sessions between restarts.
+    """
+    while True:
+        try:
+            pruned = await run_in_threadpool(prune_chat_history)
+            if pruned:
+                print(f"Pruned {pruned} expired chat messages.")
+        except Exception as e:
+            print(f"Chat history pruning failed: {e}")
+        await asyncio.sleep(HISTORY_PRUNE_INTERVAL_MINUTES * 60)
@@ -1,13 +1,94 @@
 from langchain.tools import tool
 from database import SessionLocal
+from collections import OrderedDict
+import functools
+import threading
+import os
 import crud
+import models
 from datetime import date, timedelta
 
 # Helper to get session
 def get_db_session():
     return SessionLocal()
 
+class ToolResultCache:
+    """
+    Bounded LRU of tool results keyed by (tool, arguments, data version).
+    Any write bumps the data version, so entries computed before it are never
+    served again; they just age out of the LRU.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+tool_cache = ToolResultCache(int(os.getenv("AGENT_TOOL_CACHE_SIZE", "256")))
+
+def cached_tool(func):
+    """
+    Memoizes a tool body against the current data version and today's date
+    (tools like get_recent_sales_stats work relative to today).
+    Goes under @tool; functools.wraps keeps the signature and docstring the LLM sees.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        db = get_db_session()
+        try:
+            version = crud.get_data_version(db)
+        finally:
+            db.close()
+
+        key = (func.__name__, args, tuple(sorted(kwargs.items())), version, date.today())
+        found, result = tool_cache.get(key)
+        if found:
+            return result
+        # Version is read first, so the result is at least as new as the key says
+        result = func(*args, **kwargs)
+        tool_cache.set(key, result)
+        return result
+    return wrapper
+
 @tool
+@cached_tool
 def get_recent_sales_stats(days: int = 30):
     """
     Get the daily revenue, cogs, and net profit for the last N days.
@@ -23,6 +104,7 @@ def get_recent_sales_stats(days: int = 30):
         db.close()
 
 @tool
+@cached_tool
 def get_product_performance():
     """
     Get the total sales volume for top products.
@@ -35,6 +117,7 @@ def get_product_performance():
         db.close()
 
 @tool
+@cached_tool
 def get_owner_balances():
     """
     Get the current balance (money owed/due) for each owner/shareholder.
@@ -46,6 +129,7 @@ def get_owner_balances():
         db.close()
 
 @tool
+@cached_tool
 def get_top_expenses():
     """
     Get a list of who pays the most expenses.
@@ -57,6 +141,7 @@ def get_top_expenses():
         db.close()
 
 @tool
+@cached_tool
 def get_liability_summary():
     """
     Get the summary of expense liabilities (who owes what for expenses).
@@ -68,6 +153,7 @@ def get_liability_summary():
         db.close()
 
 @tool
+@cached_tool
 def get_low_stock_items(threshold: int = 10):
     """
     Get a list of products that have stock below a certain threshold.
@@ -75,46 +161,32 @@ def get_low_stock_items(threshold: int = 10):
     """
     db = get_db_session()
     try:
-        # We fetch all products and filter in python for now as get_products is paginated but we want to check potentially all
-        # For efficiency in a real app we'd add a DB filter. Here we just check the first 100 which is likely all for this MVP.
-        products = crud.get_products(db, limit=100) 
-        low_stock = []
-        for p in products:
-            if p.current_stock < threshold:
-                low_stock.append({
-                    "name": p.name,
-                    "sku": p.sku,
-                    "current_stock": p.current_stock,
-                    "threshold": threshold
-                })
-        return low_stock
+        products = crud.get_low_stock_products(db, threshold=threshold)
+        return [
+            {"name": p.name, "sku": p.sku, "current_stock": p.current_stock, "threshold": threshold}
+            for p in products
+        ]
     finally:
         db.close()
 
 @tool
+@cached_tool
 def search_product_inventory(query: str):
     """
     Search for a specific product by name or SKU to check its inventory status.
     """
     db = get_db_session()
     try:
-        # Re-using get_products and filtering. 
-        # Ideally we'd have a search crud, but this works for MVP.
-        products = crud.get_products(db, limit=100)
-        matches = []
-        for p in products:
-            if query.lower() in p.name.lower() or query.lower() in (p.sku or "").lower():
-                matches.append({
-                    "name": p.name,
-                    "sku": p.sku,
-                    "current_stock": p.current_stock,
-                    "price": p.price
-                })
-        return matches
+        products = crud.search_products(db, query)
+        return [
+            {"name": p.name, "sku": p.sku, "current_stock": p.current_stock, "price": p.price}
+            for p in products
+        ]
     finally:
         db.close()
 
 @tool
+@cached_tool
 def get_daily_report_details(target_date: str):
     """
     Get detailed financial breakdown for a specific date (YYYY-MM-DD).
@@ -171,6 +243,7 @@ def get_daily_report_details(target_date: str):
         db.close()
 
 @tool
+@cached_tool
 def search_expenses(query: str):
     """
     Search for expenses by description or category. 
@@ -178,13 +251,8 @@ def search_expenses(query: str):
     """
     db = get_db_session()
     try:
-        # Simple SQL like
-        # We need to import models inside tools if not available globally safely or use crud
-        expenses = db.query(models.Expense).filter(
-            (models.Expense.description.ilike(f"%{query}%")) | 
-            (models.Expense.category.ilike(f"%{query}%"))
-        ).limit(20).all()
-        
+        expenses, _ = crud.search_expenses(db, query, limit=20)
+
         return [
             {"date": str(e.date), "amount": e.amount, "category": e.category, "description": e.description}
             for e in expenses
@@ -1,8 +1,13 @@
-from .user import verify_password, get_password_hash, get_user_by_email, create_user, update_user_password
-from .product import get_product, get_product_by_sku, create_product, get_products
+from .user import verify_password, get_password_hash, verify_password_async, get_password_hash_async, get_user_by_email, create_user, update_user_password, set_user_password_hash
+from .product import get_product, get_product_by_sku, create_product, get_products, get_products_page, get_product_batches_page, search_products, get_low_stock_products, backfill_product_sales_counters
 from .inventory import create_inventory_batch, add_inventory_batch
-from .sale import process_sale_fifo
-from .daily_report import create_daily_report, get_daily_report, update_daily_report
-from .expense import create_expense, get_expenses, get_top_expense_payers, backfill_expense_owners, get_expense_liability_summary
-from .owner import create_owner, set_product_equity, distribute_daily_profit, withdraw_equity, get_owner_balance, create_owner_payment, get_owner_payments, get_owner_profit_breakdown
-from .stats import get_sales_history, get_product_sales_stats
+from .sale import process_sale_fifo, process_sales_bulk
+from .daily_report import create_daily_report, get_daily_report, get_daily_reports, get_daily_reports_page, update_daily_report
+from .expense import create_expense, get_expenses, get_expenses_page, search_expenses, get_top_expense_payers, backfill_expense_owners, get_expense_liability_summary
+from .owner import create_owner, set_product_equity, distribute_daily_profit, distribute_profit_range, get_profit_distribution_cutover, withdraw_equity, create_owner_payment, get_owner_payments, get_owner_payments_page, get_owner_payouts_between, get_owner_profit_breakdown
+from .owner_balance import record_ledger_entry, record_ledger_entries, get_owner_balance, get_owner_balances, get_owner_payout_totals, backfill_owner_balances
+from .daily_financials import get_daily_financials, iter_report_financials, apply_daily_financials_delta, rebuild_daily_financials, backfill_daily_financials
+from .data_version import bump_data_version, get_data_version
+from .analytics import get_pnl_buckets, get_pnl_buckets_async
+from .stats import get_sales_history, get_sales_history_async, get_dashboard_stats_async, get_product_sales_stats
+from .pagination import MAX_PAGE_LIMIT
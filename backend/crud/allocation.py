@@ -0,0 +1,137 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+import numpy as np
+import threading
+import os
+import models
+from .data_version import get_data_version
+
+# Upper bound on days * owners * products cells held at once when allocating a days x products matrix
+ALLOCATION_BLOCK_CELLS = int(os.getenv("ALLOCATION_BLOCK_CELLS", "4000000"))
+
+def round_cents(values):
+    """
+    Element-wise round(x, 2) with Python's semantics. np.round scales by 100 first, so on values
+    like 0.015 or 0.025 (not exact in binary) it can land on the other side of the half cent.
+    Values that close to a half cent are rounded by round() itself.
+    """
+    values = np.asarray(values, dtype=float)
+    scaled = values * 100.0
+    out = np.rint(scaled) / 100.0
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_half.any():
+        out = np.array(out, copy=True)
+        out[near_half] = [round(v, 2) for v in values[near_half].tolist()]
+    return out
+
+class EquityMatrix:
+    """
+    Owners x products equity shares: a product's own equity map where it has one,
+    global owner equity otherwise.
+
+    shares[o, p] is owner o's fraction of product p; members[o, p] says whether owner o
+    takes part in product p's split at all (and so gets a breakdown line for it).
+    Rows follow owner_ids, columns follow product_ids.
+    """
+    def __init__(self, owners, product_ids, equities):
+        self.owner_ids = [owner_id for owner_id, _ in owners]
+        self.product_ids = list(product_ids)
+        self.owner_index = {owner_id: i for i, owner_id in enumerate(self.owner_ids)}
+        self.product_index = {pid: j for j, pid in enumerate(self.product_ids)}
+        self.global_shares = np.array([(pct or 0.0) / 100.0 for _, pct in owners], dtype=float)
+
+        self.shares = np.repeat(self.global_shares[:, None], len(self.product_ids), axis=1)
+        self.members = np.ones(self.shares.shape, dtype=bool)
+
+        mapped = {} # {column: [(row or None, pct)]}
+        for pid, owner_id, pct in equities:
+            j = self.product_index.get(pid)
+            if j is not None:
+                mapped.setdefault(j, []).append((self.owner_index.get(owner_id), pct))
+        for j, split in mapped.items():
+            self.shares[:, j] = 0.0
+            self.members[:, j] = False
+            for i, pct in split:
+                # Equity rows for unknown owners still count as a map, they just pay no one
+                if i is not None:
+                    self.shares[i, j] += pct / 100.0
+                    self.members[i, j] = True
+
+    def product_vector(self, amounts):
+        """
+        {product_id: amount} -> (a vector in product_ids order, total of amounts for unknown products).
+        """
+        vector = np.zeros(len(self.product_ids))
+        unknown = 0.0
+        for pid, amount in amounts.items():
+            j = self.product_index.get(pid)
+            if j is None:
+                unknown += amount
+            else:
+                vector[j] += amount
+        return vector, unknown
+
+    def allocate(self, nets, rounded: bool = True):
+        """
+        Owner totals for product nets: (products,) -> (owners,), or (days, products) -> (days, owners).
+        With `rounded`, every owner's share of every product is rounded to cents (as round() does)
+        before summing, which is how payouts have always been booked.
+        """
+        nets = np.asarray(nets, dtype=float)
+        if not rounded:
+            return nets @ self.shares.T
+        if nets.ndim == 1:
+            return self.allocate_detail(nets).sum(axis=1)
+
+        out = np.zeros((nets.shape[0], len(self.owner_ids)))
+        if not self.shares.size:
+            return out
+        step = max(1, ALLOCATION_BLOCK_CELLS // self.shares.size)
+        for start in range(0, nets.shape[0], step):
+            block = nets[start:start + step]
+            out[start:start + step] = round_cents(self.shares[None, :, :] * block[:, None, :]).sum(axis=2)
+        return out
+
+    def allocate_detail(self, nets):
+        """
+        (owners, products) cents-rounded shares of one vector of product nets.
+        """
+        return round_cents(self.shares * np.asarray(nets, dtype=float))
+
+    def allocate_global(self, amounts, rounded: bool = True):
+        """
+        Owner split by global equity of amounts outside any product map (ads, unassigned
+        expenses, unknown products): scalar -> (owners,), (days,) -> (days, owners).
+        """
+        split = np.multiply.outer(np.asarray(amounts, dtype=float), self.global_shares)
+        return round_cents(split) if rounded else split
+
+def build_equity_matrix(db: Session):
+    owners = db.query(models.Owner.id, models.Owner.equity_percentage).order_by(models.Owner.id).all()
+    product_ids = [pid for (pid,) in db.query(models.Product.id).order_by(models.Product.id)]
+    equities = db.query(models.ProductEquity.product_id, models.ProductEquity.owner_id, models.ProductEquity.equity_percentage).all()
+    return EquityMatrix(owners, product_ids, equities)
+
+_matrix_lock = threading.Lock()
+_matrix_cache = {"key": None, "matrix": None}
+
+def get_equity_matrix(db: Session):
+    """
+    The equity matrix for the current owners, products and equity maps.
+    For read-only views: anything that books money builds its own with build_equity_matrix,
+    inside its transaction. Cached per process and keyed on the "equity" data version,
+    which only create_owner, set_product_equity and create_product with equities bump,
+    so sales and stock writes never rebuild it. The catalogue size is part of the key too:
+    a product created without equities still needs its (global equity) column.
+    """
+    catalogue = tuple(db.query(func.count(models.Product.id), func.max(models.Product.id)).one())
+    key = (db.get_bind(), get_data_version(db, "equity"), catalogue)
+    with _matrix_lock:
+        if _matrix_cache["key"] == key:
+            return _matrix_cache["matrix"]
+
+    matrix = build_equity_matrix(db)
+    with _matrix_lock:
+        _matrix_cache["key"] = key
+        _matrix_cache["matrix"] = matrix
+    return matrix
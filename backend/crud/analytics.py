@@ -0,0 +1,117 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, union_all, literal_column, cast, type_coerce, Date, Integer
+from fastapi import HTTPException
+import models
+
+BUCKETS = ("day", "week", "month", "quarter")
+
+def _bucket_expr(dialect_name: str, column, bucket: str):
+    """
+    Truncates a date column to the start of its bucket (weeks start on Monday).
+    """
+    if bucket == "day":
+        return column
+
+    if dialect_name == "postgresql":
+        # bucket is whitelisted, inlined so SELECT and GROUP BY render identical expressions
+        return cast(func.date_trunc(literal_column(f"'{bucket}'"), column), Date)
+
+    # SQLite (tests / local dev)
+    if bucket == "week":
+        expr = func.date(column, "-6 days", "weekday 1")
+    elif bucket == "month":
+        expr = func.strftime("%Y-%m-01", column)
+    else:
+        quarter_month = ((cast(func.strftime("%m", column), Integer) - 1) / 3) * 3 + 1
+        expr = func.printf("%s-%02d-01", func.strftime("%Y", column), quarter_month)
+    return type_coerce(expr, Date)
+
+def _rolling_average(values, window: int):
+    averages = []
+    running = 0.0
+    for i, value in enumerate(values):
+        running += value
+        if i >= window:
+            running -= values[i - window]
+        averages.append(round(running / min(i + 1, window), 2))
+    return averages
+
+def _validate(bucket: str, rolling: int = None):
+    if bucket not in BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(BUCKETS)}")
+    if rolling is not None and rolling < 1:
+        raise HTTPException(status_code=400, detail="rolling must be at least 1")
+
+def pnl_bucket_query(dialect_name: str, start_date, end_date, bucket: str = "day"):
+    """
+    Folds sales, report ad spend and expenses into one UNION ALL and
+    aggregates it per bucket with a single GROUP BY.
+    Rows: (period_start, revenue, cogs, ad_spend, expenses).
+    """
+    zero = literal_column("0.0")
+
+    sales = select(
+        models.DailyReport.date.label("date"),
+        (models.Sale.selling_price * models.Sale.quantity).label("revenue"),
+        models.Sale.calculated_cogs.label("cogs"),
+        zero.label("ad_spend"),
+        zero.label("expenses")
+    ).join(models.Sale, models.Sale.report_id == models.DailyReport.id)\
+     .where(models.DailyReport.date >= start_date, models.DailyReport.date <= end_date)
+
+    ads = select(
+        models.DailyReport.date, zero, zero, models.DailyReport.total_ad_spend, zero
+    ).where(models.DailyReport.date >= start_date, models.DailyReport.date <= end_date)
+
+    expenses = select(
+        models.Expense.date, zero, zero, zero, models.Expense.amount
+    ).where(models.Expense.date >= start_date, models.Expense.date <= end_date)
+
+    ledger = union_all(sales, ads, expenses).subquery()
+    period = _bucket_expr(dialect_name, ledger.c.date, bucket)
+
+    return select(
+        period.label("period"),
+        func.coalesce(func.sum(ledger.c.revenue), 0.0),
+        func.coalesce(func.sum(ledger.c.cogs), 0.0),
+        func.coalesce(func.sum(ledger.c.ad_spend), 0.0),
+        func.coalesce(func.sum(ledger.c.expenses), 0.0)
+    ).group_by(period).order_by(period)
+
+def shape_pnl_rows(rows, rolling: int = None):
+    results = []
+    for period_start, revenue, cogs, ad_spend, expenses_total in rows:
+        results.append({
+            "date": period_start,
+            "revenue": revenue,
+            "cogs": cogs,
+            "ad_spend": ad_spend,
+            "expenses": expenses_total,
+            "net_profit": revenue - cogs - ad_spend - expenses_total
+        })
+
+    if rolling:
+        revenue_avg = _rolling_average([r["revenue"] for r in results], rolling)
+        profit_avg = _rolling_average([r["net_profit"] for r in results], rolling)
+        for row, rev, prof in zip(results, revenue_avg, profit_avg):
+            row["revenue_avg"] = rev
+            row["net_profit_avg"] = prof
+
+    return results
+
+def get_pnl_buckets(db: Session, start_date, end_date, bucket: str = "day", rolling: int = None):
+    """
+    Revenue, COGS, ad spend, expenses and net profit per bucket for a date range.
+    `rolling` adds trailing averages over that many buckets.
+    """
+    _validate(bucket, rolling)
+    query = pnl_bucket_query(db.bind.dialect.name, start_date, end_date, bucket)
+    return shape_pnl_rows(db.execute(query), rolling)
+
+async def get_pnl_buckets_async(db, start_date, end_date, bucket: str = "day", rolling: int = None):
+    """
+    AsyncSession version of get_pnl_buckets.
+    """
+    _validate(bucket, rolling)
+    query = pnl_bucket_query(db.bind.dialect.name, start_date, end_date, bucket)
+    return shape_pnl_rows((await db.execute(query)).all(), rolling)
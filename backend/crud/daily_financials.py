@@ -0,0 +1,166 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+import models
+from models.daily_financials import DAY_LEVEL_PRODUCT_ID
+
+def _day_totals(db: Session):
+    F = models.DailyFinancials
+    return db.query(
+        F.date.label("date"),
+        func.sum(F.revenue).label("revenue"),
+        func.sum(F.cogs).label("cogs"),
+        func.sum(F.ad_spend).label("ad_spend"),
+        func.sum(F.expenses).label("expenses"),
+        func.sum(F.net_profit).label("net_profit")
+    ).group_by(F.date)
+
+def get_daily_financials(db: Session, date):
+    """
+    A date's rollup (date, revenue, cogs, ad_spend, expenses, net_profit) summed over its
+    per-product rows, or None if nothing was recorded for it.
+    """
+    return _day_totals(db).filter(models.DailyFinancials.date == date).first()
+
+def iter_report_financials(db: Session, start_date, end_date, chunk_size: int = 500):
+    """
+    Yields rollup totals for report dates in range, newest first.
+    Rows are fetched `chunk_size` at a time through a server-side cursor.
+    """
+    F = models.DailyFinancials
+    query = _day_totals(db)\
+              .join(models.DailyReport, models.DailyReport.date == F.date)\
+              .filter(F.date >= start_date, F.date <= end_date)\
+              .order_by(F.date.desc())\
+              .yield_per(chunk_size)
+
+    for row in query:
+        yield {
+            "date": row.date,
+            "revenue": row.revenue,
+            "cogs": row.cogs,
+            "ad_spend": row.ad_spend,
+            "expenses": row.expenses,
+            "net_profit": row.net_profit
+        }
+
+def _get_or_create_daily_financials(db: Session, date, product_id: int):
+    F = models.DailyFinancials
+    query = db.query(F).filter(F.date == date, F.product_id == product_id)
+    row = query.first()
+    if row:
+        return row
+
+    row = F(date=date, product_id=product_id, revenue=0.0, cogs=0.0, ad_spend=0.0, expenses=0.0, net_profit=0.0)
+    try:
+        # Savepoint so a concurrent insert for the same row doesn't kill the caller's transaction
+        with db.begin_nested():
+            db.add(row)
+    except IntegrityError:
+        row = query.first()
+    return row
+
+def apply_daily_financials_delta(db: Session, date, product_id: int = DAY_LEVEL_PRODUCT_ID, revenue: float = 0.0, cogs: float = 0.0, ad_spend: float = 0.0, expenses: float = 0.0):
+    """
+    Adds the given amounts to the rollup row for a date and product; sales pass their product,
+    ad spend and expenses leave it at DAY_LEVEL_PRODUCT_ID.
+    Uses column expressions (col = col + x) so concurrent writers don't overwrite each other.
+    Does not commit; the caller's transaction owns the change.
+    """
+    row = _get_or_create_daily_financials(db, date, product_id)
+    F = models.DailyFinancials
+    row.revenue = F.revenue + revenue
+    row.cogs = F.cogs + cogs
+    row.ad_spend = F.ad_spend + ad_spend
+    row.expenses = F.expenses + expenses
+    row.net_profit = F.net_profit + (revenue - cogs - ad_spend - expenses)
+    return row
+
+def rebuild_daily_financials(db: Session, date):
+    """
+    Recomputes the rollup rows for a single date from sales, reports and expenses.
+    Used when a change is too involved to express as a delta (e.g. report edits).
+    Rows are overwritten in place; products no longer sold that day drop to zero.
+    """
+    db.flush()
+    F = models.DailyFinancials
+
+    per_product = db.query(
+        models.Sale.product_id,
+        func.coalesce(func.sum(models.Sale.selling_price * models.Sale.quantity), 0.0),
+        func.coalesce(func.sum(models.Sale.calculated_cogs), 0.0)
+    ).join(models.DailyReport, models.Sale.report_id == models.DailyReport.id)\
+     .filter(models.DailyReport.date == date)\
+     .group_by(models.Sale.product_id).all()
+
+    ad_spend = db.query(func.coalesce(func.sum(models.DailyReport.total_ad_spend), 0.0))\
+                 .filter(models.DailyReport.date == date).scalar()
+    expenses = db.query(func.coalesce(func.sum(models.Expense.amount), 0.0))\
+                 .filter(models.Expense.date == date).scalar()
+
+    figures = {DAY_LEVEL_PRODUCT_ID: (0.0, 0.0, ad_spend, expenses)}
+    for product_id, revenue, cogs in per_product:
+        figures[product_id] = (revenue, cogs, 0.0, 0.0)
+
+    # Plain UPDATEs with the absolute values: the ORM would skip rows whose loaded values look unchanged
+    db.query(F).filter(F.date == date, F.product_id.notin_(list(figures))).update(
+        {F.revenue: 0.0, F.cogs: 0.0, F.ad_spend: 0.0, F.expenses: 0.0, F.net_profit: 0.0},
+        synchronize_session=False
+    )
+    for product_id in sorted(figures):
+        revenue, cogs, ad, exp = figures[product_id]
+        _get_or_create_daily_financials(db, date, product_id)
+        db.query(F).filter(F.date == date, F.product_id == product_id).update({
+            F.revenue: revenue, F.cogs: cogs, F.ad_spend: ad, F.expenses: exp,
+            F.net_profit: revenue - cogs - ad - exp
+        }, synchronize_session=False)
+
+def backfill_daily_financials(db: Session):
+    """
+    One-time population of the rollup for dates recorded before it existed.
+    Only dates without a rollup row are written.
+    """
+    existing = {d for (d,) in db.query(models.DailyFinancials.date).distinct().all()}
+
+    totals = {}
+    def bucket(d, product_id=DAY_LEVEL_PRODUCT_ID):
+        key = (d, product_id)
+        if key not in totals:
+            totals[key] = {'revenue': 0.0, 'cogs': 0.0, 'ad_spend': 0.0, 'expenses': 0.0}
+        return totals[key]
+
+    sales = db.query(
+        models.DailyReport.date,
+        models.Sale.product_id,
+        func.sum(models.Sale.selling_price * models.Sale.quantity),
+        func.sum(models.Sale.calculated_cogs)
+    ).join(models.Sale, models.Sale.report_id == models.DailyReport.id)\
+     .group_by(models.DailyReport.date, models.Sale.product_id).all()
+    for d, product_id, revenue, cogs in sales:
+        bucket(d, product_id)['revenue'] += revenue or 0.0
+        bucket(d, product_id)['cogs'] += cogs or 0.0
+
+    for d, ad_spend in db.query(models.DailyReport.date, models.DailyReport.total_ad_spend).all():
+        bucket(d)['ad_spend'] += ad_spend or 0.0
+
+    expenses = db.query(models.Expense.date, func.sum(models.Expense.amount))\
+                 .group_by(models.Expense.date).all()
+    for d, amount in expenses:
+        if d is not None:
+            bucket(d)['expenses'] += amount or 0.0
+
+    rows = []
+    for (d, product_id), t in totals.items():
+        if d in existing:
+            continue
+        rows.append(models.DailyFinancials(
+            date=d,
+            product_id=product_id,
+            net_profit=t['revenue'] - t['cogs'] - t['ad_spend'] - t['expenses'],
+            **t
+        ))
+
+    if rows:
+        db.add_all(rows)
+        db.commit()
+        print(f"Backfilled {len(rows)} daily financial rollups.")
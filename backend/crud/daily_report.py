@@ -1,10 +1,13 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import asc
+from sqlalchemy.orm import Session, selectinload
 from fastapi import HTTPException
 import models
 import schemas
-from .product import get_product
+from .product import lock_products, refresh_product_sales_counters
+from .inventory import get_live_batches_for_update
 from .sale import process_sale_fifo
+from .daily_financials import apply_daily_financials_delta, rebuild_daily_financials
+from .pagination import paginate_keyset
+from .data_version import bump_data_version
 
 def create_daily_report(db: Session, report: schemas.DailyReportCreate):
     # Check if exists first to avoid IntegrityError (Race condition possible but less likely single user)
@@ -15,6 +18,8 @@ def create_daily_report(db: Session, report: schemas.DailyReportCreate):
     try:
         db_report = models.DailyReport(**report.dict())
         db.add(db_report)
+        apply_daily_financials_delta(db, report.date, ad_spend=report.total_ad_spend)
+        bump_data_version(db, "reports")
         db.commit()
         db.refresh(db_report)
         return db_report
@@ -29,6 +34,16 @@ def create_daily_report(db: Session, report: schemas.DailyReportCreate):
 def get_daily_report(db: Session, date):
     return db.query(models.DailyReport).filter(models.DailyReport.date == date).first()
 
+def get_daily_reports(db: Session, skip: int = 0, limit: int = 100):
+    return db.query(models.DailyReport)\
+             .options(selectinload(models.DailyReport.sales))\
+             .order_by(models.DailyReport.date.desc(), models.DailyReport.id.desc())\
+             .offset(skip).limit(limit).all()
+
+def get_daily_reports_page(db: Session, cursor: str = None, limit: int = 100):
+    query = db.query(models.DailyReport).options(selectinload(models.DailyReport.sales))
+    return paginate_keyset(query, [models.DailyReport.date, models.DailyReport.id], cursor, limit)
+
 def update_daily_report(db: Session, report_id: int, report_update: schemas.DailyReportUpdate):
     report = db.query(models.DailyReport).filter(models.DailyReport.id == report_id).first()
     if not report:
@@ -41,12 +56,19 @@ def update_daily_report(db: Session, report_id: int, report_update: schemas.Dail
     # Create maps for easy access
     existing_sales = {s.id: s for s in report.sales}
     incoming_sales_ids = {s.id for s in report_update.sales if s.id is not None}
+
+    # Lock every product this edit touches up front (in id order) so stock
+    # changes can't interleave with concurrent sales of the same SKU.
+    # The whole edit is one transaction; nested sales don't commit.
+    products = lock_products(
+        db, [s.product_id for s in existing_sales.values()] + [s.product_id for s in report_update.sales]
+    )
     
     # A. Delete missing sales
     for sale_id, sale in existing_sales.items():
         if sale_id not in incoming_sales_ids:
             # Revert stock
-            product = get_product(db, sale.product_id)
+            product = products.get(sale.product_id)
             if product:
                 product.current_stock += sale.quantity
             db.delete(sale)
@@ -60,7 +82,7 @@ def update_daily_report(db: Session, report_id: int, report_update: schemas.Dail
             # Check if product changed (treat as delete + create)
             if existing_sale.product_id != sale_data.product_id:
                 # Revert old
-                old_prod = get_product(db, existing_sale.product_id)
+                old_prod = products.get(existing_sale.product_id)
                 if old_prod:
                     old_prod.current_stock += existing_sale.quantity
                 
@@ -78,12 +100,12 @@ def update_daily_report(db: Session, report_id: int, report_update: schemas.Dail
                     quantity=sale_data.quantity, 
                     selling_price=sale_data.selling_price
                 )
-                process_sale_fifo(db, new_sale_create)
+                process_sale_fifo(db, new_sale_create, commit=False)
                 
             else:
                 # Same Product, check Quantity
                 qty_diff = sale_data.quantity - existing_sale.quantity
-                product = get_product(db, sale_data.product_id)
+                product = products.get(sale_data.product_id)
                 if not product: continue # Should handle error
 
                 if qty_diff > 0:
@@ -96,10 +118,7 @@ def update_daily_report(db: Session, report_id: int, report_update: schemas.Dail
                         raise HTTPException(status_code=400, detail=f"Insufficient stock for product {product.name}")
                     
                     # Calculate cost for the extra items
-                    batches = db.query(models.InventoryBatch).filter(
-                        models.InventoryBatch.product_id == sale_data.product_id,
-                        models.InventoryBatch.remaining_quantity > 0
-                    ).order_by(asc(models.InventoryBatch.date_added)).all()
+                    batches = get_live_batches_for_update(db, [sale_data.product_id])
                     
                     to_fulfill = qty_diff
                     added_cost = 0.0
@@ -141,8 +160,14 @@ def update_daily_report(db: Session, report_id: int, report_update: schemas.Dail
                 quantity=sale_data.quantity, 
                 selling_price=sale_data.selling_price
             )
-            process_sale_fifo(db, new_sale_create)
+            process_sale_fifo(db, new_sale_create, commit=False)
+
+    # Edits can delete/reprice sales and change ad spend, so recompute the day outright
+    rebuild_daily_financials(db, report.date)
+    # ...and the sales counters of every product the edit touched
+    refresh_product_sales_counters(db, products.keys())
 
+    bump_data_version(db, "reports", "sales", "inventory", "products")
     db.commit()
     db.refresh(report)
     return report
@@ -0,0 +1,43 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+import os
+import random
+import models
+
+DOMAINS = ("products", "inventory", "sales", "reports", "expenses", "owners", "ledger", "equity", "users")
+
+# Counter rows per domain; two writers only wait on each other if they pick the same one
+DATA_VERSION_SLOTS = int(os.getenv("DATA_VERSION_SLOTS", "16"))
+
+def bump_data_version(db: Session, *domains: str):
+    """
+    Marks domains as changed by incrementing one counter slot per domain.
+    Call it right before the writer commits: it is part of the writer's transaction (a rollback
+    leaves versions alone, a failed bump fails the write) and the slot row stays locked only
+    until that commit.
+    """
+    slot = random.randrange(DATA_VERSION_SLOTS)
+    V = models.DataVersion
+    # Fixed order so two writers bumping overlapping domains can't deadlock
+    for domain in sorted(set(domains)):
+        match = (V.domain == domain, V.slot == slot)
+        updated = db.query(V).filter(*match).update({V.version: V.version + 1}, synchronize_session=False)
+        if updated:
+            continue
+        try:
+            # Savepoint so a concurrent first bump of the same slot doesn't kill the caller's transaction
+            with db.begin_nested():
+                db.add(V(domain=domain, slot=slot, version=1))
+        except IntegrityError:
+            db.query(V).filter(*match).update({V.version: V.version + 1}, synchronize_session=False)
+
+def get_data_version(db: Session, *domains: str):
+    """
+    Current version of the given domains (all of them if none are given).
+    The sum only grows, so it changes whenever any of the domains is written.
+    """
+    query = db.query(func.coalesce(func.sum(models.DataVersion.version), 0))
+    if domains:
+        query = query.filter(models.DataVersion.domain.in_(domains))
+    return query.scalar()
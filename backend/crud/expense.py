@@ -1,19 +1,69 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, func
+from sqlalchemy.orm import Session
+from sqlalchemy import desc, func, case, cast, or_, literal_column, Float, Numeric
 import models
 import schemas
+from .daily_financials import apply_daily_financials_delta
+from .pagination import paginate_keyset
+from .data_version import bump_data_version
+from .allocation import get_equity_matrix
 
 def create_expense(db: Session, expense: schemas.ExpenseCreate):
     db_expense = models.Expense(**expense.dict())
     db.add(db_expense)
+    apply_daily_financials_delta(db, expense.date, expenses=expense.amount)
+    bump_data_version(db, "expenses")
     db.commit()
     db.refresh(db_expense)
-    db.refresh(db_expense)
     return db_expense
 
 def get_expenses(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Expense).order_by(desc(models.Expense.date), desc(models.Expense.id)).offset(skip).limit(limit).all()
 
+def get_expenses_page(db: Session, cursor: str = None, limit: int = 100):
+    return paginate_keyset(db.query(models.Expense), [models.Expense.date, models.Expense.id], cursor, limit)
+
+def _search_match_and_rank(dialect_name: str, query: str):
+    """
+    (filter, rank) for a free-text expense search.
+    Postgres: full-text match on the indexed search_vector column, ranked by ts_rank
+    (rounded so the rank survives a round trip through a page cursor).
+    Elsewhere: substring match, category hits above description hits.
+    """
+    if dialect_name == "postgresql":
+        vector = literal_column("expenses.search_vector")
+        tsquery = func.websearch_to_tsquery(literal_column("'english'"), query)
+        rank = cast(func.round(cast(func.ts_rank(vector, tsquery), Numeric), 6), Float)
+        return vector.op("@@")(tsquery), rank
+
+    pattern = f"%{query}%"
+    match = or_(models.Expense.description.ilike(pattern), models.Expense.category.ilike(pattern))
+    rank = cast(case((func.lower(models.Expense.category) == query.lower(), 1.0), else_=0.5), Float)
+    return match, rank
+
+def search_expenses(db: Session, query: str, start_date=None, end_date=None, category: str = None,
+                    paid_by_id: int = None, cursor: str = None, limit: int = 20):
+    """
+    Ranked expense search with optional date range / category / payer filters.
+    Keyset-paginated on (rank, date, id), best matches first.
+    Returns (items, next_cursor).
+    """
+    match, rank = _search_match_and_rank(db.bind.dialect.name, query)
+    q = db.query(models.Expense, rank.label("rank")).filter(match)
+    if start_date:
+        q = q.filter(models.Expense.date >= start_date)
+    if end_date:
+        q = q.filter(models.Expense.date <= end_date)
+    if category:
+        q = q.filter(models.Expense.category == category)
+    if paid_by_id:
+        q = q.filter(models.Expense.paid_by_id == paid_by_id)
+
+    rows, next_cursor = paginate_keyset(
+        q, [rank, models.Expense.date, models.Expense.id], cursor, limit,
+        key=lambda row: [row.rank, row[0].date, row[0].id]
+    )
+    return [expense for expense, _ in rows], next_cursor
+
 def get_top_expense_payers(db: Session, limit: int = 5):
     # Aggregating expenses by paid_by_id
     # We join with Owner to get names
@@ -51,54 +101,37 @@ def backfill_expense_owners(db: Session):
                 pass
     
     if updated_count > 0:
+        bump_data_version(db, "expenses")
         db.commit()
         print(f"Backfilled {updated_count} expenses with owner IDs.")
 
-def get_expense_liability_summary(db: Session):
+def get_expense_liability_summary(db: Session, start_date=None, end_date=None, category: str = None):
     """
-    Calculates estimated expense liability for each user.
+    Calculates estimated expense liability for each owner, optionally for a date range / category.
+    Expenses are totalled per product in the database and split with the equity matrix;
+    unassigned expenses follow global owner equity.
     """
-    expenses = db.query(models.Expense).all()
-    owners = db.query(models.Owner).all()
-    
-    # Initialize liability map
-    liability = {owner.id: 0.0 for owner in owners}
-    owner_names = {owner.id: owner.name for owner in owners}
-    global_equity = {owner.id: (owner.equity_percentage or 0.0) / 100.0 for owner in owners}
-    
-    # Helper to get product equity
-    # We'll cache product equities to avoid N+1
-    products = db.query(models.Product).options(joinedload(models.Product.equities)).all()
-    product_equity_map = {}
-    for p in products:
-        if p.equities:
-            product_equity_map[p.id] = {pe.owner_id: pe.equity_percentage / 100.0 for pe in p.equities}
-        else:
-            product_equity_map[p.id] = None # Fallback to global
-            
-    for expense in expenses:
-        amount = expense.amount
-        
-        if expense.product_id and expense.product_id in product_equity_map:
-            # Product specific expense
-            p_equity = product_equity_map[expense.product_id]
-            if p_equity:
-                # Distribute based on product equity
-                for owner_id, share in p_equity.items():
-                    liability[owner_id] += amount * share
-                continue
-        
-        # Fallback: General expense or Product with no specific equity -> Global Equity
-        for owner_id, share in global_equity.items():
-            liability[owner_id] += amount * share
+    E = models.Expense
+    filters = []
+    if start_date:
+        filters.append(E.date >= start_date)
+    if end_date:
+        filters.append(E.date <= end_date)
+    if category:
+        filters.append(E.category == category)
+
+    totals = dict(db.query(E.product_id, func.sum(E.amount)).filter(*filters).group_by(E.product_id).all())
+    unassigned = totals.pop(None, 0.0) or 0.0
+
+    matrix = get_equity_matrix(db)
+    by_product, unknown = matrix.product_vector(totals)
+    liability = matrix.allocate(by_product, rounded=False) + matrix.allocate_global(unassigned + unknown, rounded=False)
 
-    # Format result
-    result = []
-    for owner_id, amount in liability.items():
-        result.append({
-            "name": owner_names.get(owner_id, "Unknown"),
-            "amount": round(amount, 2)
-        })
+    names = dict(db.query(models.Owner.id, models.Owner.name).all())
+    result = [
+        {"name": names.get(owner_id) or "Unknown", "amount": round(float(amount), 2)}
+        for owner_id, amount in zip(matrix.owner_ids, liability)
+    ]
     
     # Sort by amount desc
     result.sort(key=lambda x: x["amount"], reverse=True)
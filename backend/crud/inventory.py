@@ -1,7 +1,21 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import asc
 import models
 import schemas
-from .product import get_product
+from .product import get_product_for_update
+from .data_version import bump_data_version
+
+def get_live_batches_for_update(db: Session, product_ids):
+    """
+    Batches with stock left for the given products, oldest first, row-locked
+    for the rest of the transaction.
+    """
+    db.flush()
+    return db.query(models.InventoryBatch).filter(
+        models.InventoryBatch.product_id.in_(product_ids),
+        models.InventoryBatch.remaining_quantity > 0
+    ).order_by(models.InventoryBatch.product_id, asc(models.InventoryBatch.date_added))\
+     .with_for_update().populate_existing().all()
 
 def create_inventory_batch(db: Session, batch: schemas.InventoryBatchCreate):
     # Explicitly initialize remaining_quantity
@@ -11,7 +25,7 @@ def create_inventory_batch(db: Session, batch: schemas.InventoryBatchCreate):
     db.add(db_batch)
     
     # Update Product Stack
-    product = get_product(db, batch.product_id)
+    product = get_product_for_update(db, batch.product_id)
     if product:
         # Calculate Weighted Average Cost (AVCO)
         current_total_value = product.current_stock * product.cost_price
@@ -25,6 +39,7 @@ def create_inventory_batch(db: Session, batch: schemas.InventoryBatchCreate):
             
         product.current_stock = new_total_stock
         
+    bump_data_version(db, "inventory", "products")
     db.commit()
     db.refresh(db_batch)
     return db_batch
@@ -40,10 +55,11 @@ def add_inventory_batch(db: Session, batch: schemas.InventoryBatchCreate):
     db.add(db_batch)
     
     # 2. Update Product Stock
-    product = get_product(db, batch.product_id)
+    product = get_product_for_update(db, batch.product_id)
     if product:
         product.current_stock += batch.quantity
     
+    bump_data_version(db, "inventory", "products")
     db.commit()
     db.refresh(db_batch)
     return db_batch
@@ -1,13 +1,26 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, insert
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
-from datetime import datetime
+from datetime import datetime, date, timedelta
+import numpy as np
+import os
 import models
 import schemas
+from .pagination import paginate_keyset
+from .data_version import bump_data_version
+from .allocation import get_equity_matrix, build_equity_matrix, round_cents, ALLOCATION_BLOCK_CELLS
+from .owner_balance import record_ledger_entry, record_ledger_entries, get_owner_payout_totals
+
+# Reports dated on or before this (ISO date) may have been paid through the per-report endpoint
+# before payouts were recorded in profit_distributions. Unset: taken from the ledger, see
+# get_profit_distribution_cutover
+PROFIT_DISTRIBUTION_CUTOVER = os.getenv("PROFIT_DISTRIBUTION_CUTOVER")
 
 def create_owner(db: Session, owner: schemas.OwnerCreate):
     db_owner = models.Owner(**owner.dict())
     db.add(db_owner)
+    bump_data_version(db, "owners", "equity")
     db.commit()
     db.refresh(db_owner)
     return db_owner
@@ -21,6 +34,7 @@ def set_product_equity(db: Session, owner_id: int, equity_data: schemas.ProductE
     
     if existing:
         existing.equity_percentage = equity_data.equity_percentage
+        bump_data_version(db, "owners", "products", "equity")
         db.commit()
         db.refresh(existing)
         return existing
@@ -31,118 +45,189 @@ def set_product_equity(db: Session, owner_id: int, equity_data: schemas.ProductE
             equity_percentage=equity_data.equity_percentage
         )
         db.add(new_equity)
+        bump_data_version(db, "owners", "products", "equity")
         db.commit()
         db.refresh(new_equity)
         return new_equity
 
+def _compute_profit_distributions(db: Session, reports):
+    """
+    {report_id: {owner_id: payout}} for the given reports (rows with id, date, total_ad_spend).
+    The result is booked to the ledger, so the equity matrix is read fresh in the caller's
+    transaction rather than taken from the per-process cache.
+    Each day's product nets form one row of a days x products matrix that the equity matrix
+    splits in one go; ad spend and unassigned expenses follow global equity.
+    Reports are handled in blocks so the matrix stays within ALLOCATION_BLOCK_CELLS.
+    """
+    if not reports:
+        return {}
+    matrix = build_equity_matrix(db)
+    block = max(1, ALLOCATION_BLOCK_CELLS // max(1, len(matrix.product_ids)))
+
+    result = {}
+    for start in range(0, len(reports), block):
+        chunk = reports[start:start + block]
+        row_by_id = {r.id: k for k, r in enumerate(chunk)}
+        row_by_date = {r.date: k for k, r in enumerate(chunk)}
+        nets = np.zeros((len(chunk), len(matrix.product_ids)))
+        unknown = np.zeros(len(chunk)) # Products no longer in the catalogue fall back to global equity
+        global_costs = np.array([r.total_ad_spend or 0.0 for r in chunk])
+
+        def add(k, pid, amount):
+            j = matrix.product_index.get(pid)
+            if j is None:
+                unknown[k] += amount
+            else:
+                nets[k, j] += amount
+
+        sales = db.query(
+            models.Sale.report_id,
+            models.Sale.product_id,
+            func.sum(models.Sale.selling_price * models.Sale.quantity),
+            func.sum(models.Sale.calculated_cogs)
+        ).filter(models.Sale.report_id.in_(list(row_by_id)))\
+         .group_by(models.Sale.report_id, models.Sale.product_id).all()
+        for report_id, pid, revenue, cogs in sales:
+            add(row_by_id[report_id], pid, (revenue or 0.0) - (cogs or 0.0))
+
+        expenses = db.query(models.Expense.date, models.Expense.product_id, func.sum(models.Expense.amount))\
+                     .filter(models.Expense.date >= min(row_by_date), models.Expense.date <= max(row_by_date))\
+                     .group_by(models.Expense.date, models.Expense.product_id).all()
+        for day, pid, amount in expenses:
+            k = row_by_date.get(day)
+            if k is None:
+                continue
+            if pid:
+                add(k, pid, -(amount or 0.0))
+            else:
+                global_costs[k] += amount or 0.0
+
+        payouts = matrix.allocate(nets) + matrix.allocate_global(unknown) - matrix.allocate_global(global_costs)
+        payouts = round_cents(payouts)
+        for r, row in zip(chunk, payouts.tolist()):
+            result[r.id] = dict(zip(matrix.owner_ids, row))
+    return result
+
 def distribute_daily_profit(db: Session, report_id: int):
     """
     Calculates Net Profit distribution considering Product Equity.
+    A report can only be distributed once.
     """
     report = db.query(models.DailyReport).filter(models.DailyReport.id == report_id).first()
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
-        
-    # --- 1. Gather Financials ---
-    
-    # Financials per product
-    product_financials = {} # {product_id: {'revenue': 0, 'cogs': 0, 'expenses': 0}}
-    
-    # A. From Sales
-    for sale in report.sales:
-        pid = sale.product_id
-        if pid not in product_financials: product_financials[pid] = {'revenue': 0, 'cogs': 0, 'expenses': 0}
-        product_financials[pid]['revenue'] += (sale.selling_price * sale.quantity)
-        product_financials[pid]['cogs'] += sale.calculated_cogs
-
-    # B. From Expenses (Product Specific)
-    global_expenses = 0.0
-    day_expenses = db.query(models.Expense).filter(models.Expense.date == report.date).all()
-    for exp in day_expenses:
-        if exp.product_id:
-            pid = exp.product_id
-            if pid not in product_financials: product_financials[pid] = {'revenue': 0, 'cogs': 0, 'expenses': 0}
-            product_financials[pid]['expenses'] += exp.amount
-        else:
-            global_expenses += exp.amount
-            
-    # C. Global Ad Spend (from Report)
-    global_ad_spend = report.total_ad_spend
-    
-    total_global_costs = global_expenses + global_ad_spend
 
-    # --- 2. Calculate Distributions ---
-    
-    owners = db.query(models.Owner).all()
-    owner_payouts = {o.id: 0.0 for o in owners}
-    
-    # A. Distribute Product Profits
-    for pid, fins in product_financials.items():
-        product_net = fins['revenue'] - fins['cogs'] - fins['expenses']
-        
-        # Get Equity Map for this product
-        equities = db.query(models.ProductEquity).filter(models.ProductEquity.product_id == pid).all()
-        
-        if not equities:
-            # Fallback to global equity if no specific map? 
-            # Or treat as unassigned? Let's fallback to global.
-            curr_owners = owners
-            for owner in curr_owners:
-                 share = (owner.equity_percentage / 100.0) * product_net
-                 owner_payouts[owner.id] += round(share, 2)
-        else:
-            # Distributed based on defined equities
-            for eq in equities:
-                share = (eq.equity_percentage / 100.0) * product_net
-                if eq.owner_id in owner_payouts:
-                    owner_payouts[eq.owner_id] += round(share, 2)
-
-    # B. Distribute Global Costs (Negative Payout)
-    for owner in owners:
-        share_cost = (owner.equity_percentage / 100.0) * total_global_costs
-        owner_payouts[owner.id] -= round(share_cost, 2)
-
-    # --- 3. Write to Ledger ---
-    ledger_entries = []
-    
-    for owner_id, amount in owner_payouts.items():
-        if amount != 0:
-            entry = models.OwnerLedger(
-                owner_id=owner_id,
-                amount=amount,
-                transaction_type="PROFIT_SHARE",
-                date=datetime.utcnow() 
-            )
-            db.add(entry)
-            ledger_entries.append(entry)
-            
+    payouts = _compute_profit_distributions(db, [report])[report.id]
+    now = datetime.utcnow()
+
+    distribution = models.ProfitDistribution(report_id=report.id, distributed_at=now)
+    try:
+        # Claims the report; a second run (or a concurrent one) hits the unique report_id
+        with db.begin_nested():
+            db.add(distribution)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Profit already distributed for this report")
+
+    # --- Write to Ledger ---
+    ledger_entries = [
+        record_ledger_entry(db, owner_id, amount, "PROFIT_SHARE", now)
+        for owner_id, amount in payouts.items() if amount != 0
+    ]
+    distribution.amount = round(sum(e.amount for e in ledger_entries), 2)
+    distribution.entry_count = len(ledger_entries)
+
+    bump_data_version(db, "ledger")
     db.commit()
     return ledger_entries
 
+def get_profit_distribution_cutover(db: Session):
+    """
+    Last report date that may have been paid without a profit_distributions record, or None.
+    PROFIT_DISTRIBUTION_CUTOVER if set; otherwise the date of the latest PROFIT_SHARE entry
+    older than the first recorded distribution. Those entries were written by the per-report
+    endpoint before it recorded anything, and a report can't be paid before it exists.
+    """
+    if PROFIT_DISTRIBUTION_CUTOVER:
+        return date.fromisoformat(PROFIT_DISTRIBUTION_CUTOVER)
+    L = models.OwnerLedger
+    first_recorded = db.query(func.min(models.ProfitDistribution.distributed_at)).scalar()
+    legacy = db.query(func.max(L.date)).filter(L.transaction_type == "PROFIT_SHARE")
+    if first_recorded is not None:
+        legacy = legacy.filter(L.date < first_recorded)
+    latest = legacy.scalar()
+    return latest.date() if latest is not None else None
+
+def distribute_profit_range(db: Session, start_date, end_date, force: bool = False):
+    """
+    Distributes every report dated in [start_date, end_date] that hasn't been distributed yet.
+    All days are computed in one pass; ledger entries and distribution records are bulk-inserted
+    in a single transaction, so a re-run only pays for the lookup of what is already done.
+    Reports up to the cutover (get_profit_distribution_cutover) may already have been paid with
+    no record of it; they are refused unless `force` is set.
+    """
+    PD = models.ProfitDistribution
+    DR = models.DailyReport
+    in_range = (DR.date >= start_date, DR.date <= end_date)
+
+    already = [rid for (rid,) in db.query(PD.report_id).join(DR, DR.id == PD.report_id).filter(*in_range).order_by(DR.date)]
+    reports = db.query(DR.id, DR.date, DR.total_ad_spend)\
+                .outerjoin(PD, PD.report_id == DR.id)\
+                .filter(*in_range, PD.id.is_(None))\
+                .order_by(DR.date).all()
+    result = {"distributed_report_ids": [r.id for r in reports], "already_distributed_report_ids": already, "entries": 0, "amount": 0.0}
+    if not reports:
+        return result
+
+    cutover = get_profit_distribution_cutover(db)
+    if not force and cutover is not None and reports[0].date <= cutover:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Reports dated on or before {cutover.isoformat()} may already have been paid per report; "
+                   "check the ledger and pass force=true to distribute them"
+        )
+
+    now = datetime.utcnow()
+    entries = []
+    distributions = []
+    for report_id, payouts in _compute_profit_distributions(db, reports).items():
+        rows = [
+            {"owner_id": owner_id, "amount": amount, "transaction_type": "PROFIT_SHARE", "date": now}
+            for owner_id, amount in payouts.items() if amount != 0
+        ]
+        entries.extend(rows)
+        distributions.append({
+            "report_id": report_id,
+            "distributed_at": now,
+            "amount": round(sum(row["amount"] for row in rows), 2),
+            "entry_count": len(rows)
+        })
+
+    try:
+        # Claim the reports first: a concurrent run for an overlapping range fails here
+        db.execute(insert(PD), distributions)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Some of these reports were distributed concurrently; retry")
+
+    record_ledger_entries(db, entries)
+    bump_data_version(db, "ledger")
+    db.commit()
+
+    result["entries"] = len(entries)
+    result["amount"] = round(sum(d["amount"] for d in distributions), 2)
+    return result
+
 def withdraw_equity(db: Session, owner_id: int, amount: float):
-    entry = models.OwnerLedger(
-        owner_id=owner_id,
-        amount=-amount,
-        transaction_type="WITHDRAWAL",
-        date=datetime.utcnow()
-    )
-    db.add(entry)
+    entry = record_ledger_entry(db, owner_id, -amount, "WITHDRAWAL", datetime.utcnow())
+    bump_data_version(db, "ledger")
     db.commit()
     db.refresh(entry)
     return entry
 
-def get_owner_balance(db: Session, owner_id: int):
-    entries = db.query(models.OwnerLedger).filter(models.OwnerLedger.owner_id == owner_id).all()
-    return sum(e.amount for e in entries)
-
 def create_owner_payment(db: Session, payment: schemas.OwnerPaymentCreate):
-    db_payment = models.OwnerLedger(
-        owner_id=payment.owner_id,
-        amount=payment.amount,
-        transaction_type="PAYOUT",
-        date=payment.date
-    )
-    db.add(db_payment)
+    db_payment = record_ledger_entry(db, payment.owner_id, payment.amount, "PAYOUT", payment.date)
+    bump_data_version(db, "ledger")
     db.commit()
     db.refresh(db_payment)
     return db_payment
@@ -151,98 +236,115 @@ def get_owner_payments(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.OwnerLedger)\
              .filter(models.OwnerLedger.transaction_type == "PAYOUT")\
              .options(joinedload(models.OwnerLedger.owner))\
-             .order_by(desc(models.OwnerLedger.date))\
+             .order_by(desc(models.OwnerLedger.date), desc(models.OwnerLedger.id))\
              .offset(skip)\
              .limit(limit)\
              .all()
 
-def get_owner_profit_breakdown(db: Session):
+def get_owner_payments_page(db: Session, cursor: str = None, limit: int = 100):
+    query = db.query(models.OwnerLedger)\
+              .filter(models.OwnerLedger.transaction_type == "PAYOUT")\
+              .options(joinedload(models.OwnerLedger.owner))
+    return paginate_keyset(query, [models.OwnerLedger.date, models.OwnerLedger.id], cursor, limit)
+
+def _date_range(column, start_date=None, end_date=None):
+    conditions = []
+    if start_date:
+        conditions.append(column >= start_date)
+    if end_date:
+        conditions.append(column <= end_date)
+    return conditions
+
+def get_owner_payouts_between(db: Session, start_date=None, end_date=None):
     """
-    Calculates lifetime profit breakdown for each owner.
+    {owner_id: PAYOUT total} for ledger entries dated within [start_date, end_date].
     """
-    # 1. Fetch Key Data
-    owners = db.query(models.Owner).all()
-    products = db.query(models.Product).options(joinedload(models.Product.equities)).all()
-    
-    # 2. Aggregates
-    # Global Ad Spend
-    total_ad_spend = db.query(func.sum(models.DailyReport.total_ad_spend)).scalar() or 0.0
-    
-    # Expenses (Global vs Product)
-    expenses = db.query(models.Expense).all()
-    global_expenses = 0.0
-    product_expenses = {} # {product_id: amount}
-    
-    for exp in expenses:
-        if exp.product_id:
-            product_expenses[exp.product_id] = product_expenses.get(exp.product_id, 0.0) + exp.amount
-        else:
-            global_expenses += exp.amount
-            
-    # Sales (Revenue & COGS) per product
-    sales_stats = db.query(
-        models.Sale.product_id,
+    L = models.OwnerLedger
+    conditions = []
+    if start_date:
+        conditions.append(L.date >= start_date)
+    if end_date:
+        # Ledger dates carry a time, so the whole end day counts
+        conditions.append(L.date < end_date + timedelta(days=1))
+    return dict(
+        db.query(L.owner_id, func.sum(L.amount))
+          .filter(L.transaction_type == "PAYOUT", *conditions)
+          .group_by(L.owner_id).all()
+    )
+
+def get_owner_profit_breakdown(db: Session, start_date=None, end_date=None):
+    """
+    Calculates the profit breakdown for each owner, lifetime or for [start_date, end_date].
+    Revenue, COGS and expenses are summed per product in SQL and split with the equity matrix.
+    """
+    # 1. Per-product net: revenue - cogs - product expenses
+    sales = db.query(
+        models.Sale.product_id.label('product_id'),
         func.sum(models.Sale.selling_price * models.Sale.quantity).label('revenue'),
         func.sum(models.Sale.calculated_cogs).label('cogs')
-    ).group_by(models.Sale.product_id).all()
-    
-    product_financials = {} # {product_id: {'revenue': 0, 'cogs': 0}}
-    for stat in sales_stats:
-        product_financials[stat.product_id] = {
-            'revenue': stat.revenue or 0.0,
-            'cogs': stat.cogs or 0.0
-        }
+    )
+    if start_date or end_date:
+        # A sale is dated by its report
+        sales = sales.join(models.DailyReport, models.Sale.report_id == models.DailyReport.id)\
+                     .filter(*_date_range(models.DailyReport.date, start_date, end_date))
+    sales = sales.group_by(models.Sale.product_id).subquery()
 
-    # 3. Calculation
-    owner_data = {o.id: {'name': o.name, 'total': 0.0, 'breakdown': {}} for o in owners}
-    
-    # A. Distribute Product Profits
-    for product in products:
-        pid = product.id
-        fin = product_financials.get(pid, {'revenue': 0.0, 'cogs': 0.0})
-        p_expense = product_expenses.get(pid, 0.0)
-        
-        product_net = fin['revenue'] - fin['cogs'] - p_expense
-        
-        equities = product.equities
-        
-        if equities:
-            for eq in equities:
-                share = (eq.equity_percentage / 100.0) * product_net
-                share = round(share, 2)
-                if eq.owner_id in owner_data:
-                    owner_data[eq.owner_id]['total'] += share
-                    owner_data[eq.owner_id]['breakdown'][product.name] = share
-        else:
-            # Fallback to Global Equity
-            for owner in owners:
-                share = (owner.equity_percentage / 100.0) * product_net
-                share = round(share, 2)
-                owner_data[owner.id]['total'] += share
-                owner_data[owner.id]['breakdown'][product.name] = share
-
-    # B. Distribute Global Costs (Negative Payout)
-    total_global_costs = total_ad_spend + global_expenses
-    for owner in owners:
-        cost_share = (owner.equity_percentage / 100.0) * total_global_costs
-        cost_share = round(cost_share, 2)
-        owner_data[owner.id]['total'] -= cost_share
-        
-        # Add a "Global Costs" entry to breakdown
-        owner_data[owner.id]['breakdown']['Global Costs (Ads & Expenses)'] = -cost_share
+    product_expenses = db.query(
+        models.Expense.product_id.label('product_id'),
+        func.sum(models.Expense.amount).label('amount')
+    ).filter(models.Expense.product_id.isnot(None), *_date_range(models.Expense.date, start_date, end_date))\
+     .group_by(models.Expense.product_id).subquery()
+
+    products = db.query(
+        models.Product.id,
+        models.Product.name,
+        func.coalesce(sales.c.revenue, 0.0) - func.coalesce(sales.c.cogs, 0.0) - func.coalesce(product_expenses.c.amount, 0.0)
+    ).outerjoin(sales, sales.c.product_id == models.Product.id)\
+     .outerjoin(product_expenses, product_expenses.c.product_id == models.Product.id)\
+     .order_by(models.Product.id).all()
+
+    # 2. Global costs: ad spend plus expenses not tied to a product
+    total_ad_spend = db.query(func.coalesce(func.sum(models.DailyReport.total_ad_spend), 0.0))\
+                       .filter(*_date_range(models.DailyReport.date, start_date, end_date)).scalar()
+    global_expenses = db.query(func.coalesce(func.sum(models.Expense.amount), 0.0))\
+                        .filter(models.Expense.product_id.is_(None), *_date_range(models.Expense.date, start_date, end_date))\
+                        .scalar()
+
+    # 3. Calculation: every owner's cents-rounded share of every product in one matrix
+    matrix = get_equity_matrix(db)
+    nets, _ = matrix.product_vector({pid: net for pid, _, net in products})
+    column_names = [None] * len(matrix.product_ids)
+    for pid, name, _ in products:
+        if pid in matrix.product_index:
+            column_names[matrix.product_index[pid]] = name
+    shares = matrix.allocate_detail(nets)
+
+    # Global Costs (Negative Payout)
+    cost_shares = matrix.allocate_global(total_ad_spend + global_expenses)
+
+    names = dict(db.query(models.Owner.id, models.Owner.name).all())
+    owner_data = {}
+    for i, owner_id in enumerate(matrix.owner_ids):
+        # A line for each product the owner takes part in (its own map, or global equity)
+        columns = np.flatnonzero(matrix.members[i])
+        breakdown = dict(zip([column_names[j] for j in columns], shares[i, columns].tolist()))
+        cost_share = float(cost_shares[i])
+        breakdown['Global Costs (Ads & Expenses)'] = -cost_share
+        owner_data[owner_id] = {
+            'name': names.get(owner_id),
+            'total': float(shares[i].sum()) - cost_share,
+            'breakdown': breakdown
+        }
 
     # Format Output
+    if start_date or end_date:
+        payouts = get_owner_payouts_between(db, start_date, end_date)
+    else:
+        payouts = get_owner_payout_totals(db)
     result = []
     for owner_id, data in owner_data.items():
-        # Calculate Total Paid from Ledger
-        paid = db.query(func.sum(models.OwnerLedger.amount))\
-                 .filter(models.OwnerLedger.owner_id == owner_id, models.OwnerLedger.transaction_type == "PAYOUT")\
-                 .scalar() or 0.0
-        
-        data['total_paid'] = round(paid, 2)
-        data['balance'] = round(data['total'] - paid, 2)
+        paid = payouts.get(owner_id, 0.0)
         
-        # Convert breakdown dict to list
         # Sort breakdown by value desc
         breakdown_list = sorted(
             [{'name': k, 'amount': v} for k, v in data['breakdown'].items()],
@@ -253,8 +355,8 @@ def get_owner_profit_breakdown(db: Session):
             "id": owner_id,
             "name": data['name'],
             "total_profit": round(data['total'], 2),
-            "total_paid": data['total_paid'],
-            "balance": data['balance'],
+            "total_paid": round(paid, 2),
+            "balance": round(data['total'] - paid, 2),
             "breakdown": breakdown_list
         })
         
@@ -0,0 +1,207 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import case, func, insert
+from sqlalchemy.exc import IntegrityError
+import os
+import models
+
+TRANSACTION_TYPES = ("PROFIT_SHARE", "WITHDRAWAL", "PAYOUT")
+
+# Ledger entries per owner and type between balance checkpoints
+LEDGER_CHECKPOINT_INTERVAL = int(os.getenv("LEDGER_CHECKPOINT_INTERVAL", "100"))
+
+def _get_or_create_owner_balance(db: Session, owner_id: int, transaction_type: str):
+    B = models.OwnerBalance
+    row = db.query(B).filter(B.owner_id == owner_id, B.transaction_type == transaction_type).first()
+    if row:
+        return row
+
+    row = B(owner_id=owner_id, transaction_type=transaction_type, balance=0.0, entry_count=0)
+    try:
+        # Savepoint so a concurrent first entry for the same owner doesn't kill the caller's transaction
+        with db.begin_nested():
+            db.add(row)
+    except IntegrityError:
+        row = db.query(B).filter(B.owner_id == owner_id, B.transaction_type == transaction_type).first()
+    return row
+
+def _add_to_running_total(db: Session, owner_id: int, transaction_type: str, amount: float, count: int):
+    # Updating the balance row first serialises writers for the same owner and type until commit
+    snapshot = _get_or_create_owner_balance(db, owner_id, transaction_type)
+    B = models.OwnerBalance
+    snapshot.balance = B.balance + amount
+    snapshot.entry_count = B.entry_count + count
+    return snapshot
+
+def _shift_checkpoints(db: Session, owner_id: int, transaction_type: str, date, amount: float):
+    # A backdated entry also belongs to every checkpoint at or after its date
+    C = models.OwnerBalanceCheckpoint
+    db.query(C).filter(
+        C.owner_id == owner_id,
+        C.transaction_type == transaction_type,
+        C.as_of >= date
+    ).update({C.balance: C.balance + amount}, synchronize_session=False)
+
+def _checkpoint_if_due(db: Session, snapshot, added: int):
+    # entry_count was set to an expression, so this reads the flushed value
+    if snapshot.entry_count // LEDGER_CHECKPOINT_INTERVAL > (snapshot.entry_count - added) // LEDGER_CHECKPOINT_INTERVAL:
+        _write_checkpoint(db, snapshot)
+
+def record_ledger_entry(db: Session, owner_id: int, amount: float, transaction_type: str, date):
+    """
+    Adds a ledger row and keeps the owner's running balance and checkpoints in step.
+    Does not commit; the caller's transaction owns the change.
+    """
+    snapshot = _add_to_running_total(db, owner_id, transaction_type, amount, 1)
+    entry = models.OwnerLedger(owner_id=owner_id, amount=amount, transaction_type=transaction_type, date=date)
+    db.add(entry)
+    _shift_checkpoints(db, owner_id, transaction_type, date, amount)
+    db.flush()
+    _checkpoint_if_due(db, snapshot, 1)
+    return entry
+
+def record_ledger_entries(db: Session, entries):
+    """
+    Bulk version of record_ledger_entry for dicts of owner_id/amount/transaction_type/date:
+    one insert for all rows, and one running-total update per owner and type.
+    Does not commit; the caller's transaction owns the change.
+    """
+    if not entries:
+        return
+    groups = {} # {(owner_id, type): {date: amount}}
+    counts = {}
+    for e in entries:
+        key = (e["owner_id"], e["transaction_type"])
+        by_date = groups.setdefault(key, {})
+        by_date[e["date"]] = by_date.get(e["date"], 0.0) + e["amount"]
+        counts[key] = counts.get(key, 0) + 1
+
+    # Fixed order so two bulk writers can't deadlock on the balance rows
+    snapshots = {
+        key: _add_to_running_total(db, *key, sum(by_date.values()), counts[key])
+        for key, by_date in sorted(groups.items())
+    }
+    db.execute(insert(models.OwnerLedger), entries)
+    for (owner_id, transaction_type), by_date in groups.items():
+        for date, amount in by_date.items():
+            _shift_checkpoints(db, owner_id, transaction_type, date, amount)
+    db.flush()
+    for key, snapshot in snapshots.items():
+        _checkpoint_if_due(db, snapshot, counts[key])
+
+def _write_checkpoint(db: Session, snapshot):
+    # Every entry is dated at or before the latest date, so the running total is the checkpoint
+    L = models.OwnerLedger
+    latest = db.query(func.max(L.date))\
+               .filter(L.owner_id == snapshot.owner_id, L.transaction_type == snapshot.transaction_type)\
+               .scalar()
+    C = models.OwnerBalanceCheckpoint
+    exists = db.query(C.id).filter(
+        C.owner_id == snapshot.owner_id,
+        C.transaction_type == snapshot.transaction_type,
+        C.as_of == latest
+    ).first()
+    if not exists:
+        # Kept up to date by the backdating shift above, so an existing one is already right
+        db.add(C(owner_id=snapshot.owner_id, transaction_type=snapshot.transaction_type, as_of=latest, balance=snapshot.balance))
+
+def get_owner_balance(db: Session, owner_id: int, as_of=None):
+    """
+    Sum of an owner's ledger. Current balances come straight from the running totals;
+    an as-of balance starts from the nearest checkpoint per type and adds the entries after it.
+    """
+    B = models.OwnerBalance
+    if as_of is None:
+        return db.query(func.coalesce(func.sum(B.balance), 0.0)).filter(B.owner_id == owner_id).scalar()
+
+    C = models.OwnerBalanceCheckpoint
+    L = models.OwnerLedger
+    nearest = dict(
+        db.query(C.transaction_type, func.max(C.as_of))
+          .filter(C.owner_id == owner_id, C.as_of <= as_of)
+          .group_by(C.transaction_type).all()
+    )
+    types = [t for (t,) in db.query(B.transaction_type).filter(B.owner_id == owner_id).all()]
+
+    total = 0.0
+    for transaction_type in types:
+        tail = db.query(func.coalesce(func.sum(L.amount), 0.0))\
+                 .filter(L.owner_id == owner_id, L.transaction_type == transaction_type, L.date <= as_of)
+        checkpoint_date = nearest.get(transaction_type)
+        if checkpoint_date is not None:
+            total += db.query(C.balance).filter(
+                C.owner_id == owner_id, C.transaction_type == transaction_type, C.as_of == checkpoint_date
+            ).scalar()
+            tail = tail.filter(L.date > checkpoint_date)
+        total += tail.scalar()
+    return total
+
+def get_owner_balances(db: Session):
+    """
+    Every owner's ledger balance with a per-type split, in one query over the running totals.
+    """
+    B = models.OwnerBalance
+
+    def type_total(transaction_type):
+        return func.coalesce(func.sum(case((B.transaction_type == transaction_type, B.balance), else_=0.0)), 0.0)
+
+    rows = db.query(
+        models.Owner.id,
+        models.Owner.name,
+        func.coalesce(func.sum(B.balance), 0.0),
+        *[type_total(t) for t in TRANSACTION_TYPES]
+    ).outerjoin(B, B.owner_id == models.Owner.id)\
+     .group_by(models.Owner.id, models.Owner.name)\
+     .order_by(models.Owner.id).all()
+
+    return [
+        {
+            "owner_id": owner_id,
+            "name": name,
+            "balance": round(balance, 2),
+            "by_type": {t: round(amount, 2) for t, amount in zip(TRANSACTION_TYPES, by_type)},
+        }
+        for owner_id, name, balance, *by_type in rows
+    ]
+
+def get_owner_payout_totals(db: Session):
+    """
+    {owner_id: total PAYOUT amount} from the running totals.
+    """
+    B = models.OwnerBalance
+    return dict(db.query(B.owner_id, B.balance).filter(B.transaction_type == "PAYOUT").all())
+
+def backfill_owner_balances(db: Session):
+    """
+    One-time population of running totals and checkpoints for ledgers recorded before they existed.
+    Only owner/type pairs without a running total are written.
+    """
+    existing = set(db.query(models.OwnerBalance.owner_id, models.OwnerBalance.transaction_type).all())
+
+    L = models.OwnerLedger
+    per_day = db.query(L.owner_id, L.transaction_type, L.date, func.sum(L.amount), func.count(L.id))\
+                .filter(L.owner_id.isnot(None))\
+                .group_by(L.owner_id, L.transaction_type, L.date)\
+                .order_by(L.owner_id, L.transaction_type, L.date).all()
+
+    totals = {}
+    checkpoints = []
+    for owner_id, transaction_type, date, amount, count in per_day:
+        key = (owner_id, transaction_type)
+        if key in existing:
+            continue
+        balance, entries = totals.get(key, (0.0, 0))
+        # Checkpoint at the date where the count crosses the next interval, covering that whole date
+        if (entries + count) // LEDGER_CHECKPOINT_INTERVAL > entries // LEDGER_CHECKPOINT_INTERVAL:
+            checkpoints.append(models.OwnerBalanceCheckpoint(
+                owner_id=owner_id, transaction_type=transaction_type, as_of=date, balance=balance + amount
+            ))
+        totals[key] = (balance + amount, entries + count)
+
+    if totals:
+        db.add_all([
+            models.OwnerBalance(owner_id=owner_id, transaction_type=transaction_type, balance=balance, entry_count=entries)
+            for (owner_id, transaction_type), (balance, entries) in totals.items()
+        ])
+        db.add_all(checkpoints)
+        db.commit()
+        print(f"Backfilled running balances for {len(totals)} owner ledgers.")
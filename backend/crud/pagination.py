@@ -0,0 +1,64 @@
+from sqlalchemy import tuple_
+from fastapi import HTTPException
+from datetime import date, datetime
+import base64
+import json
+
+# Largest page a list endpoint serves in one response
+MAX_PAGE_LIMIT = 1000
+
+def encode_cursor(values):
+    """
+    Packs the sort-key values of the last row on a page into an opaque, URL-safe token.
+    """
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(raw) != len(columns):
+            raise ValueError("cursor shape mismatch")
+        values = []
+        for column, value in zip(columns, raw):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            else:
+                value = python_type(value)
+            values.append(value)
+        return values
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate_keyset(query, columns, cursor, limit: int, descending: bool = True, key=None):
+    """
+    Seek-based pagination: filters past the cursor's sort key instead of OFFSET,
+    so every page costs the same and rows don't shift when new ones land.
+    `columns` must form a unique sort key (e.g. (date, id)).
+    `key` extracts those values from a result row; defaults to attribute lookup.
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        if descending:
+            query = query.filter(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        values = key(last) if key else [getattr(last, c.key) for c in columns]
+        next_cursor = encode_cursor(values)
+
+    return rows, next_cursor
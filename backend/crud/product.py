@@ -1,12 +1,38 @@
 from sqlalchemy.orm import Session, selectinload, joinedload
-from sqlalchemy import func
+from sqlalchemy import func, case, or_
 import models
 import schemas
 import uuid
+from .pagination import paginate_keyset
+from .data_version import bump_data_version
 
 def get_product(db: Session, product_id: int):
     return db.query(models.Product).filter(models.Product.id == product_id).first()
 
+def get_product_for_update(db: Session, product_id: int):
+    """
+    Row-locks the product until the transaction ends, so stock changes to the
+    same SKU are serialized across workers while other SKUs proceed in parallel.
+    Pending changes are flushed first so the locked re-read doesn't discard them.
+    """
+    db.flush()
+    return db.query(models.Product).filter(models.Product.id == product_id)\
+             .with_for_update().populate_existing().first()
+
+def lock_products(db: Session, product_ids):
+    """
+    Row-locks several products in id order (so concurrent writers can't deadlock).
+    Returns {product_id: product}.
+    """
+    ids = sorted(set(product_ids))
+    if not ids:
+        return {}
+    db.flush()
+    products = db.query(models.Product).filter(models.Product.id.in_(ids))\
+                 .order_by(models.Product.id)\
+                 .with_for_update().populate_existing().all()
+    return {p.id: p for p in products}
+
 def get_product_by_sku(db: Session, sku: str):
     return db.query(models.Product).filter(models.Product.sku == sku).first()
 
@@ -22,6 +48,7 @@ def create_product(db: Session, product: schemas.ProductCreate):
     # prod_data now contains cost_price (and price=0.0 which is fine)
     db_product = models.Product(**prod_data)
     db.add(db_product)
+    bump_data_version(db, "products")
     db.commit()
     db.refresh(db_product)
     
@@ -35,25 +62,113 @@ def create_product(db: Session, product: schemas.ProductCreate):
                 equity_percentage=eq.equity_percentage
             )
             db.add(new_equity)
+        bump_data_version(db, "products", "owners", "equity")
         db.commit() # Commit all equities
         db.refresh(db_product)
 
     return db_product
 
+def _products_query(db: Session):
+    # Sales totals are stored on the row, so a listing is one products scan plus its equities
+    return db.query(models.Product)\
+             .options(selectinload(models.Product.equities).joinedload(models.ProductEquity.owner))
+
 def get_products(db: Session, skip: int = 0, limit: int = 100):
-    products = db.query(
-        models.Product, 
-        func.coalesce(func.sum(models.Sale.quantity), 0).label('total_sold')
-    ).outerjoin(models.Sale)\
-     .options(
-         selectinload(models.Product.equities).joinedload(models.ProductEquity.owner),
-         selectinload(models.Product.batches)
-     )\
-     .group_by(models.Product.id).offset(skip).limit(limit).all()
-    
-    results = []
-    for product, sold in products:
-        product.total_sold = sold
-        # product.cost_price is now stored and updated on inventory add (AVCO)
-        results.append(product)
-    return results
+    return _products_query(db).order_by(models.Product.id).offset(skip).limit(limit).all()
+
+def get_products_page(db: Session, cursor: str = None, limit: int = 100):
+    return paginate_keyset(_products_query(db), [models.Product.id], cursor, limit, descending=False)
+
+def get_product_batches_page(db: Session, product_id: int, cursor: str = None, limit: int = 50, live_only: bool = False):
+    """
+    A product's inventory batches, newest first; `live_only` skips depleted ones.
+    """
+    query = db.query(models.InventoryBatch).filter(models.InventoryBatch.product_id == product_id)
+    if live_only:
+        query = query.filter(models.InventoryBatch.remaining_quantity > 0)
+    return paginate_keyset(query, [models.InventoryBatch.date_added, models.InventoryBatch.id], cursor, limit)
+
+def add_product_sale(product, quantity: int, revenue: float, sold_on=None):
+    """
+    Adds a sale to a product's stored counters. The caller holds the product's row lock.
+    """
+    product.total_sold = (product.total_sold or 0) + quantity
+    product.total_revenue = (product.total_revenue or 0.0) + revenue
+    if sold_on and (product.last_sold_at is None or sold_on > product.last_sold_at):
+        product.last_sold_at = sold_on
+
+def refresh_product_sales_counters(db: Session, product_ids):
+    """
+    Recomputes the stored sales counters of the given products from their sales.
+    Used where sales are edited or removed; does not commit.
+    """
+    ids = sorted(set(product_ids))
+    if not ids:
+        return
+    db.flush()
+    S = models.Sale
+    totals = {
+        pid: (sold, revenue, last)
+        for pid, sold, revenue, last in db.query(
+            S.product_id,
+            func.coalesce(func.sum(S.quantity), 0),
+            func.coalesce(func.sum(S.selling_price * S.quantity), 0.0),
+            func.max(models.DailyReport.date)
+        ).outerjoin(models.DailyReport, models.DailyReport.id == S.report_id)
+         .filter(S.product_id.in_(ids))
+         .group_by(S.product_id).all()
+    }
+    for product in db.query(models.Product).filter(models.Product.id.in_(ids)).all():
+        product.total_sold, product.total_revenue, product.last_sold_at = totals.get(product.id, (0, 0.0, None))
+
+def backfill_product_sales_counters(db: Session):
+    """
+    One-time population of the sales counters on products recorded before they existed.
+    """
+    ids = [pid for (pid,) in db.query(models.Product.id).filter(models.Product.total_sold.is_(None)).all()]
+    if ids:
+        for start in range(0, len(ids), 5000):
+            refresh_product_sales_counters(db, ids[start:start + 5000])
+        bump_data_version(db, "products")
+        db.commit()
+        print(f"Backfilled sales counters for {len(ids)} products.")
+
+def _like_escape(text: str):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def search_products(db: Session, query: str, limit: int = 20):
+    """
+    Case-insensitive match on name or SKU, best matches first:
+    exact SKU, then name/SKU prefix, then anywhere in the name/SKU.
+    Terms shorter than a trigram only match prefixes (lower() prefix indexes);
+    longer ones match anywhere (trigram indexes on Postgres).
+    """
+    term = query.strip().lower()
+    if not term:
+        return []
+    pattern = _like_escape(term)
+    name = func.lower(models.Product.name)
+    sku = func.lower(models.Product.sku)
+    prefix = or_(name.like(pattern + "%", escape="\\"), sku.like(pattern + "%", escape="\\"))
+
+    if len(term) < 3:
+        match = prefix
+    else:
+        match = or_(
+            models.Product.name.ilike("%" + pattern + "%", escape="\\"),
+            models.Product.sku.ilike("%" + pattern + "%", escape="\\")
+        )
+    rank = case((sku == term, 0), (prefix, 1), else_=2)
+    return db.query(models.Product)\
+             .filter(match)\
+             .order_by(rank, models.Product.name, models.Product.id)\
+             .limit(limit).all()
+
+def get_low_stock_products(db: Session, threshold: int = 10, limit: int = 100):
+    """
+    Products with current_stock below threshold, emptiest first.
+    """
+    return db.query(models.Product)\
+             .filter(models.Product.current_stock < threshold)\
+             .order_by(models.Product.current_stock, models.Product.id)\
+             .limit(limit).all()
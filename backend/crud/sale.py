@@ -1,50 +1,61 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import asc
+from sqlalchemy import insert
 from fastapi import HTTPException
+from typing import List
 import models
 import schemas
-from .product import get_product
+from .product import get_product_for_update, lock_products, add_product_sale
+from .inventory import get_live_batches_for_update
+from .daily_financials import apply_daily_financials_delta
+from .data_version import bump_data_version
 
-def process_sale_fifo(db: Session, sale: schemas.SaleCreate):
+def deplete_batches_fifo(batches, quantity: int):
+    """
+    Deducts `quantity` from batches (oldest first) in memory.
+    Returns the quantity that could not be fulfilled.
+    """
+    quantity_to_fulfill = quantity
+    for batch in batches:
+        if quantity_to_fulfill <= 0:
+            break
+
+        if batch.remaining_quantity >= quantity_to_fulfill:
+            # Fully fulfill from this batch
+            batch.remaining_quantity -= quantity_to_fulfill
+            quantity_to_fulfill = 0
+        else:
+            # Partially fulfill from this batch and move to next
+            take_qty = batch.remaining_quantity
+            quantity_to_fulfill -= take_qty
+            batch.remaining_quantity = 0 # Depleted this batch
+    return quantity_to_fulfill
+
+def process_sale_fifo(db: Session, sale: schemas.SaleCreate, commit: bool = True):
     """
     Process a sale using FIFO logic to calculate COGS.
     Deducts stock from oldest batches first.
+    The product and its live batches stay row-locked until the transaction ends;
+    pass commit=False to keep the sale inside a caller's larger transaction
+    (the caller then also bumps the data versions).
     """
-    product = get_product(db, sale.product_id)
+    product = get_product_for_update(db, sale.product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    
+
     if product.current_stock < sale.quantity:
         raise HTTPException(status_code=400, detail="Insufficient stock")
 
     # Get batches with remaining quantity > 0, ordered by date
-    batches = db.query(models.InventoryBatch).filter(
-        models.InventoryBatch.product_id == sale.product_id,
-        models.InventoryBatch.remaining_quantity > 0
-    ).order_by(asc(models.InventoryBatch.date_added)).all()
+    batches = get_live_batches_for_update(db, [sale.product_id])
 
-    quantity_to_fulfill = sale.quantity
-    
     # AVCO COGS Calculation: Use the stored Weighted Average Cost
     # This ensures consistent cost basis regardless of which specific batch is physically depleted
-    unit_cogs = product.cost_price 
+    unit_cogs = product.cost_price
     total_cogs = round(unit_cogs * sale.quantity, 2)
-    
+
     # Deplete physical stock from batches using FIFO (for tracking remaining batch quantities)
-    for batch in batches:
-        if quantity_to_fulfill <= 0:
-            break
-            
-        if batch.remaining_quantity >= quantity_to_fulfill:
-            # Fully fulfill from this batch
-            batch.remaining_quantity -= quantity_to_fulfill
-            quantity_to_fulfill = 0
-        else:
-            # Partially fulfill from this batch and move to next
-            take_qty = batch.remaining_quantity
-            quantity_to_fulfill -= take_qty
-            batch.remaining_quantity = 0 # Depleted this batch
-            
+    deplete_batches_fifo(batches, sale.quantity)
+
     # Update Product Total Stock
     product.current_stock -= sale.quantity
 
@@ -57,6 +68,98 @@ def process_sale_fifo(db: Session, sale: schemas.SaleCreate):
         calculated_cogs=total_cogs
     )
     db.add(db_sale)
-    db.commit()
-    db.refresh(db_sale)
+
+    # Keep the daily P&L rollup current
+    report_date = db.query(models.DailyReport.date).filter(models.DailyReport.id == sale.report_id).scalar()
+    if report_date:
+        apply_daily_financials_delta(db, report_date, sale.product_id, revenue=sale.selling_price * sale.quantity, cogs=total_cogs)
+    add_product_sale(product, sale.quantity, sale.selling_price * sale.quantity, report_date)
+
+    if commit:
+        bump_data_version(db, "sales", "inventory", "products")
+        db.commit()
+        db.refresh(db_sale)
+    else:
+        db.flush()
     return db_sale
+
+def process_sales_bulk(db: Session, sales: List[schemas.SaleCreate]):
+    """
+    Process many sale lines in one transaction.
+    Products and their live batches are loaded (and row-locked) once, FIFO depletion
+    happens in memory, and all Sale rows go in with a single bulk insert.
+    A bad line is reported in its result instead of aborting the batch.
+    """
+    results = [{"index": i, "sale_id": None, "calculated_cogs": None, "error": None} for i in range(len(sales))]
+    if not sales:
+        return {"created": 0, "failed": 0, "results": results}
+
+    product_ids = sorted({s.product_id for s in sales})
+    report_ids = {s.report_id for s in sales}
+
+    products = lock_products(db, product_ids)
+
+    batches_by_product = {pid: [] for pid in product_ids}
+    for batch in get_live_batches_for_update(db, product_ids):
+        batches_by_product[batch.product_id].append(batch)
+
+    report_dates = dict(
+        db.query(models.DailyReport.id, models.DailyReport.date)
+          .filter(models.DailyReport.id.in_(report_ids)).all()
+    )
+
+    rows = []
+    row_indexes = []
+    day_deltas = {} # {(date, product_id): {'revenue': x, 'cogs': y}}
+
+    for i, sale in enumerate(sales):
+        product = products.get(sale.product_id)
+        if not product:
+            results[i]["error"] = "Product not found"
+            continue
+        if sale.report_id not in report_dates:
+            results[i]["error"] = "Report not found"
+            continue
+        if sale.quantity <= 0:
+            results[i]["error"] = "Quantity must be positive"
+            continue
+        if product.current_stock < sale.quantity:
+            results[i]["error"] = "Insufficient stock"
+            continue
+
+        deplete_batches_fifo(batches_by_product[product.id], sale.quantity)
+        product.current_stock -= sale.quantity
+        add_product_sale(product, sale.quantity, sale.selling_price * sale.quantity, report_dates[sale.report_id])
+
+        # AVCO COGS, same as process_sale_fifo
+        total_cogs = round(product.cost_price * sale.quantity, 2)
+        rows.append({
+            "report_id": sale.report_id,
+            "product_id": sale.product_id,
+            "quantity": sale.quantity,
+            "selling_price": sale.selling_price,
+            "calculated_cogs": total_cogs
+        })
+        row_indexes.append(i)
+        results[i]["calculated_cogs"] = total_cogs
+
+        delta = day_deltas.setdefault((report_dates[sale.report_id], sale.product_id), {'revenue': 0.0, 'cogs': 0.0})
+        delta['revenue'] += sale.selling_price * sale.quantity
+        delta['cogs'] += total_cogs
+
+    if rows:
+        sale_ids = db.scalars(
+            insert(models.Sale).returning(models.Sale.id, sort_by_parameter_order=True),
+            rows
+        ).all()
+        for i, sale_id in zip(row_indexes, sale_ids):
+            results[i]["sale_id"] = sale_id
+
+        for (day, product_id), delta in sorted(day_deltas.items()):
+            apply_daily_financials_delta(db, day, product_id, revenue=delta['revenue'], cogs=delta['cogs'])
+
+        bump_data_version(db, "sales", "inventory", "products")
+
+    db.commit()
+
+    return {"created": len(rows), "failed": len(sales) - len(rows), "results": results}
@@ -1,37 +1,69 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, select
 from datetime import datetime, timedelta
+import asyncio
 import models
+from .analytics import get_pnl_buckets, get_pnl_buckets_async
 
-def get_sales_history(db: Session, days: int = 30):
+def get_sales_history(db: Session, days: int = 30, bucket: str = "day", rolling: int = None):
     """
-    Get daily revenue and net profit for the last N days.
+    Get revenue, costs and net profit for the last N days, bucketed by day/week/month/quarter.
     """
-    start_date = datetime.utcnow().date() - timedelta(days=days)
-    reports = db.query(models.DailyReport).filter(models.DailyReport.date >= start_date).order_by(models.DailyReport.date).all()
-    
-    history = []
-    for report in reports:
-        # Calculate derived metrics if not stored directly
-        revenue = sum(s.selling_price * s.quantity for s in report.sales)
-        cogs = sum(s.calculated_cogs for s in report.sales)
-        expenses_records = db.query(models.Expense).filter(models.Expense.date == report.date).all()
-        day_expenses = sum(e.amount for e in expenses_records)
-        
-        net_profit = (revenue - cogs) - report.total_ad_spend - day_expenses
-        
-        history.append({
-            "date": report.date,
-            "revenue": revenue,
-            "net_profit": net_profit
-        })
-    return history
+    end_date = datetime.utcnow().date()
+    start_date = end_date - timedelta(days=days)
+    return get_pnl_buckets(db, start_date, end_date, bucket=bucket, rolling=rolling)
+
+async def get_sales_history_async(db, days: int = 30, bucket: str = "day", rolling: int = None):
+    end_date = datetime.utcnow().date()
+    start_date = end_date - timedelta(days=days)
+    return await get_pnl_buckets_async(db, start_date, end_date, bucket=bucket, rolling=rolling)
+
+def _dashboard_payload(date, revenue, cogs, ad_spend, expenses):
+    gross_profit = revenue - cogs
+    return {
+        "date": date,
+        "revenue": revenue,
+        "cogs": cogs,
+        "ad_spend": ad_spend,
+        "gross_profit": gross_profit,
+        "expenses": expenses,
+        "net_profit": gross_profit - ad_spend - expenses
+    }
+
+async def get_dashboard_stats_async(session_factory, date=None):
+    """
+    Dashboard totals for one day (from the daily rollup) or for all time.
+    The lifetime SUMs are independent, so each runs on its own session concurrently.
+    """
+    async def fetch_one(stmt):
+        async with session_factory() as session:
+            return (await session.execute(stmt)).one()
+
+    if date:
+        # A date's rollup is spread over per-product rows; SUM also turns "no rows" into zeros
+        revenue, cogs, ad_spend, expenses = await fetch_one(
+            select(func.coalesce(func.sum(models.DailyFinancials.revenue), 0.0),
+                   func.coalesce(func.sum(models.DailyFinancials.cogs), 0.0),
+                   func.coalesce(func.sum(models.DailyFinancials.ad_spend), 0.0),
+                   func.coalesce(func.sum(models.DailyFinancials.expenses), 0.0))
+            .where(models.DailyFinancials.date == date)
+        )
+        return _dashboard_payload(date, revenue, cogs, ad_spend, expenses)
+
+    (expenses,), (revenue, cogs), (ad_spend,) = await asyncio.gather(
+        fetch_one(select(func.coalesce(func.sum(models.Expense.amount), 0.0))),
+        fetch_one(select(
+            func.coalesce(func.sum(models.Sale.selling_price * models.Sale.quantity), 0.0),
+            func.coalesce(func.sum(models.Sale.calculated_cogs), 0.0)
+        )),
+        fetch_one(select(func.coalesce(func.sum(models.DailyReport.total_ad_spend), 0.0))),
+    )
+    return _dashboard_payload(date, revenue, cogs, ad_spend, expenses)
 
 def get_product_sales_stats(db: Session):
     """
     Get total sales volume per product.
     """
-    from sqlalchemy import func
     # Group by product name
     stats = db.query(
         models.Product.name,
@@ -1,16 +1,45 @@
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
+from fastapi import HTTPException
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import os
 import models
 import schemas
+from .data_version import bump_data_version
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately slow (~200ms) and releases the GIL, so it runs on its own
+# small pool: at most BCRYPT_WORKERS hashes at once, and no more than
+# BCRYPT_MAX_PENDING waiting, beyond which callers get a 503 instead of queueing forever.
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "64"))
+
+_hash_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_pending = threading.BoundedSemaphore(BCRYPT_MAX_PENDING)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def _run_hash_job(fn, *args):
+    if not _pending.acquire(blocking=False):
+        raise HTTPException(status_code=503, detail="Too many authentication requests, retry shortly", headers={"Retry-After": "1"})
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, fn, *args)
+    finally:
+        _pending.release()
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _run_hash_job(get_password_hash, password)
+
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
@@ -22,10 +51,17 @@ def create_user(db: Session, user: schemas.UserCreate):
     db.refresh(db_user)
     return db_user
 
-def update_user_password(db: Session, user_email: str, new_password: str):
+def set_user_password_hash(db: Session, user_email: str, hashed_password: str):
     user = get_user_by_email(db, user_email)
     if user:
-        user.hashed_password = get_password_hash(new_password)
+        user.hashed_password = hashed_password
+        # Revokes every token issued before this change
+        user.token_version = (user.token_version or 0) + 1
+        # Tells every worker's principal cache to re-read its users
+        bump_data_version(db, "users")
         db.commit()
         db.refresh(user)
     return user
+
+def update_user_password(db: Session, user_email: str, new_password: str):
+    return set_user_password_hash(db, user_email, get_password_hash(new_password))
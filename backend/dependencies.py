@@ -1,16 +1,27 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
+import asyncio
+import threading
+import time
+import os
 import crud
 import schemas
-from database import SessionLocal
+from database import SessionLocal, AsyncSessionLocal
 
 # Auth Config
 SECRET_KEY = "supersecretkeyneedschange" # In prod usually env var
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 # 1 day
+# How long a resolved user stays cached (per worker process). Revocation doesn't wait for it:
+# a password change bumps the shared "users" data version, and each worker polls that version
+# every PRINCIPAL_CACHE_POLL_SECONDS and empties its cache when it moves
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+PRINCIPAL_CACHE_POLL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_POLL_SECONDS", "1"))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -21,6 +32,77 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_async_session_factory():
+    # For handlers that fan out concurrent queries, one session each
+    return AsyncSessionLocal
+
+class PrincipalCache:
+    """
+    In-process TTL cache of authenticated users keyed by token subject.
+    Entries hold a frozen CurrentUser snapshot, never a session-bound ORM object.
+    A hit touches no database: the "users" data version is polled in the background
+    (watch_users_version) and a change, i.e. a password change in any worker, clears the cache.
+    """
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = {} # {subject: (expires_at, CurrentUser)}
+        self.users_version = None # last polled "users" data version
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject: str):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None or entry[0] <= now:
+                self._entries.pop(subject, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, subject: str, user: schemas.CurrentUser, users_version):
+        """
+        `users_version` is the cache's users_version from before the user was read; if a poll
+        has moved on since, the snapshot may predate the change and isn't stored.
+        """
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if users_version != self.users_version:
+                return
+            if len(self._entries) >= self.maxsize and subject not in self._entries:
+                # Drop expired entries first, then the oldest insertion
+                now = time.monotonic()
+                for key in [k for k, (exp, _, _) in self._entries.items() if exp <= now]:
+                    del self._entries[key]
+                if len(self._entries) >= self.maxsize:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[subject] = (time.monotonic() + self.ttl, user)
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            self._entries.pop(subject, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def sync(self, users_version: int):
+        # Called with each polled version; any change drops every entry
+        with self._lock:
+            if users_version != self.users_version:
+                self._entries.clear()
+                self.users_version = users_version
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_TTL, PRINCIPAL_CACHE_SIZE)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -28,7 +110,43 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def issue_access_token(user):
+    # "ver" ties the token to the user's current password
+    return create_access_token(data={"sub": user.email, "ver": user.token_version or 0})
+
+def refresh_principal_cache():
+    """
+    Reads the shared "users" data version and syncs the principal cache with it.
+    """
+    db = SessionLocal()
+    try:
+        principal_cache.sync(crud.get_data_version(db, "users"))
+    finally:
+        db.close()
+
+async def watch_users_version():
+    """
+    Background task (one per worker) that keeps the principal cache in step with password
+    changes made by any worker; revocation takes at most one poll interval.
+    """
+    while True:
+        try:
+            await run_in_threadpool(refresh_principal_cache)
+        except Exception as e:
+            # A failed poll can't vouch for the cache any more
+            principal_cache.clear()
+            print(f"Users version poll failed: {e}")
+        await asyncio.sleep(PRINCIPAL_CACHE_POLL_SECONDS)
+
+def _load_principal(email: str):
+    db = SessionLocal()
+    try:
+        user = crud.get_user_by_email(db, email=email)
+        return schemas.CurrentUser.model_validate(user) if user else None
+    finally:
+        db.close()
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -39,10 +157,20 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = schemas.TokenData(email=email)
-    except JWTError:
+        # Tokens issued before versioning carry no claim and count as version 0
+        token_data = schemas.TokenData(email=email, token_version=payload.get("ver", 0))
+    except (JWTError, ValueError):
         raise credentials_exception
-    user = crud.get_user_by_email(db, email=token_data.email)
-    if user is None:
+
+    user = principal_cache.get(token_data.email)
+    if user is None or token_data.token_version > user.token_version:
+        # Miss, or a token newer than the cached entry
+        users_version = principal_cache.users_version
+        user = await run_in_threadpool(_load_principal, token_data.email)
+        if user is None:
+            raise credentials_exception
+        principal_cache.set(token_data.email, user, users_version)
+
+    if token_data.token_version != user.token_version:
         raise credentials_exception
     return user
@@ -0,0 +1,77 @@
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from datetime import date
+import hashlib
+import os
+import crud
+from database import SessionLocal
+
+# Set to false to serve every GET in full (no ETag / 304 handling)
+ETAG_ENABLED = os.getenv("ETAG_ENABLED", "true").lower() in ("1", "true", "yes")
+
+def etag(*domains: str):
+    """
+    Marks a GET endpoint as cacheable by ETag: its response only changes when one of
+    `domains` is written (see crud.bump_data_version) or the day rolls over.
+    Takes effect on routers built with route_class=ETagRoute.
+
+        @router.get("/")
+        @etag("products", "sales")
+        def read_products(...): ...
+    """
+    def decorator(endpoint):
+        endpoint.etag_domains = tuple(sorted(set(domains)))
+        return endpoint
+    return decorator
+
+def _current_etag(domains, scope):
+    db = SessionLocal()
+    try:
+        version = crud.get_data_version(db, *domains)
+    finally:
+        db.close()
+    # Date-relative endpoints (dashboard, history) change at midnight without a write
+    key = "|".join([
+        scope["path"], scope.get("query_string", b"").decode("latin-1"),
+        ",".join(domains), str(version), date.today().isoformat()
+    ])
+    return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+def _matches(if_none_match: str, tag: str):
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    return "*" in candidates or any(t.removeprefix("W/") == tag for t in candidates)
+
+class ETagRoute(APIRoute):
+    """
+    Route class that gives endpoints marked with @etag conditional GETs; a router opts in with
+    APIRouter(route_class=ETagRoute). The tag comes from the domains' version counters and is
+    read before dependencies or the handler run, so a matching If-None-Match is answered with
+    304 without resolving dependencies, running the query or serializing anything.
+    A write that lands mid-request only makes the tag stale (the next request refetches),
+    never the body.
+    """
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        domains = getattr(self.endpoint, "etag_domains", None)
+        if domains is None:
+            return handler
+
+        async def etag_handler(request: Request):
+            if not ETAG_ENABLED or request.method not in ("GET", "HEAD"):
+                return await handler(request)
+
+            tag = await run_in_threadpool(_current_etag, domains, request.scope)
+            cache_headers = {"ETag": tag, "Cache-Control": "private, no-cache"}
+
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match and _matches(if_none_match, tag):
+                return Response(status_code=304, headers=cache_headers)
+
+            response = await handler(request)
+            if response.status_code == 200:
+                response.headers.update(cache_headers)
+            return response
+
+        return etag_handler
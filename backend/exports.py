@@ -0,0 +1,184 @@
+"""
+Streaming writers for report exports.
+
+Each writer takes an iterator of rows and yields encoded bytes as soon as they
+are produced, so a response can be sent while rows are still being read and
+memory stays flat however long the date range is.
+"""
+import csv
+import io
+import json
+import zlib
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+FIELDS = ["date", "revenue", "cogs", "ad_spend", "expenses", "net_profit"]
+HEADER = ["Date", "Revenue", "COGS", "Ad Spend", "Expenses", "Net Profit"]
+
+def _money(value):
+    return f"£{value:.2f}"
+
+def format_row(row):
+    return [str(row["date"])] + [_money(row[f]) for f in FIELDS[1:]]
+
+def stream_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return data.encode("utf-8")
+
+    writer.writerow(FIELDS)
+    yield flush()
+
+    totals = {f: 0.0 for f in FIELDS[1:]}
+    for row in rows:
+        for f in totals:
+            totals[f] += row[f]
+        writer.writerow([row["date"]] + [round(row[f], 2) for f in FIELDS[1:]])
+        yield flush()
+
+    writer.writerow(["TOTAL"] + [round(totals[f], 2) for f in FIELDS[1:]])
+    yield flush()
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield (json.dumps(row, default=str) + "\n").encode("utf-8")
+
+# --- PDF ---
+#
+# ReportLab only writes a document once it is complete, so the table is emitted
+# with a minimal PDF writer instead: each page is written as soon as it fills up
+# and only object offsets and page ids are kept for the trailing xref.
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+MARGIN = inch
+ROW_HEIGHT = 18
+FONT_SIZE = 10
+TITLE_SIZE = 18
+
+# Fixed objects: 1 catalog, 2 page tree (written last), 3/4 fonts
+CATALOG, PAGES, FONT, FONT_BOLD = 1, 2, 3, 4
+
+def _pdf_text(text):
+    encoded = text.encode("cp1252", "replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def _rgb(color):
+    return " ".join(f"{c:.3f}" for c in color.rgb()).encode()
+
+class _PdfWriter:
+    def __init__(self):
+        self.offset = 0
+        self.xref = {}
+        self.next_id = FONT_BOLD + 1
+
+    def raw(self, data: bytes):
+        self.offset += len(data)
+        return data
+
+    def obj(self, obj_id: int, body: bytes):
+        self.xref[obj_id] = self.offset
+        return self.raw(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    def stream(self, obj_id: int, content: bytes):
+        content = zlib.compress(content)
+        return self.obj(obj_id, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    def allocate(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+class _Page:
+    def __init__(self, col_widths):
+        self.ops = []
+        self.col_widths = col_widths
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def text(self, x, y, text, font=b"/F1", size=FONT_SIZE, fill=colors.black):
+        self.ops.append(b"BT %s rg %s %d Tf %.2f %.2f Td (%s) Tj ET" % (_rgb(fill), font, size, x, y, _pdf_text(text)))
+
+    def title(self, text):
+        self.y -= TITLE_SIZE
+        width = stringWidth(text, "Helvetica-Bold", TITLE_SIZE)
+        self.text((PAGE_WIDTH - width) / 2, self.y, text, font=b"/F2", size=TITLE_SIZE)
+        self.y -= 12 + TITLE_SIZE / 2
+
+    def row(self, cells, background=None, bold=False, fill=colors.black):
+        self.y -= ROW_HEIGHT
+        x = MARGIN
+        font_name = "Helvetica-Bold" if bold else "Helvetica"
+        for width, cell in zip(self.col_widths, cells):
+            if background is not None:
+                self.ops.append(b"%s rg %.2f %.2f %.2f %d re f" % (_rgb(background), x, self.y, width, ROW_HEIGHT))
+            self.ops.append(b"0 0 0 RG 1 w %.2f %.2f %.2f %d re S" % (x, self.y, width, ROW_HEIGHT))
+            text_x = x + (width - stringWidth(cell, font_name, FONT_SIZE)) / 2
+            self.text(text_x, self.y + 5, cell, font=b"/F2" if bold else b"/F1", fill=fill)
+            x += width
+
+    def has_room(self):
+        return self.y - ROW_HEIGHT >= MARGIN
+
+    def content(self):
+        return b"\n".join(self.ops)
+
+def stream_pdf(rows, title):
+    writer = _PdfWriter()
+    col_widths = [(PAGE_WIDTH - 2 * MARGIN) / len(HEADER)] * len(HEADER)
+    page_ids = []
+
+    yield writer.raw(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    yield writer.obj(CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES)
+    yield writer.obj(FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    yield writer.obj(FONT_BOLD, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    def new_page(first=False):
+        page = _Page(col_widths)
+        if first:
+            page.title(title)
+        page.row(HEADER, background=colors.grey, bold=True, fill=colors.whitesmoke)
+        return page
+
+    def emit(page):
+        content_id, page_id = writer.allocate(), writer.allocate()
+        page_ids.append(page_id)
+        return writer.stream(content_id, page.content()) + writer.obj(page_id, (
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+        ) % (PAGES, PAGE_WIDTH, PAGE_HEIGHT, FONT, FONT_BOLD, content_id))
+
+    page = new_page(first=True)
+    total_revenue = 0.0
+    total_net_profit = 0.0
+
+    for row in rows:
+        if not page.has_room():
+            yield emit(page)
+            page = new_page()
+        total_revenue += row["revenue"]
+        total_net_profit += row["net_profit"]
+        page.row(format_row(row))
+
+    # Totals Row
+    if not page.has_room():
+        yield emit(page)
+        page = new_page()
+    page.row(["TOTAL", _money(total_revenue), "", "", "", _money(total_net_profit)], background=colors.beige)
+    yield emit(page)
+
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    yield writer.obj(PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids)))
+
+    xref_offset = writer.offset
+    size = writer.next_id
+    entries = [b"0000000000 65535 f \n"]
+    for obj_id in range(1, size):
+        entries.append(b"%010d 00000 n \n" % writer.xref[obj_id])
+    yield writer.raw(b"xref\n0 %d\n" % size + b"".join(entries))
+    yield writer.raw(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, CATALOG, xref_offset))
@@ -2,11 +2,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 from sqlalchemy.orm import Session
-from database import SessionLocal, engine
+from database import SessionLocal, engine, async_engine, get_pool_status
 import models
 import crud
 import schemas
 from routers import auth, products, inventory, reports, sales, expenses, owners, stats, agent
+from agent.core import get_agent_executor
+from agent.history import prune_chat_history_periodically
+from dependencies import watch_users_version
+import asyncio
 import os
 
 # Initialize Tables
@@ -18,16 +22,95 @@ with engine.connect() as conn:
         conn.execute(text("ALTER TABLE products ADD COLUMN IF NOT EXISTS price FLOAT DEFAULT 0.0"))
         conn.execute(text("ALTER TABLE products ADD COLUMN IF NOT EXISTS cost_price FLOAT DEFAULT 0.0"))
         conn.execute(text("ALTER TABLE products ADD COLUMN IF NOT EXISTS product_url VARCHAR"))
+        conn.execute(text("ALTER TABLE products ADD COLUMN IF NOT EXISTS total_sold INTEGER"))
+        conn.execute(text("ALTER TABLE products ADD COLUMN IF NOT EXISTS total_revenue FLOAT"))
+        conn.execute(text("ALTER TABLE products ADD COLUMN IF NOT EXISTS last_sold_at DATE"))
         conn.execute(text("ALTER TABLE expenses ADD COLUMN IF NOT EXISTS paid_by_id INTEGER REFERENCES owners(id)"))
         conn.execute(text("CREATE TABLE IF NOT EXISTS users (id SERIAL PRIMARY KEY, email VARCHAR UNIQUE, hashed_password VARCHAR)"))
+        conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_expenses_date_id ON expenses (date, id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_owner_ledger_type_date_id ON owner_ledger (transaction_type, date, id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_owner_ledger_owner_type_date ON owner_ledger (owner_id, transaction_type, date)"))
+        conn.execute(text("ALTER TABLE chat_history ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT now()"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_chat_history_session_id_id ON chat_history (session_id, id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_chat_history_created_at ON chat_history (created_at)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_products_current_stock ON products (current_stock)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sales_product_id ON sales (product_id)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_inventory_batches_product_date_id ON inventory_batches (product_id, date_added, id)"))
         conn.commit()
     except Exception as e:
         print(f"Migration check failed (safe if column exists): {e}")
 
+# Data version counters moved from one row per domain to (domain, slot) rows; existing counts become slot 0
+with engine.connect() as conn:
+    try:
+        has_slot = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = 'data_versions' AND column_name = 'slot'"
+        )).first()
+        if not has_slot:
+            conn.execute(text("ALTER TABLE data_versions ADD COLUMN slot INTEGER NOT NULL DEFAULT 0"))
+            conn.execute(text("ALTER TABLE data_versions DROP CONSTRAINT data_versions_pkey"))
+            conn.execute(text("ALTER TABLE data_versions ADD PRIMARY KEY (domain, slot)"))
+        conn.commit()
+    except Exception as e:
+        print(f"Data version slot migration failed: {e}")
+
+# Daily financials moved from one row per date to (date, product) rows; existing rows become the
+# date's day-level row (product 0), which keeps every day's sums unchanged
+with engine.connect() as conn:
+    try:
+        has_product = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = 'daily_financials' AND column_name = 'product_id'"
+        )).first()
+        if not has_product:
+            conn.execute(text("ALTER TABLE daily_financials ADD COLUMN product_id INTEGER NOT NULL DEFAULT 0"))
+            conn.execute(text("DROP INDEX IF EXISTS ix_daily_financials_date"))
+            conn.execute(text("CREATE INDEX ix_daily_financials_date ON daily_financials (date)"))
+            conn.execute(text(
+                "ALTER TABLE daily_financials ADD CONSTRAINT uq_daily_financials_date_product UNIQUE (date, product_id)"
+            ))
+        conn.commit()
+    except Exception as e:
+        print(f"Daily financials per-product migration failed: {e}")
+
+# Prefix search on lower(name/sku); expression indexes with Postgres opclasses, so kept apart
+with engine.connect() as conn:
+    try:
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_products_name_lower ON products (lower(name) text_pattern_ops)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_products_sku_lower ON products (lower(sku) text_pattern_ops)"))
+        conn.commit()
+    except Exception as e:
+        print(f"Product prefix-search indexes skipped: {e}")
+
+# Full-text search over expenses (kept in sync by Postgres); Postgres-only DDL, so kept apart
+with engine.connect() as conn:
+    try:
+        conn.execute(text(
+            "ALTER TABLE expenses ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS "
+            "(to_tsvector('english', coalesce(description, '') || ' ' || coalesce(category, ''))) STORED"
+        ))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_expenses_search_vector ON expenses USING gin (search_vector)"))
+        conn.commit()
+    except Exception as e:
+        print(f"Expense full-text search column skipped: {e}")
+
+# Trigram indexes for substring search; needs the pg_trgm extension, so kept apart
+with engine.connect() as conn:
+    try:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_products_sku_trgm ON products USING gin (sku gin_trgm_ops)"))
+        conn.commit()
+    except Exception as e:
+        print(f"Trigram indexes skipped (pg_trgm unavailable): {e}")
+
 # Run Backfill and Seeding
 try:
     db = SessionLocal()
     crud.backfill_expense_owners(db)
+    crud.backfill_daily_financials(db)
+    crud.backfill_owner_balances(db)
+    crud.backfill_product_sales_counters(db)
     
     # Seed Users
     users_to_seed = [
@@ -62,6 +145,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def warm_agent():
+    # Build the shared agent now so the first /agent/chat doesn't pay for it
+    try:
+        if get_agent_executor():
+            print("Agent ready")
+    except Exception as e:
+        print(f"Agent warm-up failed (will retry on first request): {e}")
+
+# Long-running per-worker tasks, cancelled at shutdown
+background_tasks = []
+
+@app.on_event("startup")
+async def start_background_tasks():
+    background_tasks.append(asyncio.create_task(watch_users_version()))
+    # Also covers the first prune, off the startup path
+    background_tasks.append(asyncio.create_task(prune_chat_history_periodically()))
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    # asyncpg connections belong to this event loop; close them with it
+    await async_engine.dispose()
+
 # Include Routers
 app.include_router(auth.router)
 app.include_router(products.router, prefix="/products", tags=["products"])
@@ -90,3 +203,8 @@ def health_check():
         # Return 503 manually or via HTTPException
         from fastapi import HTTPException
         raise HTTPException(status_code=503, detail=f"Database connection failed: {e}")
+
+@app.get("/health/pool")
+def pool_health():
+    # Per-worker numbers: sum across workers to size against Postgres max_connections
+    return get_pool_status()
@@ -8,4 +8,9 @@ from .expense import Expense
 from .owner import Owner
 from .product_equity import ProductEquity
 from .owner_ledger import OwnerLedger
+from .owner_balance import OwnerBalance, OwnerBalanceCheckpoint
+from .profit_distribution import ProfitDistribution
 from .user import User
+from .daily_financials import DailyFinancials
+from .data_version import DataVersion
+from .chat_history import ChatHistory
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, Text, DateTime, Index
+from database import Base
+from datetime import datetime
+
+class ChatHistory(Base):
+    # Same layout LangChain's SQLChatMessageHistory used, plus created_at for expiry
+    __tablename__ = "chat_history"
+    __table_args__ = (
+        Index("ix_chat_history_session_id_id", "session_id", "id"), # Latest-N window per session
+    )
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(Text)
+    message = Column(Text) # JSON from langchain message_to_dict
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, Float, Date, UniqueConstraint
+from database import Base
+
+# Rollup row for a date's ad spend and expenses, which belong to no product
+DAY_LEVEL_PRODUCT_ID = 0
+
+class DailyFinancials(Base):
+    """
+    P&L rollup per (date, product): sales land on their product's row, ad spend and expenses
+    on the DAY_LEVEL_PRODUCT_ID row. A day's figures are the sum of its rows, so sales of
+    different SKUs on the same day never update the same row.
+    """
+    __tablename__ = "daily_financials"
+    __table_args__ = (UniqueConstraint("date", "product_id", name="uq_daily_financials_date_product"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(Date, index=True)
+    product_id = Column(Integer, nullable=False, default=DAY_LEVEL_PRODUCT_ID)
+    revenue = Column(Float, default=0.0)
+    cogs = Column(Float, default=0.0)
+    ad_spend = Column(Float, default=0.0)
+    expenses = Column(Float, default=0.0)
+    net_profit = Column(Float, default=0.0) # revenue - cogs - ad_spend - expenses
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from database import Base
+
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    domain = Column(String, primary_key=True) # products, inventory, sales, reports, expenses, owners, ledger, equity, users
+    # A domain's counter is spread over slots so concurrent writers rarely update the same row;
+    # its version is the sum over its slots
+    slot = Column(Integer, primary_key=True, default=0)
+    version = Column(Integer, nullable=False, default=0)
@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        Index("ix_expenses_date_id", "date", "id"), # Keyset pagination
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date)
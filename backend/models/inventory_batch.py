@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
 
 class InventoryBatch(Base):
     __tablename__ = "inventory_batches"
+    __table_args__ = (
+        Index("ix_inventory_batches_product_date_id", "product_id", "date_added", "id"), # Per-product batch pages
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
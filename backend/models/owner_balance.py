@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, UniqueConstraint
+from database import Base
+
+class OwnerBalance(Base):
+    """
+    Running total of an owner's ledger per transaction type, kept current on every ledger insert.
+    """
+    __tablename__ = "owner_balances"
+    __table_args__ = (
+        UniqueConstraint("owner_id", "transaction_type", name="uq_owner_balances_owner_type"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("owners.id"), nullable=False)
+    transaction_type = Column(String, nullable=False)
+    balance = Column(Float, nullable=False, default=0.0)
+    entry_count = Column(Integer, nullable=False, default=0)
+
+class OwnerBalanceCheckpoint(Base):
+    """
+    Balance of all ledger entries of one owner and type dated at or before `as_of`.
+    Written every LEDGER_CHECKPOINT_INTERVAL entries; as-of lookups start from the nearest one.
+    """
+    __tablename__ = "owner_balance_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("owner_id", "transaction_type", "as_of", name="uq_owner_balance_checkpoints_owner_type_as_of"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("owners.id"), nullable=False)
+    transaction_type = Column(String, nullable=False)
+    as_of = Column(DateTime, nullable=False)
+    balance = Column(Float, nullable=False, default=0.0)
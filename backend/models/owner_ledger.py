@@ -1,15 +1,19 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
 
 class OwnerLedger(Base):
     __tablename__ = "owner_ledger"
+    __table_args__ = (
+        Index("ix_owner_ledger_type_date_id", "transaction_type", "date", "id"), # Keyset pagination of payouts
+        Index("ix_owner_ledger_owner_type_date", "owner_id", "transaction_type", "date"), # As-of balances after a checkpoint
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     owner_id = Column(Integer, ForeignKey("owners.id"))
     amount = Column(Float)
-    transaction_type = Column(String) # PROFIT_SHARE, WITHDRAWAL
+    transaction_type = Column(String) # PROFIT_SHARE, WITHDRAWAL, PAYOUT
     date = Column(DateTime, default=datetime.utcnow)
 
     owner = relationship("Owner", back_populates="ledger_entries")
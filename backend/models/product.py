@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, Date, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_current_stock", "current_stock"), # Low-stock lookups
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -13,6 +16,11 @@ class Product(Base):
     current_stock = Column(Integer, default=0)
     product_url = Column(String, nullable=True)
 
+    # Lifetime sales counters, kept in step by the sale paths (NULL until backfilled)
+    total_sold = Column(Integer, default=0)
+    total_revenue = Column(Float, default=0.0)
+    last_sold_at = Column(Date, nullable=True) # Date of the latest report with a sale
+
     batches = relationship("InventoryBatch", back_populates="product")
     sales = relationship("Sale", back_populates="product")
     equities = relationship("ProductEquity", back_populates="product")
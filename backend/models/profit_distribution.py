@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime
+from database import Base
+from datetime import datetime
+
+class ProfitDistribution(Base):
+    """
+    A daily report whose profit has been written to the owner ledger.
+    The unique report_id makes distribution idempotent, even for concurrent runs.
+    """
+    __tablename__ = "profit_distributions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    report_id = Column(Integer, ForeignKey("daily_reports.id"), unique=True, nullable=False)
+    distributed_at = Column(DateTime, default=datetime.utcnow)
+    amount = Column(Float, default=0.0) # Net amount written to the ledger
+    entry_count = Column(Integer, default=0)
@@ -7,7 +7,7 @@ class Sale(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     report_id = Column(Integer, ForeignKey("daily_reports.id"))
-    product_id = Column(Integer, ForeignKey("products.id"))
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
     quantity = Column(Integer)
     selling_price = Column(Float)
     calculated_cogs = Column(Float) # Stores the cost calculated at time of sale (FIFO)
@@ -7,3 +7,5 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
+    # Bumped on password change; tokens carrying an older value are rejected
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
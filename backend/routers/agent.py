@@ -1,6 +1,13 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from agent.core import get_agent_executor
+from agent.tools import tool_cache
+from agent.executor import tool_timings
+from collections import deque
+import threading
+import json
+import time
 import os
 
 router = APIRouter()
@@ -39,3 +46,109 @@ def chat_with_agent(request: ChatRequest):
         # In production, log the full error
         print(f"Agent Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+class StreamLatency:
+    """
+    Recent streaming chats: time to first answer token vs. total time, in ms.
+    """
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._ttfb = deque(maxlen=window)
+        self._total = deque(maxlen=window)
+
+    def record(self, ttfb: Optional[float], total: float):
+        with self._lock:
+            if ttfb is not None:
+                self._ttfb.append(ttfb)
+            self._total.append(total)
+
+    def snapshot(self):
+        with self._lock:
+            def pcts(values):
+                values = sorted(values)
+                def pct(p):
+                    return values[min(len(values) - 1, int(p * len(values)))] * 1000 if values else 0.0
+                return {"count": len(values), "p50": pct(0.50), "p95": pct(0.95), "max": pct(1.0)}
+            return {"ttfb_ms": pcts(self._ttfb), "total_ms": pcts(self._total)}
+
+stream_latency = StreamLatency()
+
+TOOL_OUTPUT_PREVIEW = 500 # chars of a tool result echoed to the client
+
+def _sse(event: str, data: dict):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _chunk_text(chunk):
+    # Gemini chunks carry either a string or a list of content parts
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+async def _stream_chat(agent_runnable, query: str, session_id: str):
+    start = time.perf_counter()
+    ttfb = None
+    yield _sse("session", {"session_id": session_id})
+    try:
+        async for event in agent_runnable.astream_events(
+            {"input": query},
+            config={"configurable": {"session_id": session_id}},
+            version="v2"
+        ):
+            kind = event["event"]
+            if kind == "on_chat_model_stream":
+                text = _chunk_text(event["data"]["chunk"])
+                if not text:
+                    continue # tool-call chunks carry no text
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+                yield _sse("token", {"text": text})
+            elif kind == "on_tool_start":
+                yield _sse("tool_start", {"name": event["name"], "input": event["data"].get("input")})
+            elif kind == "on_tool_end":
+                output = str(event["data"].get("output"))
+                yield _sse("tool_end", {"name": event["name"], "output": output[:TOOL_OUTPUT_PREVIEW]})
+    except Exception as e:
+        # In production, log the full error
+        print(f"Agent Error: {e}")
+        yield _sse("error", {"detail": str(e)})
+
+    total = time.perf_counter() - start
+    stream_latency.record(ttfb, total)
+    yield _sse("done", {
+        "session_id": session_id,
+        "ttfb_ms": round(ttfb * 1000, 1) if ttfb is not None else None,
+        "total_ms": round(total * 1000, 1)
+    })
+
+@router.post("/chat/stream")
+def chat_with_agent_stream(request: ChatRequest):
+    """
+    Server-Sent Events version of /chat: tool_start/tool_end as tools run,
+    token events as the answer is generated, then done (with ttfb_ms and total_ms).
+    """
+    if not os.getenv("GOOGLE_API_KEY"):
+         raise HTTPException(status_code=503, detail="Google API Key not configured")
+
+    agent_runnable = get_agent_executor()
+    if not agent_runnable:
+        raise HTTPException(status_code=503, detail="Agent initialization failed")
+
+    session_id = request.session_id or str(uuid.uuid4())
+    return StreamingResponse(
+        _stream_chat(agent_runnable, request.query, session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stream-stats")
+def read_stream_stats():
+    return stream_latency.snapshot()
+
+@router.get("/cache-stats")
+def read_tool_cache_stats():
+    return tool_cache.stats()
+
+@router.get("/tool-stats")
+def read_tool_timing_stats():
+    return tool_timings.snapshot()
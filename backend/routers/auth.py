@@ -1,22 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import crud
 import schemas
-from dependencies import get_db, create_access_token, get_current_user
+from dependencies import get_db, get_current_user, issue_access_token, principal_cache
 
 router = APIRouter()
 
 @router.post("/token", response_model=schemas.Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, form_data.username)
-    if not user or not crud.verify_password(form_data.password, user.hashed_password):
+    # Keep the event loop free: DB work on the threadpool, bcrypt on its own bounded pool
+    user = await run_in_threadpool(crud.get_user_by_email, db, form_data.username)
+    if not user or not await crud.verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = issue_access_token(user)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/users/me", response_model=schemas.User)
@@ -30,8 +32,15 @@ async def change_password(
     db: Session = Depends(get_db)
 ):
     # Verify old password
-    if not crud.verify_password(password_data.old_password, current_user.hashed_password):
+    if not await crud.verify_password_async(password_data.old_password, current_user.hashed_password):
          raise HTTPException(status_code=400, detail="Incorrect old password")
     
-    crud.update_user_password(db, current_user.email, password_data.new_password)
-    return {"message": "Password updated successfully"}
+    hashed_password = await crud.get_password_hash_async(password_data.new_password)
+    user = await run_in_threadpool(crud.set_user_password_hash, db, current_user.email, hashed_password)
+    # Old tokens stop working now; hand back one for the new password
+    principal_cache.invalidate(current_user.email)
+    return {
+        "message": "Password updated successfully",
+        "access_token": issue_access_token(user),
+        "token_type": "bearer"
+    }
@@ -1,16 +1,47 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
+from datetime import date
 import crud
 import schemas
 from dependencies import get_db
+from etag import etag, ETagRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ETagRoute)
 
 @router.post("/", response_model=schemas.Expense)
 def create_expense(expense: schemas.ExpenseCreate, db: Session = Depends(get_db)):
     return crud.create_expense(db, expense)
 
-@router.get("/", response_model=List[schemas.Expense])
-def read_expenses(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/search", response_model=schemas.Page[schemas.Expense])
+@etag("expenses", "owners")
+def search_expenses(
+    q: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    category: Optional[str] = None,
+    paid_by_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=crud.MAX_PAGE_LIMIT),
+    db: Session = Depends(get_db)
+):
+    """
+    Ranked full-text search over description and category, best matches first.
+    Follow `next_cursor` for more results.
+    """
+    items, next_cursor = crud.search_expenses(
+        db, q, start_date=start, end_date=end, category=category,
+        paid_by_id=paid_by_id, cursor=cursor, limit=limit
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/", response_model=Union[schemas.Page[schemas.Expense], List[schemas.Expense]])
+@etag("expenses", "owners")
+def read_expenses(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=crud.MAX_PAGE_LIMIT), cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Pass `cursor` (empty for the first page) to get keyset pages with a `next_cursor`.
+    """
+    if cursor is not None:
+        items, next_cursor = crud.get_expenses_page(db, cursor=cursor, limit=limit)
+        return {"items": items, "next_cursor": next_cursor}
     return crud.get_expenses(db, skip=skip, limit=limit)
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
+from datetime import datetime
 import models
 import crud
 import schemas
 from dependencies import get_db
+from etag import etag, ETagRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ETagRoute)
 
 @router.post("/", response_model=schemas.Owner)
 def create_owner(owner: schemas.OwnerCreate, db: Session = Depends(get_db)):
@@ -16,11 +18,24 @@ def create_owner(owner: schemas.OwnerCreate, db: Session = Depends(get_db)):
 def create_owner_payment(payment: schemas.OwnerPaymentCreate, db: Session = Depends(get_db)):
     return crud.create_owner_payment(db=db, payment=payment)
 
-@router.get("/payments", response_model=List[schemas.OwnerLedger])
-def read_owner_payments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/payments", response_model=Union[schemas.Page[schemas.OwnerLedger], List[schemas.OwnerLedger]])
+@etag("ledger", "owners")
+def read_owner_payments(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=crud.MAX_PAGE_LIMIT), cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Pass `cursor` (empty for the first page) to get keyset pages with a `next_cursor`.
+    """
+    if cursor is not None:
+        items, next_cursor = crud.get_owner_payments_page(db, cursor=cursor, limit=limit)
+        return {"items": items, "next_cursor": next_cursor}
     return crud.get_owner_payments(db, skip=skip, limit=limit)
 
+@router.get("/balances", response_model=List[schemas.OwnerBalance])
+@etag("ledger", "owners")
+def read_owner_balances(db: Session = Depends(get_db)):
+    return crud.get_owner_balances(db)
+
 @router.get("/", response_model=List[schemas.Owner])
+@etag("owners")
 def read_owners(db: Session = Depends(get_db)):
     return db.query(models.Owner).all()
 
@@ -29,6 +44,10 @@ def set_owner_product_equity(owner_id: int, equity: schemas.ProductEquityCreate,
     return crud.set_product_equity(db, owner_id, equity)
 
 @router.get("/{owner_id}/balance")
-def get_balance(owner_id: int, db: Session = Depends(get_db)):
-    balance = crud.get_owner_balance(db, owner_id)
+@etag("ledger")
+def get_balance(owner_id: int, as_of: Optional[datetime] = None, db: Session = Depends(get_db)):
+    """
+    Pass `as_of` for the balance of entries dated at or before it.
+    """
+    balance = crud.get_owner_balance(db, owner_id, as_of=as_of)
     return {"owner_id": owner_id, "balance": balance}
@@ -1,11 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 import crud
 import schemas
 from dependencies import get_db
+from etag import etag, ETagRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ETagRoute)
 
 @router.post("/", response_model=schemas.Product)
 def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)):
@@ -14,7 +15,35 @@ def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)
         raise HTTPException(status_code=400, detail="Product with this SKU already exists")
     return crud.create_product(db=db, product=product)
 
-@router.get("/", response_model=List[schemas.Product])
-def read_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    products = crud.get_products(db, skip=skip, limit=limit)
-    return products
+@router.get("/search", response_model=List[schemas.ProductStock])
+@etag("products")
+def search_products(q: str, limit: int = Query(20, ge=1, le=crud.MAX_PAGE_LIMIT), db: Session = Depends(get_db)):
+    return crud.search_products(db, q, limit=limit)
+
+@router.get("/low-stock", response_model=List[schemas.ProductStock])
+@etag("products")
+def read_low_stock(threshold: int = 10, limit: int = Query(100, ge=1, le=crud.MAX_PAGE_LIMIT), db: Session = Depends(get_db)):
+    return crud.get_low_stock_products(db, threshold=threshold, limit=limit)
+
+@router.get("/", response_model=Union[schemas.Page[schemas.Product], List[schemas.Product]])
+@etag("products", "sales", "owners")
+def read_products(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=crud.MAX_PAGE_LIMIT), cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Pass `cursor` (empty for the first page) to get keyset pages with a `next_cursor`.
+    """
+    # Plain def: hydrating products and equities is CPU work, which belongs in the threadpool
+    if cursor is not None:
+        items, next_cursor = crud.get_products_page(db, cursor=cursor, limit=limit)
+        return {"items": items, "next_cursor": next_cursor}
+    return crud.get_products(db, skip=skip, limit=limit)
+
+@router.get("/{product_id}/batches", response_model=schemas.Page[schemas.InventoryBatch])
+@etag("inventory")
+def read_product_batches(product_id: int, cursor: Optional[str] = None, limit: int = Query(50, ge=1, le=crud.MAX_PAGE_LIMIT), live_only: bool = False, db: Session = Depends(get_db)):
+    """
+    Inventory batches for one product, newest first, in keyset pages.
+    """
+    if not crud.get_product(db, product_id):
+        raise HTTPException(status_code=404, detail="Product not found")
+    items, next_cursor = crud.get_product_batches_page(db, product_id, cursor=cursor, limit=limit, live_only=live_only)
+    return {"items": items, "next_cursor": next_cursor}
@@ -1,19 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 from datetime import date
 from fastapi.responses import StreamingResponse
-import io
-import models
 import crud
 import schemas
+import exports
+from database import SessionLocal
 from dependencies import get_db
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+from etag import etag, ETagRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ETagRoute)
 
 @router.post("/", response_model=schemas.DailyReport)
 def create_report(report: schemas.DailyReportCreate, db: Session = Depends(get_db)):
@@ -22,105 +19,79 @@ def create_report(report: schemas.DailyReportCreate, db: Session = Depends(get_d
         raise HTTPException(status_code=400, detail="A report for this date already exists.")
     return crud.create_daily_report(db, report)
 
-@router.get("/", response_model=List[schemas.DailyReport])
-def read_reports(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    reports = db.query(models.DailyReport).order_by(models.DailyReport.date.desc()).offset(skip).limit(limit).all()
-    
-    # Calculate Net Profit dynamically for each report
-    results = []
+def _attach_net_profit(db: Session, reports):
+    # Net Profit for the whole page in one grouped query
+    dates = [r.date for r in reports]
+    net_by_date = {
+        row["date"]: row["net_profit"] for row in crud.get_pnl_buckets(db, min(dates), max(dates))
+    } if dates else {}
+
     for report in reports:
-        revenue = sum(s.selling_price * s.quantity for s in report.sales)
-        cogs = sum(s.calculated_cogs for s in report.sales)
-        
-        # Expenses for this specific date
-        expenses_records = db.query(models.Expense).filter(models.Expense.date == report.date).all()
-        day_expenses = sum(e.amount for e in expenses_records)
-        
-        # Net Profit = (Revenue - COGS) - Ad Spend - Daily Expenses
-        net_profit = (revenue - cogs) - report.total_ad_spend - day_expenses
-        
         # Attach to object (Pydantic will serialize it)
-        report.net_profit = round(net_profit, 2)
-        results.append(report)
-        
-    return results
+        report.net_profit = round(net_by_date.get(report.date, 0.0), 2)
+    return reports
 
-@router.get("/export/pdf")
-def export_reports_pdf(start_date: date, end_date: date, db: Session = Depends(get_db)):
-    # Fetch reports in range
-    reports = db.query(models.DailyReport).filter(
-        models.DailyReport.date >= start_date,
-        models.DailyReport.date <= end_date
-    ).order_by(models.DailyReport.date.desc()).all()
-    
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    title = Paragraph(f"Daily Reports ({start_date} to {end_date})", styles['Title'])
-    elements.append(title)
-    elements.append(Spacer(1, 12))
-    
-    # Table Data
-    data = [["Date", "Revenue", "COGS", "Ad Spend", "Expenses", "Net Profit"]]
-    
-    total_revenue = 0
-    total_net_profit = 0
-    
-    for report in reports:
-        # Calculate calculated fields
-        revenue = sum(s.selling_price * s.quantity for s in report.sales)
-        cogs = sum(s.calculated_cogs for s in report.sales)
-        
-        # Get expenses for this day
-        expenses_records = db.query(models.Expense).filter(models.Expense.date == report.date).all()
-        day_expenses = sum(e.amount for e in expenses_records)
-        
-        net_profit = (revenue - cogs) - report.total_ad_spend - day_expenses
-        
-        total_revenue += revenue
-        total_net_profit += net_profit
-        
-        data.append([
-            str(report.date),
-            f"£{revenue:.2f}",
-            f"£{cogs:.2f}",
-            f"£{report.total_ad_spend:.2f}",
-            f"£{day_expenses:.2f}",
-            f"£{net_profit:.2f}"
-        ])
-    
-    # Totals Row
-    data.append([
-        "TOTAL",
-        f"£{total_revenue:.2f}",
-        "",
-        "",
-        "",
-        f"£{total_net_profit:.2f}"
-    ])
-    
-    # Table Style
-    table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    
-    elements.append(table)
-    doc.build(elements)
-    
-    buffer.seek(0)
-    return StreamingResponse(buffer, media_type="application/pdf", headers={"Content-Disposition": "attachment; filename=reports.pdf"})
+def _list_reports(db: Session, skip: int, limit: int):
+    return _attach_net_profit(db, crud.get_daily_reports(db, skip=skip, limit=limit))
+
+def _list_reports_page(db: Session, cursor: str, limit: int):
+    reports, next_cursor = crud.get_daily_reports_page(db, cursor=cursor, limit=limit)
+    return {"items": _attach_net_profit(db, reports), "next_cursor": next_cursor}
+
+@router.get("/", response_model=Union[schemas.Page[schemas.DailyReport], List[schemas.DailyReport]])
+@etag("reports", "sales", "expenses")
+def read_reports(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=crud.MAX_PAGE_LIMIT), cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Pass `cursor` (empty for the first page) to get keyset pages with a `next_cursor`.
+    """
+    # Plain def so the ORM work runs in the threadpool instead of blocking the event loop
+    if cursor is not None:
+        return _list_reports_page(db, cursor, limit)
+    return _list_reports(db, skip, limit)
+
+EXPORT_FORMATS = {
+    "pdf": "application/pdf",
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+def _stream_export(fmt: str, start_date: date, end_date: date):
+    # The response outlives the request dependencies, so the stream owns its session
+    db = SessionLocal()
+    try:
+        rows = crud.iter_report_financials(db, start_date, end_date)
+        if fmt == "pdf":
+            yield from exports.stream_pdf(rows, title=f"Daily Reports ({start_date} to {end_date})")
+        elif fmt == "csv":
+            yield from exports.stream_csv(rows)
+        else:
+            yield from exports.stream_ndjson(rows)
+    finally:
+        db.close()
+
+@router.get("/export/{fmt}")
+def export_reports(fmt: str, start_date: date, end_date: date):
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format. Use one of: {', '.join(EXPORT_FORMATS)}")
+
+    return StreamingResponse(
+        _stream_export(fmt, start_date, end_date),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename=reports.{fmt}"}
+    )
+
+@router.post("/profit-distribute")
+def distribute_profit_range(start: date, end: date, force: bool = False, db: Session = Depends(get_db)):
+    """
+    Distributes every report in [start, end] not distributed yet; already distributed ones are skipped.
+    Reports from before payouts were recorded are refused (409) unless force=true.
+    """
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+    return crud.distribute_profit_range(db, start, end, force=force)
 
 @router.get("/{date}", response_model=schemas.DailyReport)
+@etag("reports", "sales")
 def get_report(date: date, db: Session = Depends(get_db)):
     report = crud.get_daily_report(db, date=date)
     if not report:
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
+from typing import List
 import crud
 import schemas
 from dependencies import get_db
@@ -9,3 +10,7 @@ router = APIRouter()
 @router.post("/", response_model=schemas.Sale)
 def create_sale(sale: schemas.SaleCreate, db: Session = Depends(get_db)):
     return crud.process_sale_fifo(db, sale)
+
+@router.post("/bulk", response_model=schemas.SaleBulkResult)
+def create_sales_bulk(sales: List[schemas.SaleCreate], db: Session = Depends(get_db)):
+    return crud.process_sales_bulk(db, sales)
@@ -1,7 +1,8 @@
-from .product import Product, ProductCreate, ProductBase, ProductEquity, ProductEquityInput, ProductEquityCreate
+from .product import Product, ProductStock, ProductCreate, ProductBase, ProductEquity, ProductEquityInput, ProductEquityCreate
 from .inventory import InventoryBatch, InventoryBatchCreate
-from .sale import Sale, SaleCreate, SaleUpdate
+from .sale import Sale, SaleCreate, SaleUpdate, SaleBulkLineResult, SaleBulkResult
 from .daily_report import DailyReport, DailyReportCreate, DailyReportUpdate
 from .expense import Expense, ExpenseCreate
-from .owner import Owner, OwnerCreate, OwnerSummary, OwnerPaymentCreate, OwnerLedger
-from .user import User, UserCreate, UserLogin, Token, TokenData, ChangePassword
+from .owner import Owner, OwnerCreate, OwnerSummary, OwnerPaymentCreate, OwnerLedger, OwnerBalance
+from .user import User, UserCreate, UserLogin, CurrentUser, Token, TokenData, ChangePassword
+from .pagination import Page
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from .product import ProductEquity, ProductEquityInput, ProductEquityBase, OwnerSummary
 
@@ -37,4 +37,8 @@ class OwnerLedger(OwnerLedgerBase):
     class Config:
         from_attributes = True
 
-
+class OwnerBalance(BaseModel):
+    owner_id: int
+    name: Optional[str] = None
+    balance: float
+    by_type: Dict[str, float] # PROFIT_SHARE, WITHDRAWAL, PAYOUT running totals
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from datetime import date
 
 # Forward declare to avoid circular import issues if needed in typings
 # but here we use string forward ref usually.
@@ -40,6 +41,16 @@ class ProductEquity(ProductEquityBase):
 class ProductEquityCreate(ProductEquityBase):
     pass
 
+class ProductStock(ProductBase):
+    # Flat product row for search / low-stock lookups (no equities or sales totals)
+    id: int
+    price: float
+    cost_price: float
+    current_stock: int
+
+    class Config:
+        from_attributes = True
+
 class Product(ProductBase):
     id: int
     price: float
@@ -47,6 +58,8 @@ class Product(ProductBase):
     current_stock: int
     product_url: Optional[str] = None
     total_sold: int = 0
+    total_revenue: float = 0.0
+    last_sold_at: Optional[date] = None
     equities: List[ProductEquity] = []
 
     class Config:
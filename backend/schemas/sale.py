@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class SaleBase(BaseModel):
     product_id: int
@@ -21,3 +21,14 @@ class SaleUpdate(BaseModel):
     product_id: int
     quantity: int
     selling_price: float
+
+class SaleBulkLineResult(BaseModel):
+    index: int # Position of the line in the request
+    sale_id: Optional[int] = None
+    calculated_cogs: Optional[float] = None
+    error: Optional[str] = None
+
+class SaleBulkResult(BaseModel):
+    created: int
+    failed: int
+    results: List[SaleBulkLineResult]
@@ -16,12 +16,22 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class CurrentUser(User):
+    # Snapshot of the authenticated user, safe to share across requests
+    hashed_password: str
+    token_version: int = 0
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
 class Token(BaseModel):
     access_token: str
     token_type: str
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    token_version: int = 0
 
 class ChangePassword(BaseModel):
     old_password: str
@@ -0,0 +1,306 @@
+"""
+Offline agent benchmark: where the time goes in one /agent/chat turn.
+
+The real agent (prompt, tools, executor, windowed chat history) runs against a
+seeded database with a scripted chat model in place of Gemini, so the same
+tool calls happen on every run and no API key or network is needed. Each turn
+is split into phases:
+  - llm: time inside the (fake) model, i.e. --llm-latency-ms plus message handling
+  - tool:<name>: tool bodies, including their DB queries and the result cache
+  - history_load / history_save: reading and appending the chat window
+  - serialization:runs: LangChain's dumpd of each runnable (and its graph) for the callback
+    manager at every chain/tool/model start; the bulk of a turn with a fast model
+  - serialization:tool_messages: turning tool results into the ToolMessages the model sees
+  - serialization:reply: JSON-encoding the reply
+  - framework: everything else (prompt formatting, output parsing, runnable plumbing, callbacks)
+
+    python scripts/bench_agent.py --iterations 20
+    python scripts/bench_agent.py --json baseline.json
+    python scripts/bench_agent.py --baseline baseline.json --tolerance 0.2
+
+With --baseline the script exits non-zero when a phase's mean is more than
+--tolerance (fractional) slower than the stored one, so it can gate CI.
+"""
+import sys
+import os
+import argparse
+import json
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+# Add the parent directory (backend) to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if "--database-url" not in sys.argv:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_agent.db")
+else:
+    os.environ["DATABASE_URL"] = sys.argv[sys.argv.index("--database-url") + 1]
+os.environ["AGENT_VERBOSE"] = "false" # console output would dominate the timings
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.load import dump as lc_dump
+from langchain.agents.format_scratchpad import tools as lc_scratchpad
+
+from database import Base, engine, SessionLocal
+import crud
+import models
+import schemas
+import agent.core as core
+import agent.tools as tools
+from agent.history import WindowedChatMessageHistory
+from agent.fake_llm import ScriptedChatModel, tool_step, answer_step
+
+# One conversation: (question, model steps). The steps are what the model "decides".
+SCENARIO = [
+    ("How have sales been this month?", [
+        tool_step(("get_recent_sales_stats", {"days": 30})),
+        answer_step("Revenue is steady over the last 30 days with a healthy margin."),
+    ]),
+    ("Who is owed money, and what expenses are unsettled?", [
+        tool_step(("get_owner_balances", {}), ("get_liability_summary", {})),
+        answer_step("Both owners have positive balances and a few expenses are still unsettled."),
+    ]),
+    ("What should we reorder?", [
+        tool_step(("get_low_stock_items", {"threshold": 10})),
+        tool_step(("search_product_inventory", {"query": "serum"})),
+        answer_step("Two serums are running low; reorder them first."),
+    ]),
+    ("What did we spend on ads and who paid most?", [
+        tool_step(("search_expenses", {"query": "ads"})),
+        tool_step(("get_top_expenses", {})),
+        answer_step("Ad spend is the largest expense line and Ana paid most of it."),
+    ]),
+]
+
+def seed_database(db, days: int = 90, products: int = 20):
+    """
+    Two owners, a product catalogue with stock, `days` of reports with sales and expenses.
+    """
+    ana = crud.create_owner(db, schemas.OwnerCreate(name="Ana", equity_percentage=60))
+    ben = crud.create_owner(db, schemas.OwnerCreate(name="Ben", equity_percentage=40))
+    kinds = ["Serum", "Cleanser", "Toner", "Mask", "Lip Oil"]
+    product_ids = []
+    for i in range(products):
+        product = crud.create_product(db, schemas.ProductCreate(
+            name=f"{kinds[i % len(kinds)]} {i}", sku=f"SKU-{i:04d}", price=20.0 + i,
+            equities=[schemas.ProductEquityInput(owner_id=ana.id, equity_percentage=60),
+                      schemas.ProductEquityInput(owner_id=ben.id, equity_percentage=40)]
+        ))
+        # Leave a few products close to empty so the low-stock tool has work to do
+        stock = 5 if i % 7 == 0 else 20 * days
+        crud.create_inventory_batch(db, schemas.InventoryBatchCreate(product_id=product.id, quantity=stock, landing_price=8.0 + i / 2))
+        product_ids.append(product.id)
+
+    start = date.today() - timedelta(days=days)
+    for d in range(days):
+        day = start + timedelta(days=d)
+        report = crud.create_daily_report(db, schemas.DailyReportCreate(date=day, total_ad_spend=40.0 + d % 5))
+        crud.process_sales_bulk(db, [
+            schemas.SaleCreate(report_id=report.id, product_id=pid, quantity=1 + (d + j) % 3, selling_price=25.0)
+            for j, pid in enumerate(product_ids) if (d + j) % 4 == 0
+        ])
+        crud.create_expense(db, schemas.ExpenseCreate(
+            date=day, category="Marketing" if d % 2 else "Tools", amount=15.0 + d % 9,
+            description="TikTok ads boost" if d % 2 else "Canva subscription",
+            paid_by_id=ana.id if d % 3 else ben.id
+        ))
+
+class PhaseTimer(BaseCallbackHandler):
+    """
+    Accumulates seconds per phase for one turn from the executor's callbacks.
+    Starts are keyed by run_id, so overlapping runs don't mix.
+    """
+    def __init__(self):
+        self.phases = defaultdict(float)
+        self._starts = {}
+
+    def add(self, phase, seconds):
+        self.phases[phase] += seconds
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self.add("llm", time.perf_counter() - self._starts.pop(run_id))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._starts[run_id] = (serialized.get("name", "tool"), time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        name, started = self._starts.pop(run_id)
+        self.add(f"tool:{name}", time.perf_counter() - started)
+
+def _timed(func, phase, timer_ref):
+    depth = [0]
+    def wrapper(*args, **kwargs):
+        # Nested calls are already inside the outer one's time
+        if depth[0]:
+            return func(*args, **kwargs)
+        depth[0] += 1
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            depth[0] -= 1
+            timer_ref[0].add(phase, time.perf_counter() - started)
+    return wrapper
+
+@contextmanager
+def timed_serialization(timer_ref):
+    """
+    Times serialization where LangChain does it, by swapping in timed versions of:
+      - dumpd, which every langchain module imported by name (so each module's reference is swapped)
+      - _create_tool_message, which format_to_tool_messages looks up on each call
+    """
+    patched = []
+    original_dumpd = lc_dump.dumpd
+    timed_dumpd = _timed(original_dumpd, "serialization:runs", timer_ref)
+    for name, module in list(sys.modules.items()):
+        if name.startswith("langchain") and getattr(module, "dumpd", None) is original_dumpd:
+            patched.append((module, "dumpd", original_dumpd))
+            module.dumpd = timed_dumpd
+    original_message = lc_scratchpad._create_tool_message
+    patched.append((lc_scratchpad, "_create_tool_message", original_message))
+    lc_scratchpad._create_tool_message = _timed(original_message, "serialization:tool_messages", timer_ref)
+    try:
+        yield
+    finally:
+        for module, attr, original in patched:
+            setattr(module, attr, original)
+
+class TimedHistory(BaseChatMessageHistory):
+    # Wraps the app's history so loads and saves land in their own phases
+    def __init__(self, inner, timer_ref):
+        self.inner = inner
+        self.timer_ref = timer_ref
+
+    @property
+    def messages(self):
+        started = time.perf_counter()
+        messages = self.inner.messages
+        self.timer_ref[0].add("history_load", time.perf_counter() - started)
+        return messages
+
+    def add_messages(self, messages):
+        started = time.perf_counter()
+        self.inner.add_messages(messages)
+        self.timer_ref[0].add("history_save", time.perf_counter() - started)
+
+    def clear(self):
+        self.inner.clear()
+
+def run(iterations: int, llm_latency: float = 0.0, warm_cache: bool = False):
+    """
+    Runs the scenario `iterations` times (a fresh session each time) and returns
+    {"turns": n, "phases": {phase: [seconds per turn]}}.
+    """
+    llm = ScriptedChatModel(script=[step for _, steps in SCENARIO for step in steps], latency=llm_latency)
+    timer_ref = [PhaseTimer()]
+    agent = core.build_agent_executor(llm, history_factory=lambda sid: TimedHistory(WindowedChatMessageHistory(sid), timer_ref))
+
+    per_turn = []
+    with timed_serialization(timer_ref):
+        for iteration in range(iterations):
+            per_turn.extend(_run_scenario(agent, llm, timer_ref, iteration, warm_cache))
+
+    # A phase missing from a turn (a tool it didn't call) counts as zero, so means are per turn
+    names = set().union(*per_turn)
+    return {"turns": len(per_turn), "phases": {name: [phases.get(name, 0.0) for phases in per_turn] for name in names}}
+
+def _run_scenario(agent, llm, timer_ref, iteration, warm_cache):
+    # One pass over SCENARIO in a fresh session; returns the phases of each turn
+    llm.position = 0
+    if not warm_cache:
+        tools.tool_cache.clear()
+    session_id = f"bench-{os.getpid()}-{iteration}"
+    per_turn = []
+    for question, _ in SCENARIO:
+        timer = timer_ref[0] = PhaseTimer()
+        started = time.perf_counter()
+        response = agent.invoke({"input": question}, config={"configurable": {"session_id": session_id}, "callbacks": [timer]})
+        encode_started = time.perf_counter()
+        json.dumps({"response": response["output"], "session_id": session_id})
+        timer.add("serialization:reply", time.perf_counter() - encode_started)
+        total = time.perf_counter() - started
+
+        timer.phases["framework"] = max(0.0, total - sum(timer.phases.values()))
+        timer.phases["total"] = total
+        per_turn.append(timer.phases)
+    return per_turn
+
+def summarize(result):
+    summary = {}
+    for phase, values in result["phases"].items():
+        ordered = sorted(values)
+        n = len(ordered)
+        summary[phase] = {
+            "mean_ms": sum(ordered) / n * 1000,
+            "p50_ms": ordered[n // 2] * 1000,
+            "p95_ms": ordered[min(n - 1, int(n * 0.95))] * 1000,
+        }
+    return summary
+
+def compare(summary, baseline, tolerance: float):
+    """
+    Phases whose mean is more than `tolerance` slower than the baseline.
+    Sub-millisecond phases are skipped: their noise is larger than any tolerance.
+    """
+    regressions = []
+    for phase, stats in baseline.items():
+        if phase not in summary or stats["mean_ms"] < 1.0:
+            continue
+        current = summary[phase]["mean_ms"]
+        if current > stats["mean_ms"] * (1 + tolerance):
+            regressions.append((phase, stats["mean_ms"], current))
+    return regressions
+
+def show(summary, turns):
+    total = summary["total"]["mean_ms"] or 1.0
+    print(f"turns={turns}")
+    order = sorted((p for p in summary if p != "total"), key=lambda p: -summary[p]["mean_ms"])
+    for phase in order + ["total"]:
+        s = summary[phase]
+        print(f"  {phase:<34} mean={s['mean_ms']:8.3f}ms p50={s['p50_ms']:8.3f}ms p95={s['p95_ms']:8.3f}ms {s['mean_ms'] / total:6.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline per-phase timing of agent chat turns.")
+    parser.add_argument("--iterations", type=int, default=10, help="scenario runs (each is several turns)")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated model time per call")
+    parser.add_argument("--warm-cache", action="store_true", help="keep tool results cached between iterations")
+    parser.add_argument("--database-url", help="use an existing database instead of a temporary SQLite file")
+    parser.add_argument("--days", type=int, default=90, help="days of data to seed into an empty database")
+    parser.add_argument("--json", help="write the summary to this file")
+    parser.add_argument("--baseline", help="summary file from an earlier --json run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed fractional slowdown per phase")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if not db.query(models.Product.id).first():
+            seed_database(db, days=args.days)
+    finally:
+        db.close()
+
+    run(1) # warm imports, connections and the prompt
+    result = run(args.iterations, llm_latency=args.llm_latency_ms / 1000, warm_cache=args.warm_cache)
+    summary = summarize(result)
+    show(summary, result["turns"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(summary, json.load(f), args.tolerance)
+        for phase, before, after in regressions:
+            print(f"REGRESSION {phase}: {before:.3f}ms -> {after:.3f}ms")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Per-request agent setup overhead, before and after the process-wide agent.
+
+Uses a fake chat model and in-memory chat history, so no API key, network or
+database is needed. Reports:
+  - setup: building the agent the old way (real ChatGoogleGenerativeAI client
+    with a dummy key + prompt + tools + executor + history wrapper)
+  - per-request: build-then-invoke (old /agent/chat) vs invoke on the shared agent
+
+    python scripts/bench_agent_setup.py --requests 200
+"""
+import sys
+import os
+import argparse
+import time
+
+# Add the parent directory (backend) to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ["AGENT_VERBOSE"] = "false" # console output would dominate the timings
+
+from langchain_core.chat_history import InMemoryChatMessageHistory
+
+import agent.core as core
+from agent.fake_llm import ScriptedChatModel, answer_step
+
+def fake_llm():
+    return ScriptedChatModel(script=[answer_step("Revenue was £100.")])
+
+histories = {}
+
+def in_memory_history(session_id):
+    return histories.setdefault(session_id, InMemoryChatMessageHistory())
+
+def timed(fn, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "avg": sum(samples) / n * 1000,
+        "p50": samples[n // 2] * 1000,
+        "p99": samples[min(n - 1, int(n * 0.99))] * 1000,
+    }
+
+def show(label, stats):
+    print(f"  {label:<28} avg={stats['avg']:8.3f}ms p50={stats['p50']:8.3f}ms p99={stats['p99']:8.3f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent setup overhead per request.")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    n = args.requests
+
+    core.get_session_history = in_memory_history
+
+    def call(agent_runnable):
+        histories.clear() # keep history length constant across runs
+        agent_runnable.invoke({"input": "How did we do?"}, config={"configurable": {"session_id": "bench"}})
+
+    config = ("dummy-key", core.MODEL_NAME, 0.0)
+    core.build_agent_executor(core.create_llm(config)) # warm imports and client setup once
+
+    print(f"requests={n}")
+    show("setup (real client)", timed(lambda: core.build_agent_executor(core.create_llm(config)), n))
+    show("per-request build + invoke", timed(lambda: call(core.build_agent_executor(fake_llm())), n))
+    shared = core.build_agent_executor(fake_llm())
+    show("shared agent invoke", timed(lambda: call(shared), n))
+
+if __name__ == "__main__":
+    main()
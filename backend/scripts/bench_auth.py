@@ -0,0 +1,118 @@
+"""
+Latency of a cheap endpoint while a burst of logins is in flight.
+
+Runs the auth router in-process (sqlite, httpx ASGI transport) and reports
+p50/p99 for GET /ping, polled every 5ms for as long as N concurrent
+POST /token calls are in flight.
+--blocking replays the old behaviour (bcrypt on the event loop) for comparison.
+
+    python scripts/bench_auth.py --logins 20
+    python scripts/bench_auth.py --logins 20 --blocking
+"""
+import sys
+import os
+import argparse
+import asyncio
+import tempfile
+import time
+
+# Add the parent directory (backend) to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from dependencies import get_db
+from routers import auth
+import crud
+import schemas
+
+EMAIL = "bench@example.com"
+PASSWORD = "bench-password"
+PING_INTERVAL = 0.005
+
+def build_app(db_path):
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = Session()
+    crud.create_user(db, schemas.UserCreate(email=EMAIL, password=PASSWORD))
+    db.close()
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(auth.router)
+    app.dependency_overrides[get_db] = override_get_db
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] * 1000
+
+async def run(app, logins, idle_pings):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login():
+            r = await client.post("/token", data={"username": EMAIL, "password": PASSWORD})
+            assert r.status_code == 200, r.text
+
+        async def ping_loop(done):
+            # Latency is measured from when each ping was due, so time spent
+            # waiting for a blocked event loop to wake the poller counts too
+            latencies = []
+            due = time.perf_counter()
+            while not done(latencies):
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await client.get("/ping")
+                latencies.append(time.perf_counter() - due)
+                due += PING_INTERVAL
+                due = max(due, time.perf_counter())
+            return latencies
+
+        await login() # warm up
+        baseline = await ping_loop(lambda latencies: len(latencies) >= idle_pings)
+
+        burst = asyncio.gather(*[login() for _ in range(logins)])
+        start = time.perf_counter()
+        during = await ping_loop(lambda latencies: burst.done())
+        await burst
+        return baseline, during, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Ping latency during a login burst.")
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--pings", type=int, default=100, help="idle pings for the baseline")
+    parser.add_argument("--blocking", action="store_true", help="verify bcrypt on the event loop (old behaviour)")
+    args = parser.parse_args()
+
+    if args.blocking:
+        async def verify_inline(plain_password, hashed_password):
+            return crud.verify_password(plain_password, hashed_password)
+        crud.verify_password_async = verify_inline
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = build_app(os.path.join(tmp, "bench.db"))
+        baseline, burst, elapsed = asyncio.run(run(app, args.logins, args.pings))
+
+    mode = "blocking" if args.blocking else "offloaded"
+    print(f"mode={mode} logins={args.logins} burst_wall={elapsed:.2f}s pings_during_burst={len(burst)}")
+    print(f"  idle  ping p50={pct(baseline, 0.50):7.2f}ms p99={pct(baseline, 0.99):7.2f}ms")
+    print(f"  burst ping p50={pct(burst, 0.50):7.2f}ms p99={pct(burst, 0.99):7.2f}ms max={max(burst) * 1000:7.2f}ms")
+
+if __name__ == "__main__":
+    main()
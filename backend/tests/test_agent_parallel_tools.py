@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("langchain")
+from langchain.agents import create_tool_calling_agent
+from langchain.tools import tool
+
+import agent.core as core
+import agent.executor as executor
+from agent.fake_llm import ScriptedChatModel, tool_step, answer_step
+
+TOOL_DELAY = 0.3
+seen_threads = []
+
+@tool
+def slow_sales():
+    """Sales figures."""
+    seen_threads.append(threading.current_thread().name)
+    time.sleep(TOOL_DELAY)
+    return "sales: 100"
+
+@tool
+def slow_balances():
+    """Owner balances."""
+    seen_threads.append(threading.current_thread().name)
+    time.sleep(TOOL_DELAY)
+    return "balances: 40/60"
+
+def build_executor():
+    llm = ScriptedChatModel(script=[
+        tool_step(("slow_sales", {}), ("slow_balances", {})),
+        answer_step("Sales 100, balances 40/60."),
+    ])
+    agent = create_tool_calling_agent(llm, [slow_sales, slow_balances], core.prompt)
+    return executor.ParallelAgentExecutor(agent=agent, tools=[slow_sales, slow_balances], return_intermediate_steps=True)
+
+@pytest.fixture(autouse=True)
+def fresh_timings(monkeypatch):
+    monkeypatch.setattr(executor, "tool_timings", executor.ToolTimings())
+    seen_threads.clear()
+
+def test_step_tools_run_concurrently():
+    started = time.perf_counter()
+    result = build_executor().invoke({"input": "How are we doing?", "chat_history": []})
+    elapsed = time.perf_counter() - started
+
+    assert result["output"] == "Sales 100, balances 40/60."
+    # Results come back in the order the model asked for them
+    assert [step[1] for step in result["intermediate_steps"]] == ["sales: 100", "balances: 40/60"]
+    assert elapsed < 2 * TOOL_DELAY
+    assert all(name.startswith("agent-tool") for name in seen_threads)
+
+    stats = executor.tool_timings.snapshot()
+    assert stats["tools"]["slow_sales"]["count"] == 1
+    assert stats["parallel_steps"]["count"] == 1
+    assert stats["parallel_steps"]["speedup"] > 1.5
+
+def test_async_path_records_timings():
+    result = asyncio.run(build_executor().ainvoke({"input": "How are we doing?", "chat_history": []}))
+
+    assert result["output"] == "Sales 100, balances 40/60."
+    stats = executor.tool_timings.snapshot()
+    assert set(stats["tools"]) == {"slow_sales", "slow_balances"}
+    assert stats["parallel_steps"]["avg_wall_ms"] < 2 * TOOL_DELAY * 1000
@@ -0,0 +1,43 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("langchain_google_genai")
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+
+import agent.core as core
+
+class FakeToolChatModel(FakeMessagesListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    built = []
+    def create_llm(config):
+        built.append(config)
+        return FakeToolChatModel(responses=[AIMessage(content="ok")])
+    monkeypatch.setattr(core, "create_llm", create_llm)
+    core.reset_agent_executor()
+    yield built
+    core.reset_agent_executor()
+
+def test_agent_built_once_and_rebuilt_on_config_change(fake_llm, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "key-1")
+    monkeypatch.delenv("AGENT_MODEL", raising=False)
+
+    first = core.get_agent_executor()
+    assert core.get_agent_executor() is first
+    assert len(fake_llm) == 1
+
+    monkeypatch.setenv("AGENT_MODEL", "another-model")
+    rebuilt = core.get_agent_executor()
+    assert rebuilt is not first
+    assert fake_llm[-1][1] == "another-model"
+
+    monkeypatch.delenv("GOOGLE_API_KEY")
+    assert core.get_agent_executor() is None
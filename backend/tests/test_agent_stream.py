@@ -0,0 +1,96 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("langchain")
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.chat_history import InMemoryChatMessageHistory
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+
+from database import Base
+import agent.core as core
+import agent.tools as tools
+from routers import agent as agent_router
+
+# Setup Test DB (tools open their own sessions)
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+class FakeToolChatModel(GenericFakeChatModel):
+    """Streams scripted replies word by word; tool calls arrive as one chunk."""
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = next(self.messages)
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                for i, c in enumerate(message.tool_calls)
+            ]))
+            return
+        for word in message.content.split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(word + " ", chunk=chunk)
+            yield chunk
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+@pytest.fixture
+def client(monkeypatch):
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(tools, "get_db_session", TestingSessionLocal)
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+
+    histories = {}
+    llm = FakeToolChatModel(messages=iter([
+        AIMessage(content="", tool_calls=[{"name": "get_top_expenses", "args": {}, "id": "call-1"}]),
+        AIMessage(content="Nobody has paid expenses yet."),
+    ]))
+    runnable = core.build_agent_executor(llm, history_factory=lambda sid: histories.setdefault(sid, InMemoryChatMessageHistory()))
+    monkeypatch.setattr(agent_router, "get_agent_executor", lambda: runnable)
+
+    app = FastAPI()
+    app.include_router(agent_router.router, prefix="/agent")
+    with TestClient(app) as c:
+        yield c, histories
+    Base.metadata.drop_all(bind=engine)
+
+def test_stream_emits_tool_events_tokens_and_timings(client):
+    c, histories = client
+    r = c.post("/agent/chat/stream", json={"query": "Who pays the most?", "session_id": "s-1"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_sse(r.text)
+    kinds = [kind for kind, _ in events]
+    assert kinds[0] == "session" and kinds[-1] == "done"
+    assert kinds.index("tool_start") < kinds.index("tool_end") < kinds.index("token")
+    assert events[kinds.index("tool_start")][1]["name"] == "get_top_expenses"
+
+    answer = "".join(data["text"] for kind, data in events if kind == "token")
+    assert answer.strip() == "Nobody has paid expenses yet."
+
+    done = events[-1][1]
+    assert done["session_id"] == "s-1"
+    assert 0 < done["ttfb_ms"] <= done["total_ms"]
+
+    # The turn was saved through the async history interface
+    assert [m.type for m in histories["s-1"].messages] == ["human", "ai"]
+    assert c.get("/agent/stream-stats").json()["ttfb_ms"]["count"] >= 1
@@ -0,0 +1,91 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from datetime import date, timedelta
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("langchain")
+from database import Base
+from schemas import ExpenseCreate, OwnerCreate
+import crud
+import agent.tools as tools
+
+# Setup Test DB (one shared connection: tools open their own sessions)
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    original = tools.get_db_session
+    tools.get_db_session = TestingSessionLocal
+    tools.tool_cache.clear()
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    tools.get_db_session = original
+    Base.metadata.drop_all(bind=engine)
+
+def test_data_version_bumps_with_writes_only_on_commit(db):
+    assert crud.get_data_version(db) == 0
+    crud.create_owner(db, OwnerCreate(name="Ana", equity_percentage=100))
+    assert crud.get_data_version(db, "owners") == 1
+    assert crud.get_data_version(db, "expenses") == 0
+
+    crud.bump_data_version(db, "expenses", "expenses")
+    db.rollback()
+    assert crud.get_data_version(db, "expenses") == 0
+
+    # Slots add up to the domain's version
+    for _ in range(3):
+        crud.bump_data_version(db, "expenses")
+        db.commit()
+    assert crud.get_data_version(db, "expenses") == 3
+
+def test_tool_results_cached_until_data_changes(db):
+    stats = tools.tool_cache.stats()
+    first = tools.get_liability_summary.invoke({})
+    assert tools.get_liability_summary.invoke({}) == first
+    after = tools.tool_cache.stats()
+    assert after["misses"] == stats["misses"] + 1
+    assert after["hits"] == stats["hits"] + 1
+
+    # Different arguments are different entries
+    tools.get_recent_sales_stats.invoke({"days": 7})
+    tools.get_recent_sales_stats.invoke({"days": 14})
+    assert tools.tool_cache.stats()["misses"] == after["misses"] + 2
+
+    crud.create_expense(db, ExpenseCreate(date=date(2024, 5, 1), category="Tools", amount=50.0, description="Canva"))
+    fresh = tools.get_liability_summary.invoke({})
+    assert fresh != first
+    assert fresh[0]["amount"] == 50.0
+
+def test_day_rollover_misses(db, monkeypatch):
+    tools.get_recent_sales_stats.invoke({"days": 7})
+    misses = tools.tool_cache.stats()["misses"]
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=1)
+
+    # "Last 7 days" is a different window after midnight even without a write
+    monkeypatch.setattr(tools, "date", Tomorrow)
+    tools.get_recent_sales_stats.invoke({"days": 7})
+    assert tools.tool_cache.stats()["misses"] == misses + 1
+
+def test_lru_eviction():
+    cache = tools.ToolResultCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a") # a is now most recent
+    cache.set("c", 3)
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,88 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import numpy as np
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+from schemas import OwnerCreate, ProductCreate, ProductEquityCreate, InventoryBatchCreate, DailyReportCreate, SaleCreate
+from datetime import date
+import crud
+from crud.allocation import EquityMatrix, get_equity_matrix, round_cents
+
+# Setup Test DB
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def make_matrix():
+    # Owners 1/2 at 60/40 globally; product 10 has its own 50/50 map, product 20 has none
+    return EquityMatrix([(1, 60.0), (2, 40.0)], [10, 20], [(10, 1, 50.0), (10, 2, 50.0)])
+
+def test_vector_and_matrix_allocation():
+    matrix = make_matrix()
+    assert matrix.members.tolist() == [[True, True], [True, True]]
+
+    # 0.333 * 50% rounds to 0.17 for each owner, 0.333 * 60% to 0.2: shares are rounded one by one
+    assert matrix.allocate_detail([0.333, 0.333]).tolist() == [[0.17, 0.2], [0.17, 0.13]]
+    assert matrix.allocate([0.333, 0.333]).tolist() == pytest.approx([0.37, 0.30])
+    assert matrix.allocate([0.333, 0.333], rounded=False).tolist() == pytest.approx([0.3663, 0.2997])
+
+    days = np.array([[10.0, 5.0], [0.0, -20.0], [0.333, 0.333]])
+    assert matrix.allocate(days) == pytest.approx(np.array([matrix.allocate(row) for row in days]))
+    assert matrix.allocate_global(np.array([10.0, 1.0])).tolist() == [[6.0, 4.0], [0.6, 0.4]]
+
+def test_blocks_match_single_pass(monkeypatch):
+    matrix = make_matrix()
+    days = np.random.default_rng(3).uniform(-50, 50, size=(37, 2))
+    whole = matrix.allocate(days)
+    monkeypatch.setattr("crud.allocation.ALLOCATION_BLOCK_CELLS", 8)
+    assert np.array_equal(matrix.allocate(days), whole)
+
+def test_cents_round_like_round():
+    # np.round(0.015, 2) is 0.02 and np.round(0.025, 2) is 0.02; round() gives 0.01 and 0.03
+    values = [0.015, 0.025, -0.015, 1.005, 2.675, 0.125, 0.3333, -7.499]
+    assert round_cents(values).tolist() == [round(v, 2) for v in values]
+    values = np.random.default_rng(5).uniform(-100, 100, size=2000).round(3)
+    assert round_cents(values).tolist() == [round(v, 2) for v in values.tolist()]
+
+def test_unknown_products_and_owners():
+    matrix = EquityMatrix([(1, 100.0)], [10], [(10, 99, 100.0), (30, 1, 100.0)])
+    # Product 10 is mapped only to an owner that doesn't exist: nobody is paid for it
+    assert matrix.allocate([50.0]).tolist() == [0.0]
+    assert matrix.product_vector({10: 5.0, 30: 7.0}) == (pytest.approx(np.array([5.0])), 7.0)
+
+def test_cached_matrix_follows_equity_writes(db):
+    ana = crud.create_owner(db, OwnerCreate(name="Ana", equity_percentage=100))
+    serum = crud.create_product(db, ProductCreate(name="Serum"))
+    first = get_equity_matrix(db)
+    assert get_equity_matrix(db) is first
+    assert first.shares.tolist() == [[1.0]]
+
+    crud.set_product_equity(db, ana.id, ProductEquityCreate(product_id=serum.id, equity_percentage=25))
+    second = get_equity_matrix(db)
+    assert second is not first
+    assert second.shares.tolist() == [[0.25]]
+
+    crud.create_product(db, ProductCreate(name="Toner"))
+    assert get_equity_matrix(db).product_ids == [serum.id, serum.id + 1]
+
+def test_sales_and_stock_keep_cached_matrix(db):
+    toner = crud.get_products(db)[-1]
+    matrix = get_equity_matrix(db)
+    crud.create_inventory_batch(db, InventoryBatchCreate(product_id=toner.id, quantity=5, landing_price=1.0))
+    report = crud.create_daily_report(db, DailyReportCreate(date=date(2024, 8, 1), total_ad_spend=0.0))
+    crud.process_sale_fifo(db, SaleCreate(report_id=report.id, product_id=toner.id, quantity=1, selling_price=3.0))
+    assert get_equity_matrix(db) is matrix
@@ -0,0 +1,68 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import date
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+import models
+import crud
+
+# Setup Test DB
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+
+    # Two reports in the same week (Mon 1st / Wed 3rd Jan 2024), one in April
+    for d, ad_spend, revenue, cogs in [
+        (date(2024, 1, 1), 5.0, 100.0, 40.0),
+        (date(2024, 1, 3), 5.0, 50.0, 20.0),
+        (date(2024, 4, 10), 10.0, 200.0, 80.0),
+    ]:
+        report = models.DailyReport(date=d, total_ad_spend=ad_spend)
+        session.add(report)
+        session.flush()
+        session.add(models.Sale(report_id=report.id, product_id=None, quantity=1, selling_price=revenue, calculated_cogs=cogs))
+
+    # Expense on a day with no report still counts towards its bucket
+    session.add(models.Expense(date=date(2024, 1, 7), category="Tools", amount=15.0, description="Canva"))
+    session.commit()
+
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def test_daily_buckets(db):
+    rows = crud.get_pnl_buckets(db, date(2024, 1, 1), date(2024, 1, 31))
+    assert [r["date"] for r in rows] == [date(2024, 1, 1), date(2024, 1, 3), date(2024, 1, 7)]
+    assert rows[0]["net_profit"] == 100.0 - 40.0 - 5.0
+    assert rows[2]["expenses"] == 15.0
+
+def test_week_month_quarter_buckets(db):
+    weeks = crud.get_pnl_buckets(db, date(2024, 1, 1), date(2024, 12, 31), bucket="week")
+    assert weeks[0]["date"] == date(2024, 1, 1)
+    assert weeks[0]["revenue"] == 150.0
+    assert weeks[0]["net_profit"] == 150.0 - 60.0 - 10.0 - 15.0
+    assert weeks[1]["date"] == date(2024, 4, 8)
+
+    months = crud.get_pnl_buckets(db, date(2024, 1, 1), date(2024, 12, 31), bucket="month")
+    assert [m["date"] for m in months] == [date(2024, 1, 1), date(2024, 4, 1)]
+
+    quarters = crud.get_pnl_buckets(db, date(2024, 1, 1), date(2024, 12, 31), bucket="quarter")
+    assert [q["date"] for q in quarters] == [date(2024, 1, 1), date(2024, 4, 1)]
+    assert quarters[1]["cogs"] == 80.0
+
+def test_rolling_average(db):
+    rows = crud.get_pnl_buckets(db, date(2024, 1, 1), date(2024, 12, 31), rolling=2)
+    assert rows[0]["revenue_avg"] == 100.0
+    assert rows[1]["revenue_avg"] == 75.0
+    assert rows[2]["revenue_avg"] == 25.0
@@ -0,0 +1,68 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import date
+import asyncio
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("aiosqlite")
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from database import Base
+from schemas import ProductCreate, InventoryBatchCreate, SaleCreate, DailyReportCreate, ExpenseCreate
+import crud
+
+# Setup Test DB (file-backed so the sync writer and async readers see the same data)
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_async_reads.db")
+engine = create_engine(f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module")
+def seeded():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    prod = crud.create_product(db, ProductCreate(name="Toner", sku="TON-001"))
+    crud.create_inventory_batch(db, InventoryBatchCreate(product_id=prod.id, quantity=10, landing_price=3.0))
+    report = crud.create_daily_report(db, DailyReportCreate(date=date(2024, 7, 1), total_ad_spend=4.0))
+    crud.process_sale_fifo(db, SaleCreate(report_id=report.id, product_id=prod.id, quantity=2, selling_price=10.0))
+    crud.create_expense(db, ExpenseCreate(date=date(2024, 7, 2), category="Tools", amount=1.0, description="Canva"))
+    db.close()
+    yield
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    os.remove(DB_PATH)
+
+def run_with_sessions(coro_fn):
+    async def runner():
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}")
+        try:
+            return await coro_fn(async_sessionmaker(async_engine, expire_on_commit=False))
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(runner())
+
+def test_dashboard_lifetime_and_daily(seeded):
+    lifetime = run_with_sessions(lambda factory: crud.get_dashboard_stats_async(factory))
+    assert lifetime["revenue"] == 20.0
+    assert lifetime["cogs"] == 6.0
+    assert lifetime["net_profit"] == 20.0 - 6.0 - 4.0 - 1.0
+
+    daily = run_with_sessions(lambda factory: crud.get_dashboard_stats_async(factory, date(2024, 7, 1)))
+    assert daily["net_profit"] == 20.0 - 6.0 - 4.0
+
+    empty = run_with_sessions(lambda factory: crud.get_dashboard_stats_async(factory, date(2030, 1, 1)))
+    assert empty["revenue"] == 0.0
+
+def test_async_history_matches_sync(seeded):
+    async def history(factory):
+        async with factory() as session:
+            return await crud.get_pnl_buckets_async(session, date(2024, 7, 1), date(2024, 7, 31), bucket="month")
+
+    db = TestingSessionLocal()
+    expected = crud.get_pnl_buckets(db, date(2024, 7, 1), date(2024, 7, 31), bucket="month")
+    db.close()
+    assert run_with_sessions(history) == expected
@@ -0,0 +1,115 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from fastapi import HTTPException
+import asyncio
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+from schemas import UserCreate
+import crud
+import dependencies
+
+# Setup Test DB
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+statements = []
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    original = dependencies.SessionLocal
+    dependencies.SessionLocal = TestingSessionLocal
+    dependencies.principal_cache.clear()
+    dependencies.refresh_principal_cache()
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    dependencies.SessionLocal = original
+    dependencies.principal_cache.clear()
+    Base.metadata.drop_all(bind=engine)
+
+def resolve(token):
+    return asyncio.run(dependencies.get_current_user(token))
+
+def test_cache_hit_skips_database(db):
+    user = crud.create_user(db, UserCreate(email="cache@example.com", password="first"))
+    token = dependencies.issue_access_token(user)
+
+    assert resolve(token).email == "cache@example.com"
+    statements.clear()
+    assert resolve(token).email == "cache@example.com"
+    assert statements == []
+
+def test_password_change_revokes_old_tokens(db):
+    user = crud.get_user_by_email(db, "cache@example.com")
+    old_token = dependencies.issue_access_token(user)
+    resolve(old_token) # warm the cache
+
+    user = crud.update_user_password(db, user.email, "second")
+    assert user.token_version == 1
+    new_token = dependencies.issue_access_token(user)
+
+    # A newer token forces a reload even before the stale entry is evicted...
+    assert resolve(new_token).token_version == 1
+    # ...after which the old one no longer matches
+    with pytest.raises(HTTPException) as exc:
+        resolve(old_token)
+    assert exc.value.status_code == 401
+
+def test_password_change_in_another_worker_revokes_on_next_poll(db):
+    user = crud.create_user(db, UserCreate(email="other@example.com", password="first"))
+    old_token = dependencies.issue_access_token(user)
+    resolve(old_token) # cached in this worker
+
+    # Changed through a different worker: this worker's cache is never told directly
+    crud.update_user_password(db, user.email, "second")
+    dependencies.refresh_principal_cache() # what watch_users_version runs every poll interval
+    with pytest.raises(HTTPException) as exc:
+        resolve(old_token)
+    assert exc.value.status_code == 401
+
+def test_load_racing_a_poll_is_not_cached(db):
+    cache = dependencies.PrincipalCache(ttl=60, maxsize=4)
+    cache.sync(1)
+    user = dependencies._load_principal("other@example.com")
+    cache.sync(2) # a password change landed while the user was being read
+    cache.set("other@example.com", user, 1)
+    assert cache.get("other@example.com") is None
+
+    cache.set("other@example.com", user, 2)
+    assert cache.get("other@example.com") == user
+
+def test_legacy_token_without_version(db):
+    crud.create_user(db, UserCreate(email="legacy@example.com", password="pw"))
+    token = dependencies.create_access_token(data={"sub": "legacy@example.com"})
+    assert resolve(token).token_version == 0
+
+def test_unknown_subject_rejected(db):
+    token = dependencies.create_access_token(data={"sub": "nobody@example.com"})
+    with pytest.raises(HTTPException):
+        resolve(token)
+
+def test_hashing_runs_off_loop_and_is_capped(monkeypatch):
+    hashed = asyncio.run(crud.get_password_hash_async("secret"))
+    assert asyncio.run(crud.verify_password_async("secret", hashed))
+    assert not asyncio.run(crud.verify_password_async("wrong", hashed))
+
+    import crud.user as user_crud
+    import threading
+    monkeypatch.setattr(user_crud, "_pending", threading.BoundedSemaphore(1))
+    user_crud._pending.acquire() # one job already waiting
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(crud.verify_password_async("secret", hashed))
+    assert exc.value.status_code == 503
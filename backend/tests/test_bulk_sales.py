@@ -0,0 +1,58 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import date
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+import models
+from schemas import ProductCreate, InventoryBatchCreate, SaleCreate, DailyReportCreate
+import crud
+
+# Setup Test DB
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def test_bulk_sales_deplete_fifo_and_report_line_errors(db):
+    prod = crud.create_product(db, ProductCreate(name="Mascara", sku="MAS-001"))
+    other = crud.create_product(db, ProductCreate(name="Blush", sku="BLU-001"))
+    crud.create_inventory_batch(db, InventoryBatchCreate(product_id=prod.id, quantity=4, landing_price=2.0))
+    crud.create_inventory_batch(db, InventoryBatchCreate(product_id=prod.id, quantity=4, landing_price=2.0))
+    crud.create_inventory_batch(db, InventoryBatchCreate(product_id=other.id, quantity=1, landing_price=3.0))
+    report = crud.create_daily_report(db, DailyReportCreate(date=date(2024, 5, 1), total_ad_spend=0.0))
+
+    result = crud.process_sales_bulk(db, [
+        SaleCreate(report_id=report.id, product_id=prod.id, quantity=3, selling_price=10.0),
+        SaleCreate(report_id=report.id, product_id=other.id, quantity=2, selling_price=9.0),  # not enough stock
+        SaleCreate(report_id=report.id, product_id=prod.id, quantity=3, selling_price=10.0),  # spans both batches
+        SaleCreate(report_id=report.id, product_id=999, quantity=1, selling_price=1.0),
+        SaleCreate(report_id=999, product_id=prod.id, quantity=1, selling_price=1.0),
+    ])
+
+    assert result["created"] == 2
+    assert result["failed"] == 3
+    errors = [r["error"] for r in result["results"]]
+    assert errors == [None, "Insufficient stock", None, "Product not found", "Report not found"]
+    assert all(r["sale_id"] for r in result["results"] if r["error"] is None)
+
+    db.refresh(prod)
+    assert prod.current_stock == 2
+    remaining = [b.remaining_quantity for b in db.query(models.InventoryBatch).filter_by(product_id=prod.id).order_by(models.InventoryBatch.id)]
+    assert remaining == [0, 2]
+
+    fin = crud.get_daily_financials(db, date(2024, 5, 1))
+    assert fin.revenue == 60.0
+    assert fin.cogs == 12.0
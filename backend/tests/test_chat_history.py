@@ -0,0 +1,104 @@
+from sqlalchemy import create_engine
+from datetime import datetime, timedelta
+import asyncio
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("aiosqlite")
+from sqlalchemy.ext.asyncio import create_async_engine
+from langchain_core.messages import HumanMessage, AIMessage
+
+from database import Base
+import agent.history as history
+
+# Setup Test DB (file-backed so the sync and async engines share it)
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_chat_history.db")
+engine = create_engine(f"sqlite:///{DB_PATH}", connect_args={"check_same_thread": False})
+
+@pytest.fixture(scope="module", autouse=True)
+def engines():
+    Base.metadata.create_all(bind=engine)
+    patch = pytest.MonkeyPatch()
+    patch.setattr(history, "engine", engine)
+    yield
+    patch.undo()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    os.remove(DB_PATH)
+
+def turns(n, start=0):
+    messages = []
+    for i in range(start, start + n):
+        messages += [HumanMessage(content=f"question {i}"), AIMessage(content=f"answer {i}")]
+    return messages
+
+def test_loads_only_last_turns():
+    h = history.WindowedChatMessageHistory("s-window", turns=3)
+    h.add_messages(turns(10))
+    loaded = h.messages
+    assert [m.content for m in loaded] == ["question 7", "answer 7", "question 8", "answer 8", "question 9", "answer 9"]
+
+def test_token_budget_trims_oldest_and_starts_on_a_question():
+    long_answer = AIMessage(content="x" * 400) # ~100 tokens
+    messages = [HumanMessage(content="q1"), long_answer, HumanMessage(content="q2"), AIMessage(content="a2")]
+    window = history.window_messages(messages, token_budget=50)
+    assert [m.content for m in window] == ["q2", "a2"]
+
+def test_async_methods_share_the_table(monkeypatch):
+    async def run():
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}")
+        monkeypatch.setattr(history, "async_engine", async_engine)
+        try:
+            h = history.WindowedChatMessageHistory("s-async", turns=5)
+            await h.aadd_messages(turns(2))
+            return await h.aget_messages()
+        finally:
+            await async_engine.dispose()
+    loaded = asyncio.run(run())
+    assert [m.type for m in loaded] == ["human", "ai", "human", "ai"]
+    assert len(history.WindowedChatMessageHistory("s-async").messages) == 4
+
+def test_sessions_trimmed_and_expired(monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_MAX_MESSAGES", 4)
+    h = history.WindowedChatMessageHistory("s-trim", turns=50)
+    h.add_messages(turns(5))
+    assert [m.content for m in h.messages] == ["question 3", "answer 3", "question 4", "answer 4"]
+
+    stale = history.WindowedChatMessageHistory("s-stale")
+    stale.add_messages(turns(1))
+    with engine.begin() as conn:
+        conn.execute(history.table.update()
+                     .where(history.table.c.session_id == "s-stale")
+                     .values(created_at=datetime.utcnow() - timedelta(days=90)))
+
+    assert history.prune_chat_history(ttl_days=30) == 2
+    assert stale.messages == []
+    assert len(h.messages) == 4
+
+def test_periodic_pruning_keeps_running(monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_PRUNE_INTERVAL_MINUTES", 0.3 / 60)
+
+    def go_stale(session_id):
+        history.WindowedChatMessageHistory(session_id).add_messages(turns(1))
+        with engine.begin() as conn:
+            conn.execute(history.table.update()
+                         .where(history.table.c.session_id == session_id)
+                         .values(created_at=datetime.utcnow() - timedelta(days=90)))
+
+    async def run():
+        go_stale("s-idle-1")
+        task = asyncio.create_task(history.prune_chat_history_periodically())
+        await asyncio.sleep(0.15)
+        first = history.WindowedChatMessageHistory("s-idle-1").messages
+        # Sessions that expire while the server is up go on a later pass
+        go_stale("s-idle-2")
+        await asyncio.sleep(0.5)
+        task.cancel()
+        return first, history.WindowedChatMessageHistory("s-idle-2").messages
+
+    assert asyncio.run(run()) == ([], [])
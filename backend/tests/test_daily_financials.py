@@ -0,0 +1,102 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import date
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+import models
+from schemas import ProductCreate, InventoryBatchCreate, SaleCreate, DailyReportCreate, DailyReportUpdate, SaleUpdate, ExpenseCreate
+import crud
+
+# Setup Test DB
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def test_rollup_tracks_writes(db):
+    day = date(2024, 1, 15)
+    prod = crud.create_product(db, ProductCreate(name="Serum", sku="SER-001"))
+    crud.create_inventory_batch(db, InventoryBatchCreate(product_id=prod.id, quantity=10, landing_price=4.0))
+
+    report = crud.create_daily_report(db, DailyReportCreate(date=day, total_ad_spend=5.0))
+    sale = crud.process_sale_fifo(db, SaleCreate(report_id=report.id, product_id=prod.id, quantity=3, selling_price=10.0))
+    crud.create_expense(db, ExpenseCreate(date=day, category="Tools", amount=2.0, description="Canva"))
+
+    fin = crud.get_daily_financials(db, day)
+    assert fin.revenue == 30.0
+    assert fin.cogs == 12.0
+    assert fin.ad_spend == 5.0
+    assert fin.expenses == 2.0
+    assert fin.net_profit == 30.0 - 12.0 - 5.0 - 2.0
+
+    # Editing the report recomputes the day
+    crud.update_daily_report(db, report.id, DailyReportUpdate(
+        total_ad_spend=1.0,
+        sales=[SaleUpdate(id=sale.id, product_id=prod.id, quantity=1, selling_price=10.0)]
+    ))
+    fin = crud.get_daily_financials(db, day)
+    assert fin.revenue == 10.0
+    assert fin.cogs == 4.0
+    assert fin.net_profit == 10.0 - 4.0 - 1.0 - 2.0
+
+    history = crud.get_sales_history(db, days=100000)
+    assert [h["net_profit"] for h in history if h["date"] == day] == [fin.net_profit]
+
+def test_backfill_only_fills_missing_dates(db):
+    day = date(2024, 2, 1)
+    db.add(models.DailyReport(date=day, total_ad_spend=7.0))
+    db.add(models.Expense(date=day, category="Ads", amount=3.0, description="Boost"))
+    db.commit()
+    assert crud.get_daily_financials(db, day) is None
+
+    crud.backfill_daily_financials(db)
+
+    fin = crud.get_daily_financials(db, day)
+    assert fin.ad_spend == 7.0
+    assert fin.expenses == 3.0
+    assert fin.net_profit == -10.0
+    # Only the day-level row: the day had no sales
+    assert db.query(models.DailyFinancials).filter(models.DailyFinancials.date == day).count() == 1
+
+def test_same_day_rows_per_product(db):
+    day = date(2024, 3, 1)
+    report = crud.create_daily_report(db, DailyReportCreate(date=day, total_ad_spend=4.0))
+    toner = crud.create_product(db, ProductCreate(name="Toner", sku="TON-001"))
+    crud.create_inventory_batch(db, InventoryBatchCreate(product_id=toner.id, quantity=10, landing_price=1.0))
+    serum = crud.get_product_by_sku(db, "SER-001")
+    crud.process_sale_fifo(db, SaleCreate(report_id=report.id, product_id=serum.id, quantity=1, selling_price=10.0))
+    toner_sale = crud.process_sale_fifo(db, SaleCreate(report_id=report.id, product_id=toner.id, quantity=2, selling_price=3.0))
+
+    rows = {r.product_id: r for r in db.query(models.DailyFinancials).filter(models.DailyFinancials.date == day)}
+    assert sorted(rows) == [0, serum.id, toner.id]
+    assert (rows[0].ad_spend, rows[toner.id].revenue, rows[toner.id].cogs) == (4.0, 6.0, 2.0)
+    fin = crud.get_daily_financials(db, day)
+    assert (fin.revenue, fin.cogs, fin.ad_spend, fin.net_profit) == (16.0, 6.0, 4.0, 6.0)
+
+    # A rebuild zeroes the row of a product no longer sold that day
+    serum_sale = db.query(models.Sale).filter(models.Sale.report_id == report.id, models.Sale.product_id == serum.id).one()
+    crud.update_daily_report(db, report.id, DailyReportUpdate(total_ad_spend=4.0, sales=[
+        SaleUpdate(id=toner_sale.id, product_id=toner.id, quantity=2, selling_price=3.0)
+    ]))
+    assert db.query(models.Sale).filter(models.Sale.id == serum_sale.id).count() == 0
+    fin = crud.get_daily_financials(db, day)
+    assert (fin.revenue, fin.cogs, fin.net_profit) == (6.0, 2.0, 0.0)
+
+    # Backfill splits a day by product too
+    db.query(models.DailyFinancials).filter(models.DailyFinancials.date == day).delete()
+    db.commit()
+    crud.backfill_daily_financials(db)
+    assert crud.get_daily_financials(db, day) == fin
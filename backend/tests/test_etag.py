@@ -0,0 +1,84 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from database import Base
+from schemas import OwnerCreate, OwnerPaymentCreate
+from dependencies import get_db
+from routers import owners as owners_router
+import crud
+import etag
+
+# Setup Test DB (ETag lookups open their own sessions)
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def client(monkeypatch):
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(etag, "SessionLocal", TestingSessionLocal)
+
+    def override_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(owners_router.router, prefix="/owners")
+    app.dependency_overrides[get_db] = override_db
+    with TestClient(app) as c:
+        yield c
+    Base.metadata.drop_all(bind=engine)
+
+def test_not_modified_until_domain_write(client):
+    db = TestingSessionLocal()
+    ana = crud.create_owner(db, OwnerCreate(name="Ana", equity_percentage=100))
+
+    first = client.get("/owners/")
+    tag = first.headers["etag"]
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    again = client.get("/owners/", headers={"If-None-Match": tag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == tag
+    # Weak and list forms match too
+    assert client.get("/owners/", headers={"If-None-Match": f'"other", W/{tag}'}).status_code == 304
+
+    # Each query string is its own representation
+    page = client.get("/owners/payments?limit=1")
+    assert page.headers["etag"] != tag
+
+    # A ledger write leaves the owners list alone but changes the payments
+    payments_tag = page.headers["etag"]
+    crud.create_owner_payment(db, OwnerPaymentCreate(owner_id=ana.id, amount=5.0))
+    assert client.get("/owners/", headers={"If-None-Match": tag}).status_code == 304
+    changed = client.get("/owners/payments?limit=1", headers={"If-None-Match": payments_tag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != payments_tag
+
+    crud.create_owner(db, OwnerCreate(name="Ben", equity_percentage=0))
+    refreshed = client.get("/owners/", headers={"If-None-Match": tag})
+    assert refreshed.status_code == 200
+    assert [o["name"] for o in refreshed.json()] == ["Ana", "Ben"]
+    db.close()
+
+def test_unmarked_routes_and_writes_pass_through(client, monkeypatch):
+    created = client.post("/owners/", json={"name": "Cy", "equity_percentage": 0})
+    assert created.status_code == 200
+    assert "etag" not in created.headers
+
+    monkeypatch.setattr(etag, "ETAG_ENABLED", False)
+    assert "etag" not in client.get("/owners/").headers
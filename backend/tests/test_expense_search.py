@@ -0,0 +1,62 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import date, timedelta
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+from schemas import ExpenseCreate, OwnerCreate
+import crud
+
+# Setup Test DB
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    ana = crud.create_owner(session, OwnerCreate(name="Ana", equity_percentage=50))
+    ben = crud.create_owner(session, OwnerCreate(name="Ben", equity_percentage=50))
+    start = date(2024, 1, 1)
+    for i in range(30):
+        crud.create_expense(session, ExpenseCreate(
+            date=start + timedelta(days=i), category="Tools", amount=10.0,
+            description=f"Server hosting #{i}", paid_by_id=ana.id if i % 2 else ben.id
+        ))
+    crud.create_expense(session, ExpenseCreate(date=start, category="Server", amount=99.0, description="Dedicated box"))
+    crud.create_expense(session, ExpenseCreate(date=start, category="Food", amount=12.0, description="Team lunch"))
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def test_search_ranks_and_pages_without_gaps_or_repeats(db):
+    seen = []
+    items, cursor = crud.search_expenses(db, "server", limit=7)
+    assert items[0].category == "Server" # category hit ranks first
+    seen += items
+    while cursor:
+        items, cursor = crud.search_expenses(db, "server", cursor=cursor, limit=7)
+        seen += items
+    assert len(seen) == 31
+    assert len({e.id for e in seen}) == 31
+    # Within the same rank, newest first
+    hosting = [e.date for e in seen[1:]]
+    assert hosting == sorted(hosting, reverse=True)
+
+def test_search_filters(db):
+    items, _ = crud.search_expenses(db, "server", start_date=date(2024, 1, 10), end_date=date(2024, 1, 12), limit=50)
+    assert {e.date for e in items} == {date(2024, 1, 10), date(2024, 1, 11), date(2024, 1, 12)}
+
+    items, _ = crud.search_expenses(db, "hosting", paid_by_id=1, limit=50) # Ana
+    assert len(items) == 15 and all(e.paid_by_id == 1 for e in items)
+
+    items, _ = crud.search_expenses(db, "server", category="Server", limit=50)
+    assert [e.amount for e in items] == [99.0]
+
+    assert crud.search_expenses(db, "lunch")[0][0].description == "Team lunch"
@@ -0,0 +1,36 @@
+from datetime import date
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import exports
+
+def make_rows(n):
+    for i in range(n):
+        yield {"date": date(2024, 1, 1), "revenue": 10.0, "cogs": 4.0, "ad_spend": 1.0, "expenses": 0.5, "net_profit": 4.5}
+
+def test_csv_streams_rows_and_totals():
+    chunks = list(exports.stream_csv(make_rows(3)))
+    # header + one chunk per row + totals
+    assert len(chunks) == 5
+    lines = b"".join(chunks).decode().splitlines()
+    assert lines[0] == "date,revenue,cogs,ad_spend,expenses,net_profit"
+    assert lines[-1] == "TOTAL,30.0,12.0,3.0,1.5,13.5"
+
+def test_pdf_emits_page_by_page():
+    chunks = list(exports.stream_pdf(make_rows(200), title="Daily Reports"))
+    pdf = b"".join(chunks)
+    assert pdf.startswith(b"%PDF-1.4")
+    assert pdf.rstrip().endswith(b"%%EOF")
+    # 200 rows don't fit on one letter page, and each page is its own chunk
+    assert b"/Count 6" in pdf
+    assert len(chunks) > 6
+
+    # xref offsets point at the objects they name
+    start = int(pdf.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+    entries = pdf[start:].split(b"\n")[2:]
+    for obj_id, entry in enumerate(entries[1:4], start=1):
+        offset = int(entry[:10])
+        assert pdf[offset:].startswith(b"%d 0 obj" % obj_id)
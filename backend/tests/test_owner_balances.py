@@ -0,0 +1,90 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import datetime, timedelta
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+import models
+from schemas import OwnerCreate, OwnerPaymentCreate
+import crud
+import crud.owner_balance as owner_balance
+
+# Setup Test DB
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+START = datetime(2024, 1, 1)
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def small_interval(monkeypatch):
+    monkeypatch.setattr(owner_balance, "LEDGER_CHECKPOINT_INTERVAL", 3)
+
+def ledger_sum(db, owner_id, as_of=None):
+    query = db.query(models.OwnerLedger).filter(models.OwnerLedger.owner_id == owner_id)
+    if as_of is not None:
+        query = query.filter(models.OwnerLedger.date <= as_of)
+    return round(sum(e.amount for e in query.all()), 2)
+
+def test_running_totals_and_checkpoints(db, small_interval):
+    ana = crud.create_owner(db, OwnerCreate(name="Ana", equity_percentage=50))
+    ben = crud.create_owner(db, OwnerCreate(name="Ben", equity_percentage=50))
+
+    for day in range(10):
+        crud.create_owner_payment(db, OwnerPaymentCreate(owner_id=ana.id, amount=10.0 + day, date=START + timedelta(days=day)))
+    crud.withdraw_equity(db, ana.id, 5.0)
+
+    assert crud.get_owner_balance(db, ana.id) == ledger_sum(db, ana.id)
+    assert crud.get_owner_balance(db, ben.id) == 0.0
+
+    C = models.OwnerBalanceCheckpoint
+    checkpoints = db.query(C).filter(C.owner_id == ana.id, C.transaction_type == "PAYOUT").order_by(C.as_of).all()
+    assert [c.as_of for c in checkpoints] == [START + timedelta(days=d) for d in (2, 5, 8)]
+
+    for day in range(10):
+        as_of = START + timedelta(days=day, hours=12)
+        assert round(crud.get_owner_balance(db, ana.id, as_of=as_of), 2) == ledger_sum(db, ana.id, as_of)
+
+def test_backdated_entry_shifts_later_checkpoints(db, small_interval):
+    ana = db.query(models.Owner).filter(models.Owner.name == "Ana").one()
+    crud.create_owner_payment(db, OwnerPaymentCreate(owner_id=ana.id, amount=100.0, date=START + timedelta(days=1)))
+
+    for day in range(10):
+        as_of = START + timedelta(days=day)
+        assert round(crud.get_owner_balance(db, ana.id, as_of=as_of), 2) == ledger_sum(db, ana.id, as_of)
+
+def test_balances_for_all_owners(db):
+    balances = {row["name"]: row for row in crud.get_owner_balances(db)}
+    ana = balances["Ana"]
+    assert ana["balance"] == ledger_sum(db, ana["owner_id"])
+    assert ana["by_type"]["WITHDRAWAL"] == -5.0
+    assert ana["by_type"]["PAYOUT"] == ana["balance"] + 5.0
+    assert balances["Ben"] == {"owner_id": balances["Ben"]["owner_id"], "name": "Ben", "balance": 0.0,
+                               "by_type": {"PROFIT_SHARE": 0.0, "WITHDRAWAL": 0.0, "PAYOUT": 0.0}}
+
+def test_backfill_matches_ledger(db, small_interval):
+    expected = {row["owner_id"]: row for row in crud.get_owner_balances(db)}
+    db.query(models.OwnerBalance).delete()
+    db.query(models.OwnerBalanceCheckpoint).delete()
+    db.commit()
+
+    crud.backfill_owner_balances(db)
+    assert {row["owner_id"]: row for row in crud.get_owner_balances(db)} == expected
+
+    ana = db.query(models.Owner).filter(models.Owner.name == "Ana").one()
+    for day in range(10):
+        as_of = START + timedelta(days=day)
+        assert round(crud.get_owner_balance(db, ana.id, as_of=as_of), 2) == ledger_sum(db, ana.id, as_of)
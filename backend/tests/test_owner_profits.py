@@ -0,0 +1,95 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import date, datetime
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+from schemas import (OwnerCreate, ProductCreate, ProductEquityInput, InventoryBatchCreate,
+                     DailyReportCreate, SaleCreate, ExpenseCreate, OwnerPaymentCreate)
+import crud
+
+# Setup Test DB
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+JAN, FEB = date(2024, 1, 10), date(2024, 2, 10)
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+
+    ana = crud.create_owner(session, OwnerCreate(name="Ana", equity_percentage=60))
+    ben = crud.create_owner(session, OwnerCreate(name="Ben", equity_percentage=40))
+    # Serum is split 50/50 by its own equity map; Toner falls back to the global 60/40
+    serum = crud.create_product(session, ProductCreate(name="Serum", equities=[
+        ProductEquityInput(owner_id=ana.id, equity_percentage=50),
+        ProductEquityInput(owner_id=ben.id, equity_percentage=50),
+    ]))
+    toner = crud.create_product(session, ProductCreate(name="Toner"))
+    for product in (serum, toner):
+        crud.create_inventory_batch(session, InventoryBatchCreate(product_id=product.id, quantity=100, landing_price=2.0))
+
+    for day, qty in ((JAN, 10), (FEB, 5)):
+        report = crud.create_daily_report(session, DailyReportCreate(date=day, total_ad_spend=10.0))
+        crud.process_sale_fifo(session, SaleCreate(report_id=report.id, product_id=serum.id, quantity=qty, selling_price=10.0))
+        crud.process_sale_fifo(session, SaleCreate(report_id=report.id, product_id=toner.id, quantity=qty, selling_price=5.0))
+        crud.create_expense(session, ExpenseCreate(date=day, category="Packaging", amount=4.0, description="Boxes", product_id=serum.id))
+        crud.create_expense(session, ExpenseCreate(date=day, category="Tools", amount=10.0, description="Canva"))
+
+    crud.create_owner_payment(session, OwnerPaymentCreate(owner_id=ana.id, amount=7.0, date=datetime(2024, 1, 20, 15, 30)))
+    crud.create_owner_payment(session, OwnerPaymentCreate(owner_id=ana.id, amount=3.0, date=datetime(2024, 2, 20)))
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def by_name(result):
+    return {row["name"]: row for row in result}
+
+def test_lifetime_breakdown(db):
+    result = by_name(crud.get_owner_profit_breakdown(db))
+    ana, ben = result["Ana"], result["Ben"]
+
+    # Serum: 15 * (10 - 2) - 8 = 112; Toner: 15 * (5 - 2) = 45; global costs: 20 ads + 20 tools
+    assert {b["name"]: b["amount"] for b in ana["breakdown"]} == {
+        "Serum": 56.0, "Toner": 27.0, "Global Costs (Ads & Expenses)": -24.0
+    }
+    assert ana["total_profit"] == 59.0
+    assert ana["total_paid"] == 10.0
+    assert ana["balance"] == 49.0
+    assert ben["total_profit"] == 56.0 + 18.0 - 16.0
+    assert ben["total_paid"] == 0.0
+
+def test_period_breakdown(db):
+    result = by_name(crud.get_owner_profit_breakdown(db, start_date=date(2024, 1, 1), end_date=date(2024, 1, 20)))
+    ana = result["Ana"]
+
+    # January only: Serum 10 * 8 - 4 = 76, Toner 30, global costs 20
+    assert {b["name"]: b["amount"] for b in ana["breakdown"]} == {
+        "Serum": 38.0, "Toner": 18.0, "Global Costs (Ads & Expenses)": -12.0
+    }
+    # The payout at 15:30 on the end date still counts
+    assert ana["total_paid"] == 7.0
+
+    empty = by_name(crud.get_owner_profit_breakdown(db, start_date=date(2023, 1, 1), end_date=date(2023, 12, 31)))
+    assert empty["Ana"]["total_profit"] == 0.0
+    assert empty["Ana"]["total_paid"] == 0.0
+
+def test_expense_liability(db):
+    # Boxes (8 on Serum) split 50/50, Canva (20, unassigned) split 60/40
+    assert crud.get_expense_liability_summary(db) == [
+        {"name": "Ana", "amount": 16.0},
+        {"name": "Ben", "amount": 12.0},
+    ]
+    january_tools = crud.get_expense_liability_summary(db, start_date=date(2024, 1, 1), end_date=date(2024, 1, 31), category="Tools")
+    assert january_tools == [{"name": "Ana", "amount": 6.0}, {"name": "Ben", "amount": 4.0}]
+    assert crud.get_expense_liability_summary(db, category="Travel") == [
+        {"name": "Ana", "amount": 0.0},
+        {"name": "Ben", "amount": 0.0},
+    ]
@@ -0,0 +1,91 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import date
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+from schemas import ProductCreate, InventoryBatchCreate, SaleCreate, DailyReportCreate, DailyReportUpdate, SaleUpdate
+import crud
+import models
+
+# Setup Test DB
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def counters(db, product_id):
+    db.expire_all()
+    p = crud.get_product(db, product_id)
+    return p.total_sold, p.total_revenue, p.last_sold_at
+
+def test_sale_paths_keep_counters(db):
+    serum = crud.create_product(db, ProductCreate(name="Serum", sku="CNT-1"))
+    toner = crud.create_product(db, ProductCreate(name="Toner", sku="CNT-2"))
+    for product in (serum, toner):
+        crud.create_inventory_batch(db, InventoryBatchCreate(product_id=product.id, quantity=50, landing_price=2.0))
+    assert counters(db, serum.id) == (0, 0.0, None)
+
+    march = crud.create_daily_report(db, DailyReportCreate(date=date(2024, 3, 1), total_ad_spend=0.0))
+    april = crud.create_daily_report(db, DailyReportCreate(date=date(2024, 4, 1), total_ad_spend=0.0))
+    sale = crud.process_sale_fifo(db, SaleCreate(report_id=april.id, product_id=serum.id, quantity=2, selling_price=10.0))
+    crud.process_sales_bulk(db, [
+        SaleCreate(report_id=march.id, product_id=serum.id, quantity=3, selling_price=9.0),
+        SaleCreate(report_id=march.id, product_id=toner.id, quantity=1, selling_price=5.0),
+    ])
+    # An older report doesn't move the last-sale date back
+    assert counters(db, serum.id) == (5, 47.0, date(2024, 4, 1))
+    assert counters(db, toner.id) == (1, 5.0, date(2024, 3, 1))
+
+    # Dropping April's only sale rolls the last-sale date back to March
+    crud.update_daily_report(db, april.id, DailyReportUpdate(total_ad_spend=0.0, sales=[]))
+    assert counters(db, serum.id) == (3, 27.0, date(2024, 3, 1))
+
+    listed = {p.id: p for p in crud.get_products(db)}
+    assert listed[serum.id].total_sold == 3
+    assert sale.id not in [s.id for s in db.query(models.Sale).all()]
+
+def test_report_edit_moves_counters_between_products(db):
+    serum, toner = crud.get_product_by_sku(db, "CNT-1"), crud.get_product_by_sku(db, "CNT-2")
+    report = crud.create_daily_report(db, DailyReportCreate(date=date(2024, 5, 1), total_ad_spend=0.0))
+    sale = crud.process_sale_fifo(db, SaleCreate(report_id=report.id, product_id=serum.id, quantity=4, selling_price=10.0))
+
+    crud.update_daily_report(db, report.id, DailyReportUpdate(total_ad_spend=0.0, sales=[
+        SaleUpdate(id=sale.id, product_id=toner.id, quantity=2, selling_price=6.0)
+    ]))
+    assert counters(db, serum.id) == (3, 27.0, date(2024, 3, 1))
+    assert counters(db, toner.id) == (3, 17.0, date(2024, 5, 1))
+
+def test_backfill_fills_unset_counters(db):
+    serum = crud.get_product_by_sku(db, "CNT-1")
+    db.query(models.Product).update({models.Product.total_sold: None, models.Product.total_revenue: None})
+    db.commit()
+    crud.backfill_product_sales_counters(db)
+    assert counters(db, serum.id) == (3, 27.0, date(2024, 3, 1))
+
+def test_batch_pages(db):
+    mask = crud.create_product(db, ProductCreate(name="Mask", sku="CNT-3"))
+    batches = [crud.create_inventory_batch(db, InventoryBatchCreate(product_id=mask.id, quantity=1, landing_price=1.0)) for _ in range(3)]
+    report = crud.create_daily_report(db, DailyReportCreate(date=date(2024, 6, 1), total_ad_spend=0.0))
+    crud.process_sale_fifo(db, SaleCreate(report_id=report.id, product_id=mask.id, quantity=1, selling_price=3.0))
+
+    first, cursor = crud.get_product_batches_page(db, mask.id, limit=2)
+    rest, end = crud.get_product_batches_page(db, mask.id, cursor=cursor, limit=2)
+    assert [b.id for b in first + rest] == [b.id for b in reversed(batches)]
+    assert end is None
+
+    live, _ = crud.get_product_batches_page(db, mask.id, live_only=True)
+    # FIFO depleted the oldest batch
+    assert [b.id for b in live] == [batches[2].id, batches[1].id]
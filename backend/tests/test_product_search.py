@@ -0,0 +1,53 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+from schemas import ProductCreate, InventoryBatchCreate
+import crud
+
+# Setup Test DB
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    stock = {"LIP-001": 3, "LIP-002": 40, "GLO-001": 0, "SER-100": 12}
+    names = {"LIP-001": "Velvet Lipstick", "LIP-002": "Lip Gloss", "GLO-001": "Glow Serum", "SER-100": "Night Serum 100%"}
+    for sku, qty in stock.items():
+        prod = crud.create_product(session, ProductCreate(name=names[sku], sku=sku))
+        if qty:
+            crud.create_inventory_batch(session, InventoryBatchCreate(product_id=prod.id, quantity=qty, landing_price=2.0))
+    # More products than the old 100-row scan covered
+    for i in range(120):
+        crud.create_product(session, ProductCreate(name=f"Filler {i}", sku=f"FIL-{i:03d}"))
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def test_search_ranks_exact_sku_then_prefix_then_substring(db):
+    assert [p.sku for p in crud.search_products(db, "lip-001")] == ["LIP-001"]
+    assert [p.name for p in crud.search_products(db, "serum")] == ["Glow Serum", "Night Serum 100%"]
+    assert [p.name for p in crud.search_products(db, "stick")] == ["Velvet Lipstick"]
+
+def test_short_terms_match_prefix_only_and_wildcards_are_literal(db):
+    # "Lip Gloss" contains "gl" but doesn't start with it
+    assert [p.sku for p in crud.search_products(db, "gl")] == ["GLO-001"]
+    assert [p.sku for p in crud.search_products(db, "100%")] == ["SER-100"]
+    assert crud.search_products(db, "%") == []
+    assert crud.search_products(db, "  ") == []
+
+def test_low_stock_covers_every_product(db):
+    low = crud.get_low_stock_products(db, threshold=5, limit=500)
+    assert low[0].sku == "GLO-001" # emptiest first
+    assert "LIP-001" in {p.sku for p in low}
+    assert "LIP-002" not in {p.sku for p in low}
+    assert "FIL-119" in {p.sku for p in low} # past the old 100-row cutoff
@@ -0,0 +1,117 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from datetime import date, datetime, timedelta
+from fastapi import HTTPException
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base
+import models
+from schemas import (OwnerCreate, ProductCreate, ProductEquityInput, InventoryBatchCreate,
+                     DailyReportCreate, SaleCreate, ExpenseCreate)
+import crud
+
+# Setup Test DB
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+START = date(2024, 3, 1)
+DAYS = 5
+
+@pytest.fixture(scope="module")
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+
+    ana = crud.create_owner(session, OwnerCreate(name="Ana", equity_percentage=60))
+    ben = crud.create_owner(session, OwnerCreate(name="Ben", equity_percentage=40))
+    serum = crud.create_product(session, ProductCreate(name="Serum", equities=[
+        ProductEquityInput(owner_id=ana.id, equity_percentage=50),
+        ProductEquityInput(owner_id=ben.id, equity_percentage=50),
+    ]))
+    toner = crud.create_product(session, ProductCreate(name="Toner"))
+    for product in (serum, toner):
+        crud.create_inventory_batch(session, InventoryBatchCreate(product_id=product.id, quantity=100, landing_price=2.0))
+
+    for d in range(DAYS):
+        day = START + timedelta(days=d)
+        report = crud.create_daily_report(session, DailyReportCreate(date=day, total_ad_spend=5.0))
+        crud.process_sale_fifo(session, SaleCreate(report_id=report.id, product_id=serum.id, quantity=1 + d, selling_price=10.0))
+        crud.process_sale_fifo(session, SaleCreate(report_id=report.id, product_id=toner.id, quantity=2, selling_price=6.0))
+        crud.create_expense(session, ExpenseCreate(date=day, category="Packaging", amount=1.0, description="Boxes", product_id=serum.id))
+        crud.create_expense(session, ExpenseCreate(date=day, category="Tools", amount=2.0, description="Canva"))
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+def ledger_by_owner(db):
+    totals = {}
+    for entry in db.query(models.OwnerLedger).filter(models.OwnerLedger.transaction_type == "PROFIT_SHARE"):
+        totals[entry.owner_id] = round(totals.get(entry.owner_id, 0.0) + entry.amount, 2)
+    return totals
+
+def test_single_day_distribution_is_guarded(db):
+    report = crud.get_daily_report(db, START)
+    entries = crud.distribute_daily_profit(db, report.id)
+
+    # Serum: 1 * 8 - 1 = 7 split 50/50; Toner: 2 * 4 = 8 at 60/40; global: 5 ads + 2 tools at 60/40
+    amounts = {e.owner_id: e.amount for e in entries}
+    assert sorted(amounts.values()) == [round(3.5 + 3.2 - 2.8, 2), round(3.5 + 4.8 - 4.2, 2)]
+
+    with pytest.raises(HTTPException) as exc:
+        crud.distribute_daily_profit(db, report.id)
+    assert exc.value.status_code == 409
+
+def owner_named(db, name):
+    return db.query(models.Owner.id).filter(models.Owner.name == name).scalar()
+
+def test_range_matches_single_day_and_is_idempotent(db):
+    remaining = [crud.get_daily_report(db, START + timedelta(days=d)) for d in range(1, DAYS)]
+    # Day d: Serum (1 + d) * 8 - 1 split 50/50, Toner 8 at 60/40, 7 of global costs at 60/40
+    # Ana: 3.5 + 4d + 4.8 - 4.2, Ben: 3.5 + 4d + 3.2 - 2.8; day 0 was paid above
+    expected = {owner_named(db, "Ana"): 4.1 + 8.1 + 12.1 + 16.1 + 20.1, owner_named(db, "Ben"): 3.9 + 7.9 + 11.9 + 15.9 + 19.9}
+    expected = {k: round(v, 2) for k, v in expected.items()}
+
+    result = crud.distribute_profit_range(db, START, START + timedelta(days=DAYS))
+    assert result["distributed_report_ids"] == [r.id for r in remaining]
+    assert result["already_distributed_report_ids"] == [crud.get_daily_report(db, START).id]
+    assert result["entries"] == 2 * (DAYS - 1)
+    assert result["amount"] == 112.0
+    assert ledger_by_owner(db) == expected
+
+    # Running totals stayed in step with the bulk insert
+    for owner_id, total in expected.items():
+        assert round(crud.get_owner_balance(db, owner_id), 2) == total
+
+    again = crud.distribute_profit_range(db, START, START + timedelta(days=DAYS))
+    assert again["distributed_report_ids"] == []
+    assert again["entries"] == 0
+    assert ledger_by_owner(db) == expected
+
+def test_reports_paid_before_distributions_were_recorded(db):
+    assert crud.get_profit_distribution_cutover(db) is None
+    # A payout from the per-report endpoint back when it recorded nothing: older than any distribution
+    crud.owner_balance.record_ledger_entry(db, owner_named(db, "Ana"), 1.0, "PROFIT_SHARE", datetime(2024, 3, 20, 9, 0))
+    db.commit()
+    assert crud.get_profit_distribution_cutover(db) == date(2024, 3, 20)
+
+    legacy = crud.create_daily_report(db, DailyReportCreate(date=date(2024, 3, 20), total_ad_spend=1.0))
+    later = crud.create_daily_report(db, DailyReportCreate(date=date(2024, 3, 21), total_ad_spend=1.0))
+    with pytest.raises(HTTPException) as exc:
+        crud.distribute_profit_range(db, date(2024, 3, 15), date(2024, 3, 31))
+    assert exc.value.status_code == 409
+
+    assert crud.distribute_profit_range(db, date(2024, 3, 21), date(2024, 3, 31))["distributed_report_ids"] == [later.id]
+    forced = crud.distribute_profit_range(db, date(2024, 3, 15), date(2024, 3, 31), force=True)
+    assert forced["distributed_report_ids"] == [legacy.id]
+
+def test_configured_cutover(db, monkeypatch):
+    monkeypatch.setattr(crud.owner, "PROFIT_DISTRIBUTION_CUTOVER", "2024-04-30")
+    crud.create_daily_report(db, DailyReportCreate(date=date(2024, 4, 2), total_ad_spend=1.0))
+    with pytest.raises(HTTPException):
+        crud.distribute_profit_range(db, date(2024, 4, 1), date(2024, 4, 30))
@@ -19,6 +19,8 @@ const ChatWidget = () => {
     ]);
     const [input, setInput] = useState("");
     const [isLoading, setIsLoading] = useState(false);
+    const [isStreaming, setIsStreaming] = useState(false); // until the answer has fully arrived
+    const [activeTool, setActiveTool] = useState<string | null>(null);
     const scrollRef = useRef<HTMLDivElement>(null);
 
     // Load session from local storage or create a new one is handled by backend if we send a stored one
@@ -34,12 +36,13 @@ const ChatWidget = () => {
 
     const handleSubmit = async (e: React.FormEvent) => {
         e.preventDefault();
-        if (!input.trim() || isLoading) return;
+        if (!input.trim() || isStreaming) return;
 
         const userMessage = input.trim();
         setInput("");
         setMessages(prev => [...prev, { role: "user", content: userMessage }]);
         setIsLoading(true);
+        setIsStreaming(true);
 
         try {
             const payload: any = { query: userMessage };
@@ -48,27 +51,72 @@ const ChatWidget = () => {
             }
 
             const API_URL = import.meta.env.VITE_API_URL || "http://localhost:8000";
-            const response = await fetch(`${API_URL}/agent/chat`, {
+            const response = await fetch(`${API_URL}/agent/chat/stream`, {
                 method: "POST",
                 headers: { "Content-Type": "application/json" },
                 body: JSON.stringify(payload)
             });
 
-            if (!response.ok) throw new Error("Failed to get response");
-
-            const data = await response.json();
-
-            // Save session ID if it's new
-            if (data.session_id && data.session_id !== sessionId) {
-                setSessionId(data.session_id);
-                localStorage.setItem("chat_session_id", data.session_id);
+            if (!response.ok || !response.body) throw new Error("Failed to get response");
+
+            // Server-Sent Events: "event: <name>\ndata: <json>\n\n"
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            let started = false;
+
+            const handleEvent = (event: string, data: any) => {
+                if (event === "session") {
+                    // Save session ID if it's new
+                    if (data.session_id && data.session_id !== sessionId) {
+                        setSessionId(data.session_id);
+                        localStorage.setItem("chat_session_id", data.session_id);
+                    }
+                } else if (event === "tool_start") {
+                    setActiveTool(data.name);
+                } else if (event === "tool_end") {
+                    setActiveTool(null);
+                } else if (event === "token") {
+                    if (!started) {
+                        started = true;
+                        setIsLoading(false);
+                        setMessages(prev => [...prev, { role: "assistant", content: data.text }]);
+                    } else {
+                        setMessages(prev => {
+                            const last = prev[prev.length - 1];
+                            return [...prev.slice(0, -1), { ...last, content: last.content + data.text }];
+                        });
+                    }
+                } else if (event === "error") {
+                    throw new Error(data.detail);
+                }
+            };
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                let boundary;
+                while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+                    const block = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    const fields = Object.fromEntries(
+                        block.split("\n").map(line => [line.slice(0, line.indexOf(":")), line.slice(line.indexOf(":") + 2)])
+                    );
+                    handleEvent(fields.event, JSON.parse(fields.data));
+                }
             }
 
-            setMessages(prev => [...prev, { role: "assistant", content: data.response }]);
+            if (!started) {
+                setMessages(prev => [...prev, { role: "assistant", content: "No data is available." }]);
+            }
         } catch (error) {
             setMessages(prev => [...prev, { role: "assistant", content: "Sorry, I encountered an error connecting to the agent." }]);
         } finally {
             setIsLoading(false);
+            setIsStreaming(false);
+            setActiveTool(null);
         }
     };
 
@@ -133,9 +181,15 @@ const ChatWidget = () => {
                                         <Bot className="h-4 w-4" />
                                     </div>
                                     <div className="bg-muted/50 rounded-2xl px-4 py-2.5 rounded-tl-none flex gap-1 items-center h-[38px]">
-                                        <span className="w-1.5 h-1.5 bg-foreground/40 rounded-full animate-bounce [animation-delay:-0.3s]"></span>
-                                        <span className="w-1.5 h-1.5 bg-foreground/40 rounded-full animate-bounce [animation-delay:-0.15s]"></span>
-                                        <span className="w-1.5 h-1.5 bg-foreground/40 rounded-full animate-bounce"></span>
+                                        {activeTool ? (
+                                            <span className="text-xs text-muted-foreground">Checking {activeTool.replace(/_/g, " ")}...</span>
+                                        ) : (
+                                            <>
+                                                <span className="w-1.5 h-1.5 bg-foreground/40 rounded-full animate-bounce [animation-delay:-0.3s]"></span>
+                                                <span className="w-1.5 h-1.5 bg-foreground/40 rounded-full animate-bounce [animation-delay:-0.15s]"></span>
+                                                <span className="w-1.5 h-1.5 bg-foreground/40 rounded-full animate-bounce"></span>
+                                            </>
+                                        )}
                                     </div>
                                 </div>
                             )}
@@ -151,12 +205,12 @@ const ChatWidget = () => {
                                 onChange={(e) => setInput(e.target.value)}
                                 placeholder="Ask about sales, stock, expenses..."
                                 className="pr-12 rounded-full border-muted-foreground/20 focus-visible:ring-offset-0 focus-visible:ring-1"
-                                disabled={isLoading}
+                                disabled={isStreaming}
                             />
                             <Button
                                 type="submit"
                                 size="icon"
-                                disabled={!input.trim() || isLoading}
+                                disabled={!input.trim() || isStreaming}
                                 className="absolute right-1 top-1 h-8 w-8 rounded-full"
                             >
                                 <Send className="h-4 w-4" />
@@ -20,7 +20,7 @@ export function ChangePasswordDialog({ children }: { children: React.ReactNode }
     const [oldPassword, setOldPassword] = useState("");
     const [newPassword, setNewPassword] = useState("");
     const [loading, setLoading] = useState(false);
-    const { token } = useAuth();
+    const { token, login } = useAuth();
 
     const handleSubmit = async (e: React.FormEvent) => {
         e.preventDefault();
@@ -28,7 +28,9 @@ export function ChangePasswordDialog({ children }: { children: React.ReactNode }
 
         setLoading(true);
         try {
-            await api.changePassword(oldPassword, newPassword, token);
+            const data = await api.changePassword(oldPassword, newPassword, token);
+            // The old token is revoked by the password change; switch to the new one
+            if (data.access_token) login(data.access_token);
             toast.success("Password updated successfully");
             setOpen(false);
             setOldPassword("");
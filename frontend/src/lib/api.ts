@@ -27,9 +27,19 @@ export interface Product {
     product_url?: string;
     reorder_level?: number;
     total_sold?: number;
+    total_revenue?: number;
+    last_sold_at?: string | null;
     equities?: ProductEquity[];
 }
 
+export interface InventoryBatch {
+    id: number;
+    quantity: number;
+    remaining_quantity: number;
+    landing_price: number;
+    date_added: string;
+}
+
 export interface Owner {
     id: number;
     name: string;
@@ -88,6 +98,12 @@ export const api = {
         return response.json();
     },
 
+    getProductBatches: async (productId: number, cursor = "", limit = 50, liveOnly = false): Promise<{ items: InventoryBatch[]; next_cursor: string | null }> => {
+        const response = await fetch(`${API_URL}/products/${productId}/batches?cursor=${encodeURIComponent(cursor)}&limit=${limit}&live_only=${liveOnly}`);
+        if (!response.ok) throw new Error("Failed to fetch product batches");
+        return response.json();
+    },
+
     createInventoryBatch: async (data: { product_id: number; quantity: number; landing_price: number }) => {
         const response = await fetch(`${API_URL}/inventory/batch`, {
             method: 'POST',